@@ -36,10 +36,30 @@ class Settings(BaseSettings):
     WHISPER_MODEL_DEFAULT: str = os.getenv("WHISPER_MODEL", "medium")
     WHISPER_DEVICE: str = "cuda" if os.getenv("CUDA_AVAILABLE", "true").lower() == "true" else "cpu"
     
+    # Motor de ASR padrão (whisper ou faster-whisper); pode ser trocado por job
+    ASR_BACKEND_DEFAULT: str = os.getenv("ASR_BACKEND", "whisper")
+    
+    # Transcrição em duas passadas: rascunho com este modelo (vazio desliga);
+    # só os trechos de baixa confiança vão ao modelo do job
+    DRAFT_MODEL_DEFAULT: str = os.getenv("DRAFT_MODEL", "")
+    
+    # Precisão da inferência: vazio (padrão do dispositivo) ou int8 (quantização na CPU)
+    COMPUTE_TYPE: str = os.getenv("COMPUTE_TYPE", "")
+    
+    # Cache de etapas (VAD, diarização, transcrição) por hash do áudio e dos
+    # parâmetros; reenviar um arquivo com outro modelo reaproveita a diarização
+    STAGE_CACHE_DIR: str = os.getenv("STAGE_CACHE_DIR", "")
+    
+    # VAD: pular silêncio e música antes do Whisper
+    ENABLE_VAD: bool = os.getenv("REMOVE_SILENCE", "false").lower() == "true"
+    
     # PyAnnote Configuration
     ENABLE_DIARIZATION_DEFAULT: bool = os.getenv("ENABLE_DIARIZATION", "true").lower() == "true"
     DIARIZATION_MODEL: str = "pyannote/speaker-diarization-3.1"
     
+    # Índice de voiceprints para reconhecer oradores entre gravações
+    SPEAKER_INDEX_PATH: str = os.getenv("SPEAKER_INDEX", "")
+    
     # File Configuration
     MAX_FILE_SIZE: int = int(os.getenv("MAX_FILE_SIZE", "500"))  # MB
     ALLOWED_AUDIO_EXTENSIONS: List[str] = [
@@ -56,6 +76,30 @@ class Settings(BaseSettings):
     MAX_CONCURRENT_JOBS: int = int(os.getenv("MAX_CONCURRENT_JOBS", "2"))
     JOB_TIMEOUT: int = int(os.getenv("JOB_TIMEOUT", "3600"))  # seconds
     
+    # Agendamento com afinidade de modelo
+    SCHEDULER_MAX_WAIT: float = float(os.getenv("SCHEDULER_MAX_WAIT", "300"))  # seconds
+    SCHEDULER_AFFINITY_WAIT: float = float(os.getenv("SCHEDULER_AFFINITY_WAIT", "30"))  # seconds
+    
+    # Inferência em lote entre jobs (janelas de 30 s de jobs concorrentes)
+    BATCHED_INFERENCE: bool = os.getenv("BATCHED_INFERENCE", "false").lower() == "true"
+    BATCH_MAX_WAIT_MS: int = int(os.getenv("BATCH_MAX_WAIT_MS", "50"))
+    JOBS_PER_WORKER: int = int(os.getenv("JOBS_PER_WORKER", "4"))  # usado com BATCHED_INFERENCE
+    
+    # Concorrência adaptativa (MAX_CONCURRENT_JOBS vira o valor inicial)
+    ADAPTIVE_CONCURRENCY: bool = os.getenv("ADAPTIVE_CONCURRENCY", "false").lower() == "true"
+    CONCURRENCY_MAX_JOBS: int = int(os.getenv("CONCURRENCY_MAX_JOBS", "4"))
+    CONCURRENCY_INTERVAL: float = float(os.getenv("CONCURRENCY_INTERVAL", "60"))  # seconds
+    
+    # Índice de busca textual (SQLite FTS5) dos jobs concluídos
+    SEARCH_INDEX_PATH: str = os.getenv("SEARCH_INDEX", "results/search.db")
+    
+    # Streaming (WebSocket /ws/stream): modelo, passo de redecodificação e
+    # tamanho máximo do buffer, em segundos; sessões simultâneas limitadas
+    STREAM_MODEL_DEFAULT: str = os.getenv("STREAM_MODEL", "small")
+    STREAM_STEP_SECONDS: float = float(os.getenv("STREAM_STEP_SECONDS", "1.0"))
+    STREAM_MAX_BUFFER_SECONDS: float = float(os.getenv("STREAM_MAX_BUFFER_SECONDS", "15"))
+    STREAM_MAX_SESSIONS: int = int(os.getenv("STREAM_MAX_SESSIONS", "4"))
+    
     # Language Settings
     DEFAULT_LANGUAGE: str = "pt"
     SUPPORTED_LANGUAGES: List[str] = [
@@ -72,7 +116,8 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     
     # Performance tuning para RTX 3060
-    TORCH_THREADS: int = int(os.getenv("TORCH_THREADS", "4"))
+    # Threads do PyTorch por job (0: núcleos disponíveis / MAX_CONCURRENT_JOBS)
+    TORCH_THREADS: int = int(os.getenv("TORCH_THREADS", "0"))
     BATCH_SIZE: int = int(os.getenv("BATCH_SIZE", "16"))
     
     class Config:
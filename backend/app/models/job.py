@@ -44,6 +44,17 @@ class TranscriptionMetadata(BaseModel):
     total_duration: float = Field(..., description="Duração total do áudio em segundos")
     language: str = Field(..., description="Idioma principal detectado")
     model_used: str = Field(..., description="Modelo Whisper utilizado")
+    asr_backend: str = Field("whisper", description="Motor de ASR utilizado (whisper, faster-whisper)")
+    draft_model: Optional[str] = Field(None, description="Modelo de rascunho da transcrição em duas passadas")
+    speculative: Optional[Dict[str, Any]] = Field(
+        None, description="Transcrição em duas passadas: fração do áudio escalada ao modelo principal"
+    )
+    stages: Optional[Dict[str, Any]] = Field(
+        None, description="Etapas executadas, reaproveitadas do cache de etapas e dispensadas"
+    )
+    profile: Optional[Dict[str, Any]] = Field(
+        None, description="Perfil do job (profile=true): diretório e tempo de parede de cada etapa"
+    )
     diarization_enabled: bool = Field(..., description="Se diarização foi habilitada")
     processing_time: float = Field(..., description="Tempo de processamento em segundos")
     file_size: int = Field(..., description="Tamanho do arquivo original em bytes")
@@ -73,13 +84,19 @@ class TranscriptionResult(BaseModel):
 class JobRequest(BaseModel):
     """Request para criar um novo job."""
     model: str = Field("medium", description="Modelo Whisper (tiny, base, small, medium, large)")
+    asr_backend: Optional[str] = Field(None, description="Motor de ASR (whisper, faster-whisper)")
+    draft_model: Optional[str] = Field(
+        None, description="Rascunho com este modelo e `model` só nos trechos de baixa confiança"
+    )
     enable_diarization: bool = Field(True, description="Habilitar diarização de oradores")
     language: str = Field("pt", description="Idioma do áudio")
+    profile: bool = Field(False, description="Gravar o perfil de cada etapa junto do resultado")
     
     class Config:
         schema_extra = {
             "example": {
                 "model": "medium",
+                "asr_backend": "faster-whisper",
                 "enable_diarization": True,
                 "language": "pt"
             }
@@ -98,8 +115,11 @@ class JobResponse(BaseModel):
     filename: str = Field(..., description="Nome do arquivo original")
     file_path: str = Field(..., description="Caminho do arquivo no servidor")
     model: str = Field(..., description="Modelo Whisper utilizado")
+    asr_backend: str = Field("whisper", description="Motor de ASR utilizado")
+    draft_model: Optional[str] = Field(None, description="Modelo de rascunho (transcrição em duas passadas)")
     enable_diarization: bool = Field(..., description="Se diarização está habilitada")
     language: str = Field(..., description="Idioma configurado")
+    profile: bool = Field(False, description="Se o perfil de desempenho está sendo gravado")
     
     progress: int = Field(0, description="Progresso do processamento (0-100)")
     message: str = Field("", description="Mensagem de status atual")
@@ -142,7 +162,8 @@ class JobResponse(BaseModel):
                 "download_urls": {
                     "txt": "/jobs/550e8400-e29b-41d4-a716-446655440000/download/txt",
                     "json": "/jobs/550e8400-e29b-41d4-a716-446655440000/download/json",
-                    "srt": "/jobs/550e8400-e29b-41d4-a716-446655440000/download/srt"
+                    "srt": "/jobs/550e8400-e29b-41d4-a716-446655440000/download/srt",
+                    "vtt": "/jobs/550e8400-e29b-41d4-a716-446655440000/download/vtt"
                 }
             }
         }
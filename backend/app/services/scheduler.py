@@ -0,0 +1,324 @@
+"""
+🧭 Agendador de jobs com afinidade de modelo
+Encaminha cada job para um worker que já tem o modelo Whisper carregado
+"""
+
+import time
+import asyncio
+import logging
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Worker:
+    """Worker que mantém um modelo Whisper carregado entre jobs."""
+    worker_id: int
+    model_name: Optional[str] = None
+    model: Any = None
+    active: int = 0
+    jobs_done: int = 0
+    retired: bool = False
+
+    @property
+    def busy(self) -> bool:
+        return self.active > 0
+
+
+@dataclass
+class ScheduledJob:
+    """Job aguardando um worker."""
+    job_id: str
+    model: str
+    run: Callable[[Worker], Awaitable[Any]]
+    on_error: Optional[Callable[[Exception], None]] = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class ModelAffinityScheduler:
+    """
+    Agendador com afinidade de modelo.
+
+    Jobs ficam em filas por modelo. Um worker livre atende primeiro a fila
+    do modelo que já tem carregado, de modo que jobs do mesmo modelo são
+    processados em sequência sem recarga. Com `slots_per_worker` > 1, um
+    worker executa vários jobs do seu modelo ao mesmo tempo (útil com
+    inferência em lote entre jobs). Só troca de modelo quando há
+    demanda que os workers com aquele modelo não dão conta; um job aguarda
+    até `affinity_wait` segundos por um worker ocupado que já tem o modelo.
+    Nenhum job espera mais que `max_wait` segundos: passado esse limite, o
+    job mais antigo é atendido pelo próximo worker livre, mesmo com recarga.
+
+    Com um `controller` (ConcurrencyController), o número de workers é
+    ajustado após cada job conforme a vazão registrada no controlador.
+    `on_resize(num_workers)` é chamado a cada mudança (ex.: para dividir
+    de novo os núcleos entre os jobs).
+    """
+
+    def __init__(
+        self,
+        load_model: Callable[[str], Any],
+        num_workers: int = 2,
+        max_wait: float = 300.0,
+        affinity_wait: float = 30.0,
+        slots_per_worker: int = 1,
+        unload_model: Optional[Callable[[Any], None]] = None,
+        controller: Any = None,
+        on_resize: Optional[Callable[[int], None]] = None
+    ):
+        self.load_model = load_model
+        self.unload_model = unload_model
+        self.controller = controller
+        self.on_resize = on_resize
+        self.slots_per_worker = max(1, slots_per_worker)
+        self.max_wait = max_wait
+        self.affinity_wait = min(affinity_wait, max_wait)
+        self.workers = [Worker(worker_id=i) for i in range(num_workers)]
+        self._next_worker_id = num_workers
+
+        self._queues: "OrderedDict[str, Deque[ScheduledJob]]" = OrderedDict()
+        self._condition: Optional[asyncio.Condition] = None
+        self._tasks: List[asyncio.Task] = []
+
+        # Métricas
+        self.model_loads: Counter = Counter()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.jobs_completed = 0
+        self.total_wait = 0.0
+        self.max_observed_wait = 0.0
+
+    def start(self):
+        """Iniciar os workers (chamar com o event loop rodando)."""
+        self._condition = asyncio.Condition()
+        self._tasks = []
+        for worker in self.workers:
+            self._start_worker(worker)
+
+    def _start_worker(self, worker: Worker):
+        self._tasks.extend(
+            asyncio.create_task(self._worker_loop(worker))
+            for _ in range(self.slots_per_worker)
+        )
+
+    @property
+    def num_workers(self) -> int:
+        """Workers ativos (sem contar os em desativação)."""
+        return sum(1 for w in self.workers if not w.retired)
+
+    async def set_concurrency(self, num_workers: int):
+        """
+        Alterar o número de workers.
+
+        Workers novos começam sem modelo; na redução, são desativados
+        primeiro os ociosos, e os ocupados saem ao terminar os jobs atuais.
+        """
+        num_workers = max(1, num_workers)
+        async with self._condition:
+            active = [w for w in self.workers if not w.retired]
+            for _ in range(num_workers - len(active)):
+                worker = Worker(worker_id=self._next_worker_id)
+                self._next_worker_id += 1
+                self.workers.append(worker)
+                self._start_worker(worker)
+            excess = len(active) - num_workers
+            if excess > 0:
+                for worker in sorted(active, key=lambda w: (w.busy, -w.worker_id))[:excess]:
+                    worker.retired = True
+            self._condition.notify_all()
+        if self.on_resize:
+            self.on_resize(num_workers)
+
+    async def stop(self):
+        """Encerrar os workers."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(
+        self,
+        job_id: str,
+        model: str,
+        run: Callable[[Worker], Awaitable[Any]],
+        on_error: Optional[Callable[[Exception], None]] = None
+    ):
+        """
+        Enfileirar um job.
+        
+        `run` recebe o worker com o modelo já carregado; `on_error` é chamado
+        se o job falhar fora de `run` (ex.: erro ao carregar o modelo).
+        """
+        async with self._condition:
+            job = ScheduledJob(job_id, model, run, on_error)
+            self._queues.setdefault(model, deque()).append(job)
+            self._condition.notify_all()
+
+    async def discard(self, job_id: str) -> bool:
+        """Remover um job ainda na fila. Retorna True se foi removido."""
+        async with self._condition:
+            for queue in self._queues.values():
+                for job in queue:
+                    if job.job_id == job_id:
+                        queue.remove(job)
+                        return True
+        return False
+
+    def _pick_job(self, worker: Worker) -> Optional[ScheduledJob]:
+        """Escolher o próximo job para o worker (chamado com o lock adquirido)."""
+        pending = [queue[0] for queue in self._queues.values() if queue]
+        if not pending:
+            return None
+
+        now = time.monotonic()
+
+        # Worker com jobs em andamento só aceita jobs do modelo que já tem
+        if worker.busy:
+            queue = self._queues.get(worker.model_name)
+            return queue.popleft() if queue else None
+
+        # 1. Limite de espera: o job mais antigo passa na frente
+        oldest = min(pending, key=lambda job: job.enqueued_at)
+        if now - oldest.enqueued_at >= self.max_wait:
+            return self._queues[oldest.model].popleft()
+
+        # 2. Afinidade: continuar no modelo já carregado
+        if self._queues.get(worker.model_name):
+            return self._queues[worker.model_name].popleft()
+
+        # 3. Trocar de modelo apenas se os workers que já o têm não dão conta.
+        # Workers ocupados só contam enquanto o job não esperou `affinity_wait`.
+        holders = Counter()
+        for other in self.workers:
+            if other is worker or other.retired or other.model_name not in self._queues:
+                continue
+            head = self._queues[other.model_name][0] if self._queues[other.model_name] else None
+            if not other.busy or (head and now - head.enqueued_at < self.affinity_wait):
+                holders[other.model_name] += 1
+        candidates = [
+            model for model, queue in self._queues.items()
+            if queue and len(queue) > holders[model]
+        ]
+        if not candidates:
+            return None
+
+        # Preferir o modelo com mais jobs acumulados (agrupa jobs do mesmo modelo)
+        model = max(
+            candidates,
+            key=lambda m: (len(self._queues[m]), -self._queues[m][0].enqueued_at)
+        )
+        return self._queues[model].popleft()
+
+    def _next_deadline(self) -> Optional[float]:
+        """Segundos até algum job da fila estourar um limite de espera."""
+        now = time.monotonic()
+        deadlines = [
+            limit
+            for queue in self._queues.values() if queue
+            for limit in (queue[0].enqueued_at + self.affinity_wait, queue[0].enqueued_at + self.max_wait)
+            if limit > now
+        ]
+        return min(deadlines) - now if deadlines else None
+
+    async def _worker_loop(self, worker: Worker):
+        """Loop de um worker: escolher job, garantir o modelo e executar."""
+        while True:
+            async with self._condition:
+                job = None if worker.retired else self._pick_job(worker)
+                while job is None and not worker.retired:
+                    try:
+                        await asyncio.wait_for(self._condition.wait(), timeout=self._next_deadline())
+                    except asyncio.TimeoutError:
+                        pass
+                    job = self._pick_job(worker)
+                if job is None:
+                    # Worker desativado: o último slot a sair libera o modelo
+                    previous = None
+                    if worker.active == 0 and worker in self.workers:
+                        self.workers.remove(worker)
+                        previous, worker.model, worker.model_name = worker.model, None, None
+                        logger.info(f"Worker {worker.worker_id} desativado")
+                else:
+                    worker.active += 1
+                    if job.model != worker.model_name:
+                        # Troca pendente: outros slots não pegam jobs do modelo antigo
+                        worker.model_name = None
+
+            if job is None:
+                if previous is not None and self.unload_model:
+                    await asyncio.to_thread(self.unload_model, previous)
+                return
+
+            wait = time.monotonic() - job.enqueued_at
+            self.total_wait += wait
+            self.max_observed_wait = max(self.max_observed_wait, wait)
+
+            try:
+                await self._ensure_model(worker, job.model)
+                await job.run(worker)
+            except Exception as e:
+                logger.error(f"Worker {worker.worker_id}: erro no job {job.job_id}: {e}")
+                if job.on_error:
+                    job.on_error(e)
+            finally:
+                worker.jobs_done += 1
+                self.jobs_completed += 1
+                async with self._condition:
+                    worker.active -= 1
+                    self._condition.notify_all()
+
+            if self.controller:
+                limit = self.controller.update()
+                if limit != self.num_workers:
+                    await self.set_concurrency(limit)
+
+    async def _ensure_model(self, worker: Worker, model: str):
+        """Carregar o modelo no worker se ele ainda não o tiver."""
+        if worker.model_name == model and worker.model is not None:
+            self.cache_hits += 1
+            return
+
+        self.cache_misses += 1
+        logger.info(f"Worker {worker.worker_id}: carregando modelo {model}")
+
+        # Liberar o modelo anterior antes de carregar o novo
+        previous, worker.model, worker.model_name = worker.model, None, None
+        if previous is not None and self.unload_model:
+            await asyncio.to_thread(self.unload_model, previous)
+        del previous
+        worker.model = await asyncio.to_thread(self.load_model, model)
+        worker.model_name = model
+        self.model_loads[model] += 1
+
+        # Outros slots do worker podem agora pegar jobs deste modelo
+        async with self._condition:
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Métricas do agendador para ajuste fino."""
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "workers": [
+                {
+                    "worker_id": w.worker_id,
+                    "model": w.model_name,
+                    "active_jobs": w.active,
+                    "jobs_done": w.jobs_done
+                }
+                for w in self.workers
+            ],
+            "queued": {model: len(queue) for model, queue in self._queues.items() if queue},
+            "model_loads": dict(self.model_loads),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "hit_ratio": round(self.cache_hits / lookups, 4) if lookups else 0.0,
+            "jobs_completed": self.jobs_completed,
+            "avg_wait_seconds": round(self.total_wait / self.jobs_completed, 2) if self.jobs_completed else 0.0,
+            "max_wait_seconds": round(self.max_observed_wait, 2),
+            "max_wait_limit_seconds": self.max_wait,
+            "affinity_wait_seconds": self.affinity_wait,
+            "concurrency": self.controller.stats() if self.controller else None
+        }
@@ -1,34 +1,109 @@
 """
 🎵 Serviço de Transcrição
-Integra o script CLI atual com a API web
+Integra o pipeline do script CLI atual com a API web
 """
 
 import os
 import sys
+import math
 import asyncio
-import subprocess
-import json
+import threading
 import logging
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Dict, Any, Callable, Optional
+from typing import Dict, Any, Callable, List, Optional
 from datetime import datetime
 
 # Adicionar o diretório raiz ao path para importar o script CLI
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+import transcrever
+from transcritor.asr import ASRBackend, backend_key, split_backend_key
+from transcritor.speaker_index import SpeakerIndex
+
+from app.core.config import get_settings
+
+settings = get_settings()
 
 logger = logging.getLogger(__name__)
 
 
+def _is_batching_server(model: Any) -> bool:
+    """isinstance(model, BatchingInferenceServer) sem importar torch/whisper."""
+    batching = sys.modules.get("transcritor.batching")
+    return batching is not None and isinstance(model, batching.BatchingInferenceServer)
+
+
 class TranscriptionService:
     """Serviço principal de transcrição."""
     
     def __init__(self):
         self.project_root = Path(__file__).parent.parent.parent.parent
-        self.cli_script = self.project_root / "transcrever.py"
+        self.work_dir = self.project_root / "temp"
+        
+        # Pipeline de diarização compartilhado entre workers (carregado sob demanda)
+        self._diarization_pipeline = None
+        self._diarization_lock = threading.Lock()
+        
+        # Voiceprints cadastrados (somente leitura durante os jobs)
+        self.speaker_index = None
+        if settings.SPEAKER_INDEX_PATH:
+            self.speaker_index = SpeakerIndex.load(settings.SPEAKER_INDEX_PATH)
+            logger.info(f"Índice de oradores carregado: {len(self.speaker_index)} voiceprints")
+    
+    def load_model(self, model: str):
+        """
+        Carregar modelo de ASR em memória.
+        
+        `model` é a chave do agendador (transcritor.asr.backend_key): o nome
+        do modelo Whisper ou "backend:modelo" para outros motores.
+        Com BATCHED_INFERENCE, retorna um BatchingInferenceServer que agrupa
+        as janelas de todos os jobs que usam este modelo no worker (só no
+        backend whisper).
+        Bloqueante: chamar via asyncio.to_thread a partir do event loop.
+        """
+        backend, model = split_backend_key(model)
+        logger.info(f"Carregando modelo '{model}' ({backend})...")
+        whisper_model = transcrever.load_asr_model(model, backend, settings.COMPUTE_TYPE or None)
         
-        # Verificar se o script CLI existe
-        if not self.cli_script.exists():
-            logger.warning(f"Script CLI não encontrado em: {self.cli_script}")
+        if settings.BATCHED_INFERENCE and not isinstance(whisper_model, ASRBackend):
+            from transcritor.batching import BatchingInferenceServer
+            return BatchingInferenceServer(
+                whisper_model,
+                max_batch_size=settings.BATCH_SIZE,
+                max_wait=settings.BATCH_MAX_WAIT_MS / 1000
+            ).start()
+        return whisper_model
+    
+    def unload_model(self, model: Any):
+        """Liberar um modelo carregado por `load_model`."""
+        if _is_batching_server(model):
+            model.stop()
+        elif isinstance(model, ASRBackend):
+            model.close()
+    
+    def get_stream_model(self, model: str, asr_backend: Optional[str] = None) -> Any:
+        """
+        Modelo para as sessões de streaming.
+        
+        Fica fora do agendador (uma sessão dura o tempo da reunião e não
+        pode esperar na fila): é carregado uma vez por processo e
+        compartilhado entre as sessões, que decodificam uma de cada vez
+        (transcrever.model_lock). Bloqueante: chamar via asyncio.to_thread.
+        """
+        backend = asr_backend or settings.ASR_BACKEND_DEFAULT
+        compute_type = settings.COMPUTE_TYPE or None
+        return transcrever.shared_model(
+            ("asr", backend, model, compute_type),
+            lambda: transcrever.load_asr_model(model, backend, compute_type)
+        )
+    
+    def _get_diarization_pipeline(self):
+        """Obter o pipeline de diarização, carregando-o na primeira chamada."""
+        with self._diarization_lock:
+            if self._diarization_pipeline is None:
+                self._diarization_pipeline = transcrever.load_diarization_pipeline(settings.COMPUTE_TYPE or None)
+            return self._diarization_pipeline
     
     async def transcribe_file(
         self,
@@ -37,10 +112,14 @@ class TranscriptionService:
         enable_diarization: bool = True,
         language: str = "pt",
         job_id: str = None,
-        progress_callback: Optional[Callable] = None
+        progress_callback: Optional[Callable] = None,
+        whisper_model: Any = None,
+        asr_backend: Optional[str] = None,
+        draft_model: Optional[str] = None,
+        profile_dir: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        Transcrever arquivo usando o script CLI atual.
+        Transcrever arquivo no próprio processo, reaproveitando modelos carregados.
         
         Args:
             file_path: Caminho para o arquivo de áudio
@@ -49,6 +128,12 @@ class TranscriptionService:
             language: Idioma do áudio
             job_id: ID do job para tracking
             progress_callback: Função para atualizar progresso
+            whisper_model: Modelo (ou servidor de lote) já carregado pelo worker
+            asr_backend: Motor de ASR (padrão: ASR_BACKEND_DEFAULT)
+            draft_model: Modelo de rascunho da transcrição em duas passadas
+                (carregado uma vez por processo e compartilhado entre workers)
+            profile_dir: Se informado, grava o perfil de cada etapa
+                (transcritor.profiling) neste diretório
         
         Returns:
             Resultado da transcrição em formato estruturado
@@ -64,27 +149,69 @@ class TranscriptionService:
             if not os.path.exists(file_path):
                 raise FileNotFoundError(f"Arquivo não encontrado: {file_path}")
             
-            if progress_callback:
-                progress_callback(10, "Preparando transcrição...")
+            if whisper_model is None:
+                if progress_callback:
+                    progress_callback(10, "Carregando modelo...")
+                whisper_model = await asyncio.to_thread(
+                    self.load_model, backend_key(asr_backend or settings.ASR_BACKEND_DEFAULT, model)
+                )
             
-            # Preparar argumentos para o script CLI
-            cmd_args = self._build_cli_command(
-                file_path, model, enable_diarization, language, job_id
-            )
+            if progress_callback:
+                progress_callback(20, "Processando áudio...")
+            
+            profiler = None
+            if profile_dir:
+                from transcritor.profiling import Profiler
+                profiler = Profiler(profile_dir)
+            
+            def extract():
+                # Perfilada na thread que executa a extração, não no event loop
+                with profiler.stage("extract") if profiler else nullcontext():
+                    return transcrever.extract_audio(file_path, str(self.work_dir))
+            
+            os.makedirs(self.work_dir, exist_ok=True)
+            audio_path = await asyncio.to_thread(extract)
+            if audio_path is None:
+                raise RuntimeError("Falha na extração de áudio")
+            
+            draft = None
+            if draft_model:
+                if progress_callback:
+                    progress_callback(25, "Carregando modelo de rascunho...")
+                draft = await asyncio.to_thread(
+                    transcrever.load_draft_model, draft_model,
+                    asr_backend or settings.ASR_BACKEND_DEFAULT, settings.COMPUTE_TYPE or None
+                )
             
             if progress_callback:
-                progress_callback(15, "Iniciando processamento...")
+                progress_callback(30, "Transcrevendo...")
             
-            # Executar script CLI
-            result = await self._run_cli_transcription(cmd_args, progress_callback)
+            pipeline_stats = {}
+            model_id = "/".join(["asr", asr_backend or settings.ASR_BACKEND_DEFAULT, model, settings.COMPUTE_TYPE])
+            segments = await asyncio.to_thread(
+                self._transcribe_sync, audio_path, whisper_model, enable_diarization, language,
+                pipeline_stats, draft, model_id, profiler
+            )
             
             if progress_callback:
                 progress_callback(95, "Processando resultados...")
             
-            # Processar resultados
-            transcription_result = await self._process_cli_results(
-                file_path, result, start_time
+            transcription_result = self._build_result(
+                file_path, segments, model, enable_diarization, language, start_time
             )
+            metadata = transcription_result["metadata"]
+            metadata["total_duration"] = pipeline_stats.get("audio_seconds", metadata["total_duration"])
+            metadata["asr_backend"] = asr_backend or settings.ASR_BACKEND_DEFAULT
+            if "vad" in pipeline_stats:
+                metadata["vad"] = pipeline_stats["vad"]
+            metadata["draft_model"] = draft_model
+            if "speculative" in pipeline_stats:
+                metadata["speculative"] = pipeline_stats["speculative"]
+            if "dag" in pipeline_stats:
+                metadata["stages"] = pipeline_stats["dag"]
+            if profiler is not None:
+                await asyncio.to_thread(profiler.save, job_id=job_id, model=model, stages_run=pipeline_stats.get("dag"))
+                metadata["profile"] = {"directory": profile_dir, "stages": profiler.stages()}
             
             if progress_callback:
                 progress_callback(100, "Transcrição concluída!")
@@ -97,252 +224,117 @@ class TranscriptionService:
                 progress_callback(0, f"Erro: {str(e)}")
             raise
     
-    def _build_cli_command(
+    def _transcribe_sync(
         self,
-        file_path: str,
-        model: str,
+        audio_path: str,
+        whisper_model: Any,
         enable_diarization: bool,
         language: str,
-        job_id: str = None
-    ) -> list:
-        """Construir comando para executar o script CLI."""
-        
-        cmd = [
-            sys.executable,  # python
-            str(self.cli_script),
-            file_path,
-            "--modelo", model,
-            "--idioma", language,
-            "--formato", "json",  # Sempre gerar JSON para parsing
-        ]
-        
-        if enable_diarization:
-            cmd.append("--diarizacao")
-        
-        if job_id:
-            # Usar job_id como prefixo para os arquivos de saída
-            output_prefix = f"results/{job_id}"
-            cmd.extend(["--output", output_prefix])
-        
-        # Sempre gerar verbose para capturar progresso
-        cmd.append("--verbose")
-        
-        return cmd
-    
-    async def _run_cli_transcription(
-        self,
-        cmd_args: list,
-        progress_callback: Optional[Callable] = None
-    ) -> subprocess.CompletedProcess:
-        """Executar o script CLI de forma assíncrona."""
+        stats: Optional[Dict[str, Any]] = None,
+        draft_model: Any = None,
+        model_id: Optional[str] = None,
+        profiler: Any = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Executar o pipeline de transcrição (bloqueante, roda em thread).
         
-        try:
-            # Executar comando de forma assíncrona
-            process = await asyncio.create_subprocess_exec(
-                *cmd_args,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=self.project_root
-            )
-            
-            # Monitorar progresso se callback fornecido
-            if progress_callback:
-                asyncio.create_task(
-                    self._monitor_progress(process, progress_callback)
-                )
-            
-            # Aguardar conclusão
-            stdout, stderr = await process.communicate()
-            
-            # Verificar se houve erro
-            if process.returncode != 0:
-                error_msg = stderr.decode('utf-8') if stderr else "Erro desconhecido"
-                raise RuntimeError(f"Script CLI falhou: {error_msg}")
-            
-            return subprocess.CompletedProcess(
-                cmd_args, process.returncode, stdout, stderr
-            )
-            
-        except Exception as e:
-            logger.error(f"Erro ao executar CLI: {str(e)}")
-            raise
-    
-    async def _monitor_progress(
-        self,
-        process: asyncio.subprocess.Process,
-        progress_callback: Callable
-    ):
-        """Monitorar progresso do script CLI."""
+        `model_id` identifica `whisper_model` no cache de etapas
+        (STAGE_CACHE_DIR); o pipeline de diarização só é carregado se a
+        diarização não vier do cache.
+        """
         
-        progress_stages = {
-            "Carregando modelo": 20,
-            "Processando áudio": 30,
-            "Transcrevendo": 60,
-            "Diarização": 80,
-            "Salvando": 90
-        }
+        asr_server = None
+        if _is_batching_server(whisper_model):
+            asr_server, whisper_model = whisper_model, None
         
-        try:
-            # Ler saída em tempo real
-            while True:
-                line = await process.stderr.readline()
-                if not line:
-                    break
-                
-                line_text = line.decode('utf-8').strip()
-                
-                # Procurar por indicadores de progresso
-                for stage, progress in progress_stages.items():
-                    if stage.lower() in line_text.lower():
-                        progress_callback(progress, f"{stage}...")
-                        break
-                
-        except Exception as e:
-            logger.warning(f"Erro ao monitorar progresso: {str(e)}")
+        return transcrever.transcribe_segments(
+            audio_path,
+            whisper_model=whisper_model,
+            load_diarization=self._get_diarization_pipeline,
+            language=language,
+            enable_diarization=enable_diarization,
+            asr_server=asr_server,
+            speaker_index=self.speaker_index,
+            vad=settings.ENABLE_VAD,
+            stats=stats,
+            draft_model=draft_model or "",
+            model_id=model_id,
+            cache=settings.STAGE_CACHE_DIR,
+            work_dir=str(self.work_dir),
+            profiler=profiler
+        )
     
-    async def _process_cli_results(
+    def _build_result(
         self,
         original_file: str,
-        cli_result: subprocess.CompletedProcess,
+        raw_segments: List[Dict[str, Any]],
+        model: str,
+        enable_diarization: bool,
+        language: str,
         start_time: datetime
     ) -> Dict[str, Any]:
-        """Processar resultados do script CLI."""
+        """Estruturar os segmentos do pipeline no formato da API."""
         
-        try:
-            # Calcular tempo de processamento
-            processing_time = (datetime.now() - start_time).total_seconds()
-            
-            # Procurar arquivos de resultado
-            base_name = Path(original_file).stem
-            result_files = {
-                "json": None,
-                "txt": None,
-                "srt": None
-            }
-            
-            # Procurar nos diretórios padrão
-            search_dirs = [".", "results", str(Path(original_file).parent)]
-            
-            for search_dir in search_dirs:
-                for ext in result_files.keys():
-                    pattern = f"{base_name}*.{ext}"
-                    matches = list(Path(search_dir).glob(pattern))
-                    if matches:
-                        result_files[ext] = str(matches[0])
-                        break
-            
-            # Tentar carregar resultado JSON
-            transcription_data = None
-            if result_files["json"] and os.path.exists(result_files["json"]):
-                try:
-                    with open(result_files["json"], 'r', encoding='utf-8') as f:
-                        transcription_data = json.load(f)
-                except Exception as e:
-                    logger.warning(f"Erro ao carregar JSON: {e}")
-            
-            # Se não tiver JSON, criar estrutura básica do TXT
-            if not transcription_data and result_files["txt"]:
-                transcription_data = await self._parse_txt_result(result_files["txt"])
-            
-            # Estruturar resultado final
-            result = {
-                "segments": transcription_data.get("segments", []) if transcription_data else [],
-                "speakers": transcription_data.get("speakers", {}) if transcription_data else {},
-                "metadata": {
-                    "total_duration": transcription_data.get("duration", 0) if transcription_data else 0,
-                    "language": transcription_data.get("language", "pt") if transcription_data else "pt",
-                    "model_used": transcription_data.get("model", "unknown") if transcription_data else "unknown",
-                    "diarization_enabled": bool(transcription_data.get("speakers")) if transcription_data else False,
-                    "processing_time": processing_time,
-                    "file_size": os.path.getsize(original_file),
-                    "speakers_detected": len(transcription_data.get("speakers", {})) if transcription_data else 0,
-                    "word_count": self._count_words(transcription_data) if transcription_data else 0,
-                    "confidence_avg": self._calculate_avg_confidence(transcription_data) if transcription_data else 0.0
-                },
-                "files": result_files
-            }
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"Erro ao processar resultados: {str(e)}")
-            
-            # Retornar resultado mínimo em caso de erro
-            return {
-                "segments": [],
-                "speakers": {},
-                "metadata": {
-                    "total_duration": 0,
-                    "language": "pt",
-                    "model_used": "unknown",
-                    "diarization_enabled": False,
-                    "processing_time": (datetime.now() - start_time).total_seconds(),
-                    "file_size": os.path.getsize(original_file) if os.path.exists(original_file) else 0,
-                    "speakers_detected": 0,
-                    "word_count": 0,
-                    "confidence_avg": 0.0
-                },
-                "files": {"json": None, "txt": None, "srt": None}
-            }
-    
-    async def _parse_txt_result(self, txt_file: str) -> Dict[str, Any]:
-        """Fazer parsing básico do arquivo TXT quando JSON não disponível."""
+        segments = []
+        speakers = {}
         
-        try:
-            segments = []
-            speakers = set()
-            
-            with open(txt_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            
-            segment_id = 1
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # Formato esperado: [SPEAKER_XX]: texto
-                if line.startswith('[') and ']:' in line:
-                    speaker_end = line.find(']:')
-                    speaker = line[1:speaker_end]
-                    text = line[speaker_end + 2:].strip()
-                    
-                    speakers.add(speaker)
-                    
-                    segments.append({
-                        "id": f"segment_{segment_id:03d}",
-                        "start": "00:00:00.000",  # Não temos timestamps do TXT
-                        "end": "00:00:00.000",
-                        "duration": 0.0,
-                        "speaker": speaker,
-                        "text": text,
-                        "confidence": 0.8  # Confiança padrão
-                    })
-                    
-                    segment_id += 1
-            
-            # Criar estrutura de speakers
-            speakers_dict = {}
-            for speaker in speakers:
-                speakers_dict[speaker] = {
-                    "speaker_id": speaker,
-                    "first_appearance": "00:00:00.000",
-                    "total_duration": 0.0,
-                    "segment_count": len([s for s in segments if s["speaker"] == speaker]),
-                    "confidence": 0.8
-                }
-            
-            return {
-                "segments": segments,
-                "speakers": speakers_dict,
-                "language": "pt",
-                "model": "unknown",
-                "duration": 0
+        for index, raw in enumerate(raw_segments, 1):
+            avg_logprob = raw.get("avg_logprob")
+            confidence = math.exp(avg_logprob) if avg_logprob is not None else 0.0
+            duration = raw["end"] - raw["start"]
+            
+            segments.append({
+                "id": f"segment_{index:03d}",
+                "start": self._format_timestamp(raw["start"]),
+                "end": self._format_timestamp(raw["end"]),
+                "duration": round(duration, 3),
+                "speaker": raw["speaker"],
+                "text": raw["text"],
+                "confidence": round(min(confidence, 1.0), 4),
+                "language": language
+            })
+            
+            speaker = speakers.setdefault(raw["speaker"], {
+                "speaker_id": raw["speaker"],
+                "first_appearance": self._format_timestamp(raw["start"]),
+                "total_duration": 0.0,
+                "segment_count": 0,
+                "confidence": 0.0
+            })
+            speaker["total_duration"] += duration
+            speaker["segment_count"] += 1
+            speaker["confidence"] += segments[-1]["confidence"]
+        
+        for speaker in speakers.values():
+            speaker["total_duration"] = round(speaker["total_duration"], 3)
+            speaker["confidence"] = round(speaker["confidence"] / speaker["segment_count"], 4)
+        
+        transcription_data = {"segments": segments}
+        
+        return {
+            "segments": segments,
+            "speakers": speakers if enable_diarization else {},
+            "metadata": {
+                "total_duration": raw_segments[-1]["end"] if raw_segments else 0,
+                "language": language,
+                "model_used": model,
+                "diarization_enabled": enable_diarization,
+                "processing_time": (datetime.now() - start_time).total_seconds(),
+                "file_size": os.path.getsize(original_file),
+                "speakers_detected": len(speakers) if enable_diarization else 0,
+                "word_count": self._count_words(transcription_data),
+                "confidence_avg": self._calculate_avg_confidence(transcription_data)
             }
-            
-        except Exception as e:
-            logger.error(f"Erro ao fazer parsing do TXT: {str(e)}")
-            return {"segments": [], "speakers": {}}
+        }
+    
+    @staticmethod
+    def _format_timestamp(seconds: float) -> str:
+        """Formatar segundos como HH:MM:SS.mmm."""
+        millis = int(round(seconds * 1000))
+        hours, millis = divmod(millis, 3600000)
+        minutes, millis = divmod(millis, 60000)
+        secs, millis = divmod(millis, 1000)
+        return f"{hours:02d}:{minutes:02d}:{secs:02d}.{millis:03d}"
     
     def _count_words(self, transcription_data: Dict[str, Any]) -> int:
         """Contar palavras na transcrição."""
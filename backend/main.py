@@ -3,23 +3,39 @@
 Sistema de transcrição com diarização otimizado para RTX 3060
 """
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks
+from fastapi import FastAPI, File, UploadFile, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.responses import JSONResponse, FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-import torch
 import os
+import sys
+import shutil
 from pathlib import Path
 import uuid
 from datetime import datetime
-from typing import Optional, List
+from functools import lru_cache
+from typing import Any, Dict, Optional, List
 import asyncio
+import re
+import json
+import time
 import aiofiles
+import numpy as np
 
 # Configurações
 from app.core.config import get_settings
 from app.models.job import JobStatus, JobResponse, TranscriptionResult
 from app.services.transcription_service import TranscriptionService
+from app.services.scheduler import ModelAffinityScheduler
+import transcrever
+from transcritor import transcript_store
+from transcritor.asr import BACKENDS, available_backends, backend_key
+from transcritor.concurrency import ConcurrencyController
+from transcritor.cpu import available_cores, configure_threads
+from transcritor.export import RENDERERS, render, render_json, seconds
+from transcritor.profiling import summarize as summarize_profile
+from transcritor.search import SearchIndex
+from transcritor.streaming import StreamingTranscriber, pcm16_to_float
 
 settings = get_settings()
 
@@ -52,9 +68,79 @@ app.mount("/results", StaticFiles(directory="results"), name="results")
 # Instância do serviço de transcrição
 transcription_service = TranscriptionService()
 
+# Controle adaptativo do número de workers pela vazão (opcional)
+concurrency_controller = ConcurrencyController(
+    initial=settings.MAX_CONCURRENT_JOBS,
+    max_workers=settings.CONCURRENCY_MAX_JOBS,
+    interval=settings.CONCURRENCY_INTERVAL
+) if settings.ADAPTIVE_CONCURRENCY else None
+
+def configure_job_threads(num_jobs: int):
+    """
+    Dividir os núcleos entre `num_jobs` jobs concorrentes.
+    
+    Os jobs rodam em threads deste processo e cada um abre sua própria
+    equipe de threads do PyTorch. Chamado na inicialização e a cada
+    mudança de concorrência do agendador (ADAPTIVE_CONCURRENCY); os jobs
+    já em execução passam a usar o novo valor nas operações seguintes.
+    """
+    threads = settings.TORCH_THREADS or max(1, len(available_cores()) // max(1, num_jobs))
+    configure_threads(threads)
+
+
+# Agendador: workers mantêm o modelo carregado entre jobs
+scheduler = ModelAffinityScheduler(
+    load_model=transcription_service.load_model,
+    num_workers=settings.MAX_CONCURRENT_JOBS,
+    max_wait=settings.SCHEDULER_MAX_WAIT,
+    affinity_wait=settings.SCHEDULER_AFFINITY_WAIT,
+    slots_per_worker=settings.JOBS_PER_WORKER if settings.BATCHED_INFERENCE else 1,
+    unload_model=transcription_service.unload_model,
+    controller=concurrency_controller,
+    on_resize=configure_job_threads if not settings.TORCH_THREADS else None
+)
+
 # Jobs em memória (depois migrar para Redis/Database)
 jobs_db = {}
 
+# Índice de busca dos jobs concluídos (sobrevive a reinícios, como results/)
+search_index = SearchIndex(settings.SEARCH_INDEX_PATH)
+
+# Sessões de streaming abertas (limitadas por STREAM_MAX_SESSIONS)
+stream_sessions = 0
+
+
+@app.on_event("startup")
+async def start_scheduler():
+    """Iniciar os workers de transcrição."""
+    configure_job_threads(settings.MAX_CONCURRENT_JOBS)
+    scheduler.start()
+    asyncio.create_task(asyncio.to_thread(backfill_search_index))
+
+
+def backfill_search_index():
+    """Indexar resultados em results/ que ainda não estão no índice de busca."""
+    indexed = search_index.jobs()
+    added = 0
+    for path in Path("results").glob("*.json"):
+        if path.stem in indexed:
+            continue
+        try:
+            result = json.loads(path.read_text(encoding="utf-8"))
+            search_index.add(path.stem, result["segments"], duration=result.get("metadata", {}).get("total_duration"))
+            added += 1
+        except (OSError, ValueError, KeyError, TypeError):
+            continue  # não é um resultado de job
+    if added:
+        search_index.optimize()
+        print(f"Índice de busca: {added} resultado(s) anteriores indexados")
+
+
+@app.on_event("shutdown")
+async def stop_scheduler():
+    """Encerrar os workers de transcrição."""
+    await scheduler.stop()
+
 
 @app.get("/")
 async def root():
@@ -68,9 +154,11 @@ async def root():
     }
 
 
-@app.get("/health")
-async def health_check():
-    """Health check com informações do sistema."""
+@lru_cache(maxsize=1)
+def _gpu_info() -> Dict[str, Any]:
+    """Informações da GPU (importa o torch na primeira chamada)."""
+    import torch
+
     gpu_available = torch.cuda.is_available()
     gpu_name = None
     gpu_memory = None
@@ -79,28 +167,92 @@ async def health_check():
         gpu_name = torch.cuda.get_device_name(0)
         gpu_memory = torch.cuda.get_device_properties(0).total_memory / 1024**3
     
+    return {
+        "available": gpu_available,
+        "name": gpu_name,
+        "memory_gb": round(gpu_memory, 1) if gpu_memory else None,
+        "cuda_version": torch.version.cuda if gpu_available else None
+    }
+
+
+@app.get("/health")
+async def health_check(gpu: bool = False):
+    """
+    Health check com informações do sistema.
+    
+    O torch só é importado quando um modelo é carregado: até lá, a GPU
+    aparece como não verificada, a menos que `gpu=true` seja pedido
+    (a importação leva alguns segundos e roda fora do event loop).
+    """
+    if gpu or "torch" in sys.modules:
+        gpu_status = await asyncio.to_thread(_gpu_info)
+    else:
+        gpu_status = {"available": None, "checked": False}
+    
     return {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
-        "gpu": {
-            "available": gpu_available,
-            "name": gpu_name,
-            "memory_gb": round(gpu_memory, 1) if gpu_memory else None,
-            "cuda_version": torch.version.cuda if gpu_available else None
-        },
+        "gpu": gpu_status,
         "environment": settings.ENVIRONMENT,
         "models_available": ["tiny", "base", "small", "medium", "large"],
+        "asr_backends": available_backends(),
         "active_jobs": len([j for j in jobs_db.values() if j["status"] == "processing"])
     }
 
 
+@app.get("/scheduler/stats")
+async def scheduler_stats():
+    """Métricas do agendador: cargas de modelo, taxa de acerto e filas."""
+    stats = scheduler.stats()
+    if settings.BATCHED_INFERENCE:
+        stats["batching"] = {
+            w.worker_id: w.model.stats()
+            for w in scheduler.workers if hasattr(w.model, "stats")  # backends sem lote não têm stats
+        }
+    return stats
+
+
+@app.get("/search")
+async def search_transcripts(
+    q: str,
+    limit: int = 20,
+    offset: int = 0,
+    job_id: Optional[str] = None,
+    speaker: Optional[str] = None
+):
+    """
+    Buscar em todas as transcrições concluídas.
+    
+    Palavras são combinadas (todas precisam aparecer no segmento), sem
+    diferenciar acentos nem maiúsculas; use "aspas" para frases e
+    `palavra*` para prefixos. Os resultados vêm por relevância (BM25), com
+    o job, os tempos do segmento (segundos, para pular no áudio), o orador
+    e um trecho com os termos entre [ ]; `total` é o número de ocorrências.
+    
+    Args:
+        q: Texto a buscar
+        limit: Máximo de resultados (até 100)
+        offset: Pular os primeiros resultados (paginação)
+        job_id: Restringir a um job
+        speaker: Restringir a um orador
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Parâmetro 'q' é obrigatório")
+    if not 1 <= limit <= 100 or offset < 0:
+        raise HTTPException(status_code=400, detail="Use 1 <= limit <= 100 e offset >= 0")
+    
+    return await asyncio.to_thread(search_index.search, q, limit, offset, job_id, speaker)
+
+
 @app.post("/jobs/", response_model=JobResponse)
 async def create_transcription_job(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     model: str = "medium",
     enable_diarization: bool = True,
-    language: str = "pt"
+    language: str = "pt",
+    asr_backend: Optional[str] = None,
+    draft_model: Optional[str] = None,
+    profile: bool = False
 ):
     """
     Criar novo job de transcrição.
@@ -108,8 +260,13 @@ async def create_transcription_job(
     Args:
         file: Arquivo de áudio/vídeo para transcrever
         model: Modelo Whisper (tiny, base, small, medium, large)
+        asr_backend: Motor de ASR (whisper, faster-whisper; padrão: ASR_BACKEND)
+        draft_model: Modelo de rascunho para a transcrição em duas passadas
+            (padrão: DRAFT_MODEL; "none" desliga)
         enable_diarization: Ativar identificação de oradores
         language: Idioma do áudio (pt para português)
+        profile: Gravar o perfil de cada etapa (cProfile, PyTorch e linha do
+            tempo) junto do resultado; resumo em GET /jobs/{job_id}/profile
     """
     
     # Validar arquivo
@@ -124,6 +281,24 @@ async def create_transcription_job(
             detail=f"Modelo '{model}' não disponível. Use: {available_models}"
         )
     
+    # Validar modelo de rascunho (precisa ser menor que o do job para compensar)
+    draft_model = settings.DRAFT_MODEL_DEFAULT if draft_model is None else draft_model
+    if draft_model in ("", "none") or draft_model == model:
+        draft_model = None
+    elif draft_model not in available_models:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Modelo de rascunho '{draft_model}' não disponível. Use: {available_models}"
+        )
+    
+    # Validar backend de ASR
+    asr_backend = asr_backend or settings.ASR_BACKEND_DEFAULT
+    if asr_backend not in BACKENDS or not BACKENDS[asr_backend].available():
+        raise HTTPException(
+            status_code=400,
+            detail=f"Backend de ASR '{asr_backend}' não disponível. Use: {available_backends()}"
+        )
+    
     # Gerar ID único para o job
     job_id = str(uuid.uuid4())
     
@@ -147,22 +322,33 @@ async def create_transcription_job(
         "filename": file.filename,
         "file_path": file_path,
         "model": model,
+        "asr_backend": asr_backend,
+        "draft_model": draft_model,
         "enable_diarization": enable_diarization,
         "language": language,
+        "profile": profile,
         "progress": 0,
         "message": "Job criado, aguardando processamento"
     }
     
     jobs_db[job_id] = job_data
     
-    # Adicionar task para processamento em background
-    background_tasks.add_task(
-        process_transcription_job, 
-        job_id, 
-        file_path, 
-        model, 
-        enable_diarization, 
-        language
+    # Enfileirar no agendador (prioriza workers que já têm o modelo carregado)
+    await scheduler.submit(
+        job_id,
+        backend_key(asr_backend, model),
+        lambda worker: process_transcription_job(
+            job_id,
+            file_path,
+            model,
+            enable_diarization,
+            language,
+            whisper_model=worker.model,
+            asr_backend=asr_backend,
+            draft_model=draft_model,
+            profile=profile
+        ),
+        on_error=lambda e: mark_job_failed(job_id, e)
     )
     
     return JobResponse(**job_data)
@@ -202,9 +388,12 @@ async def download_result(job_id: str, format: str):
     """
     Download dos resultados da transcrição.
     
+    Os formatos são renderizados a partir do resultado canônico (JSON) no
+    primeiro pedido e guardados junto dele para os pedidos seguintes.
+    
     Args:
         job_id: ID do job
-        format: Formato do arquivo (txt, json, srt)
+        format: Formato do arquivo (txt, json, srt, vtt)
     """
     
     if job_id not in jobs_db:
@@ -216,14 +405,23 @@ async def download_result(job_id: str, format: str):
         raise HTTPException(status_code=400, detail="Job ainda não foi concluído")
     
     # Validar formato
-    if format not in ["txt", "json", "srt"]:
-        raise HTTPException(status_code=400, detail="Formato deve ser: txt, json ou srt")
+    if format not in RENDERERS:
+        raise HTTPException(status_code=400, detail=f"Formato deve ser: {', '.join(RENDERERS)}")
     
     # Caminho do arquivo de resultado
     result_file = f"results/{job_id}.{format}"
     
     if not os.path.exists(result_file):
-        raise HTTPException(status_code=404, detail=f"Arquivo {format} não encontrado")
+        canonical_file = f"results/{job_id}.json"
+        if not os.path.exists(canonical_file):
+            raise HTTPException(status_code=404, detail="Resultado da transcrição não encontrado")
+        
+        result = job.get("result")
+        if result is None:
+            async with aiofiles.open(canonical_file, 'r', encoding='utf-8') as f:
+                result = json.loads(await f.read())
+        
+        await write_result_file(result_file, render(result, format))
     
     return FileResponse(
         result_file,
@@ -232,6 +430,117 @@ async def download_result(job_id: str, format: str):
     )
 
 
+def store_path(job_id: str) -> str:
+    """Transcrição binária indexada por tempo de um job, junto dos resultados."""
+    return f"results/{job_id}.{transcript_store.EXTENSION}"
+
+
+def write_store(job_id: str, result: Dict[str, Any]):
+    transcript_store.write(
+        store_path(job_id), result["segments"],
+        job_id=job_id, duration=result.get("metadata", {}).get("total_duration")
+    )
+
+
+def query_store(job_id: str, start: float, end: Optional[float], limit: Optional[int]):
+    path = store_path(job_id)
+    if not os.path.exists(path):
+        # Jobs concluídos antes da transcrição binária: gerar a partir do JSON
+        with open(f"results/{job_id}.json", encoding="utf-8") as f:
+            write_store(job_id, json.load(f))
+    store = transcript_store.open_store(path)
+    return store.range(start, end, limit), len(store)
+
+
+@app.get("/jobs/{job_id}/segments")
+async def get_job_segments(
+    job_id: str,
+    start: str = "0",
+    end: Optional[str] = None,
+    limit: Optional[int] = None
+):
+    """
+    Segmentos de um trecho da transcrição.
+    
+    Retorna só os segmentos que se sobrepõem a [start, end), em ordem de
+    início, lidos da transcrição binária do job (results/<job_id>.tseg):
+    uma busca binária no índice de tempo e a leitura dos blocos do
+    trecho, com o mesmo custo para uma reunião de 10 minutos ou de 10
+    horas.
+    
+    Args:
+        job_id: ID do job
+        start: Início do trecho (segundos ou HH:MM:SS.mmm)
+        end: Fim do trecho (padrão: fim da transcrição)
+        limit: Máximo de segmentos
+    """
+    
+    if job_id not in jobs_db:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    
+    if jobs_db[job_id]["status"] != JobStatus.COMPLETED:
+        raise HTTPException(status_code=400, detail="Job ainda não foi concluído")
+    
+    try:
+        start_seconds = seconds(start)
+        end_seconds = seconds(end) if end is not None else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Use segundos ou HH:MM:SS.mmm em 'start' e 'end'")
+    if start_seconds < 0 or (end_seconds is not None and end_seconds < start_seconds):
+        raise HTTPException(status_code=400, detail="Use 0 <= start <= end")
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="Use limit >= 1")
+    
+    began = time.perf_counter()
+    try:
+        segments, total = await asyncio.to_thread(query_store, job_id, start_seconds, end_seconds, limit)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Resultado da transcrição não encontrado")
+    
+    return {
+        "job_id": job_id,
+        "start": start_seconds,
+        "end": end_seconds,
+        "segments": segments,
+        "total_segments": total,
+        "took_ms": round((time.perf_counter() - began) * 1000, 3)
+    }
+
+
+def profile_dir(job_id: str) -> str:
+    """Diretório do perfil de um job, junto dos resultados."""
+    return f"results/{job_id}.profile"
+
+
+@app.get("/jobs/{job_id}/profile")
+async def get_job_profile(job_id: str, top: int = 20, sort: str = "tottime", stage: Optional[str] = None):
+    """
+    Pontos quentes de um job criado com profile=true.
+    
+    Tempo de parede de cada etapa e as `top` funções que mais consumiram
+    tempo (sort: tottime, cumtime ou calls), de todas as etapas ou só de
+    `stage`. Os arquivos completos (.pstats, traces do PyTorch e
+    timeline.json) ficam em results/<job_id>.profile/.
+    """
+    
+    if job_id not in jobs_db:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    
+    directory = profile_dir(job_id)
+    if not os.path.isdir(directory):
+        raise HTTPException(status_code=404, detail="Perfil não encontrado (crie o job com profile=true)")
+    if not 1 <= top <= 200:
+        raise HTTPException(status_code=400, detail="Use 1 <= top <= 200")
+    # `stage` vira um padrão de arquivo: só nomes de etapa (sem / nem ..)
+    if stage is not None and not re.fullmatch(r"[A-Za-z_]+", stage):
+        raise HTTPException(status_code=400, detail="Etapa inválida (use o nome, ex.: transcription)")
+    
+    try:
+        return await asyncio.to_thread(summarize_profile, directory, top, sort, stage)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.delete("/jobs/{job_id}")
 async def delete_job(job_id: str):
     """Deletar job e arquivos associados."""
@@ -241,37 +550,209 @@ async def delete_job(job_id: str):
     
     job = jobs_db[job_id]
     
+    # Retirar da fila se ainda não começou
+    await scheduler.discard(job_id)
+    
     # Remover arquivos
     try:
         if os.path.exists(job["file_path"]):
             os.remove(job["file_path"])
         
         # Remover resultados
-        for ext in ["txt", "json", "srt"]:
+        for ext in RENDERERS:
             result_file = f"results/{job_id}.{ext}"
             if os.path.exists(result_file):
                 os.remove(result_file)
+        
+        transcript_store.forget(store_path(job_id))
+        if os.path.exists(store_path(job_id)):
+            os.remove(store_path(job_id))
+        
+        if os.path.isdir(profile_dir(job_id)):
+            shutil.rmtree(profile_dir(job_id))
     except Exception as e:
         # Log error but don't fail the request
         print(f"Erro ao remover arquivos: {e}")
     
-    # Remover do banco em memória
+    # Remover do índice de busca e do banco em memória
+    await asyncio.to_thread(search_index.remove, job_id)
     del jobs_db[job_id]
     
     return {"message": f"Job {job_id} removido com sucesso"}
 
 
+STREAM_ENCODINGS = ("pcm_s16le", "opus")
+
+
+async def start_stream_decoder():
+    """ffmpeg lendo Opus (Ogg/WebM) da entrada e escrevendo PCM s16le 16 kHz mono."""
+    return await asyncio.create_subprocess_exec(
+        "ffmpeg", "-loglevel", "error",
+        "-fflags", "nobuffer", "-probesize", "32", "-analyzeduration", "0",
+        "-i", "pipe:0", "-f", "s16le", "-ac", "1", "-ar", str(transcrever.SAMPLE_RATE), "pipe:1",
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE
+    )
+
+
+@app.websocket("/ws/stream")
+async def stream_transcription(
+    websocket: WebSocket,
+    model: Optional[str] = None,
+    language: str = "pt",
+    encoding: str = "pcm_s16le",
+    asr_backend: Optional[str] = None
+):
+    """
+    Transcrição ao vivo (legendas) por WebSocket.
+    
+    O cliente envia mensagens binárias com o áudio: PCM s16le mono 16 kHz
+    (`encoding=pcm_s16le`) ou um fluxo Opus em Ogg/WebM (`encoding=opus`,
+    como o do MediaRecorder). Para encerrar, envia {"type": "end"} (ou
+    fecha a conexão). O servidor responde com JSON:
+    
+        {"type": "ready", ...}
+        {"type": "partial", "start", "end", "text", "audio_seconds"}  # pode mudar
+        {"type": "final", "start", "end", "text", "audio_seconds"}    # definitivo
+        {"type": "done", "stats": {...}}
+    
+    Tempos em segundos desde o início do fluxo; `audio_seconds` é quanto
+    áudio tinha sido recebido na decodificação que gerou a mensagem.
+    """
+    global stream_sessions
+    await websocket.accept()
+    
+    model = model or settings.STREAM_MODEL_DEFAULT
+    asr_backend = asr_backend or settings.ASR_BACKEND_DEFAULT
+    error = None
+    if model not in ["tiny", "base", "small", "medium", "large"]:
+        error = f"Modelo '{model}' não disponível"
+    elif encoding not in STREAM_ENCODINGS:
+        error = f"Codificação deve ser: {', '.join(STREAM_ENCODINGS)}"
+    elif asr_backend not in BACKENDS or not BACKENDS[asr_backend].available():
+        error = f"Backend de ASR '{asr_backend}' não disponível. Use: {available_backends()}"
+    elif stream_sessions >= settings.STREAM_MAX_SESSIONS:
+        error = "Limite de sessões de streaming atingido; tente novamente mais tarde"
+    if error:
+        await websocket.send_json({"type": "error", "detail": error})
+        await websocket.close(code=1008)
+        return
+    
+    stream_sessions += 1
+    decoder = None
+    try:
+        whisper_model = await asyncio.to_thread(transcription_service.get_stream_model, model, asr_backend)
+        lock = transcrever.model_lock(whisper_model)
+        
+        def transcribe(audio, prompt):
+            with lock:
+                return transcrever.run_asr(audio, language, whisper_model, prompt=prompt)
+        
+        streamer = StreamingTranscriber(
+            transcribe,
+            sample_rate=transcrever.SAMPLE_RATE,
+            step=settings.STREAM_STEP_SECONDS,
+            max_buffer=settings.STREAM_MAX_BUFFER_SECONDS
+        )
+        if encoding == "opus":
+            decoder = await start_stream_decoder()
+        
+        # O áudio recebido espera aqui enquanto o buffer está sendo
+        # decodificado em outra thread; só o laço de decodificação mexe no streamer
+        pending: List[np.ndarray] = []
+        ended = asyncio.Event()
+        
+        async def receive():
+            leftover = b""
+            try:
+                while True:
+                    message = await websocket.receive()
+                    if message["type"] == "websocket.disconnect":
+                        break
+                    if message.get("bytes"):
+                        if decoder is not None:
+                            decoder.stdin.write(message["bytes"])
+                            await decoder.stdin.drain()
+                        else:
+                            data = leftover + message["bytes"]
+                            usable = len(data) - len(data) % 2
+                            pending.append(pcm16_to_float(data[:usable]))
+                            leftover = data[usable:]
+                    elif message.get("text") and json.loads(message["text"]).get("type") == "end":
+                        break
+            except (WebSocketDisconnect, RuntimeError):
+                pass
+            finally:
+                if decoder is not None:
+                    decoder.stdin.close()
+                else:
+                    ended.set()
+        
+        async def read_decoder():
+            leftover = b""
+            while True:
+                chunk = await decoder.stdout.read(8192)
+                if not chunk:
+                    break
+                data = leftover + chunk
+                usable = len(data) - len(data) % 2
+                pending.append(pcm16_to_float(data[:usable]))
+                leftover = data[usable:]
+            ended.set()
+        
+        async def send(kind, segment):
+            if segment is not None:
+                await websocket.send_json({"type": kind, **segment, "audio_seconds": round(streamer.received_seconds, 3)})
+        
+        tasks = [asyncio.create_task(receive())]
+        if decoder is not None:
+            tasks.append(asyncio.create_task(read_decoder()))
+        await websocket.send_json({
+            "type": "ready", "model": model, "asr_backend": asr_backend, "encoding": encoding,
+            "sample_rate": transcrever.SAMPLE_RATE, "step_seconds": settings.STREAM_STEP_SECONDS
+        })
+        
+        while True:
+            finished = ended.is_set()
+            if pending:
+                streamer.feed(np.concatenate(pending))
+                pending.clear()
+            if finished:
+                break
+            if streamer.ready():
+                output = await asyncio.to_thread(streamer.process)
+                await send("final", output["final"])
+                await send("partial", output["partial"])
+            else:
+                await asyncio.sleep(0.05)
+        
+        output = await asyncio.to_thread(streamer.finish)
+        await send("final", output["final"])
+        await websocket.send_json({"type": "done", "stats": streamer.stats()})
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await websocket.close()
+    except (WebSocketDisconnect, RuntimeError):
+        pass  # cliente desconectou no meio do envio
+    finally:
+        stream_sessions -= 1
+        if decoder is not None and decoder.returncode is None:
+            decoder.kill()
+
+
 async def process_transcription_job(
     job_id: str, 
     file_path: str, 
     model: str, 
     enable_diarization: bool, 
-    language: str
+    language: str,
+    whisper_model=None,
+    asr_backend: Optional[str] = None,
+    draft_model: Optional[str] = None,
+    profile: bool = False
 ):
     """
     Processar job de transcrição em background.
     
-    Esta função roda em background e atualiza o status do job.
+    Esta função roda em um worker do agendador e atualiza o status do job.
     """
     
     try:
@@ -287,12 +768,32 @@ async def process_transcription_job(
             enable_diarization=enable_diarization,
             language=language,
             job_id=job_id,
-            progress_callback=lambda progress, message: update_job_progress(job_id, progress, message)
+            progress_callback=lambda progress, message: update_job_progress(job_id, progress, message),
+            whisper_model=whisper_model,
+            asr_backend=asr_backend,
+            draft_model=draft_model,
+            profile_dir=profile_dir(job_id) if profile else None
         )
         
         # Salvar resultados
         await save_transcription_results(job_id, result)
         
+        # Transcrição binária para consultas por trecho (se falhar, é gerada
+        # a partir do JSON na primeira consulta)
+        try:
+            await asyncio.to_thread(write_store, job_id, result)
+        except Exception as e:
+            print(f"Erro ao gravar a transcrição binária do job {job_id}: {e}")
+        
+        # Indexar para a busca (falha no índice não invalida o job)
+        try:
+            await asyncio.to_thread(
+                search_index.add, job_id, result["segments"], jobs_db[job_id]["filename"],
+                result["metadata"]["total_duration"]
+            )
+        except Exception as e:
+            print(f"Erro ao indexar o job {job_id} para busca: {e}")
+        
         # Atualizar status para concluído
         jobs_db[job_id]["status"] = JobStatus.COMPLETED
         jobs_db[job_id]["progress"] = 100
@@ -300,12 +801,20 @@ async def process_transcription_job(
         jobs_db[job_id]["completed_at"] = datetime.utcnow().isoformat()
         jobs_db[job_id]["result"] = result
         
+        if concurrency_controller:
+            concurrency_controller.record(result["metadata"]["total_duration"])
+        
     except Exception as e:
-        # Atualizar status para erro
+        mark_job_failed(job_id, e)
+
+
+def mark_job_failed(job_id: str, error: Exception):
+    """Atualizar status do job para erro."""
+    if job_id in jobs_db:
         jobs_db[job_id]["status"] = JobStatus.FAILED
-        jobs_db[job_id]["message"] = f"Erro durante processamento: {str(e)}"
+        jobs_db[job_id]["message"] = f"Erro durante processamento: {str(error)}"
         jobs_db[job_id]["failed_at"] = datetime.utcnow().isoformat()
-        jobs_db[job_id]["error"] = str(e)
+        jobs_db[job_id]["error"] = str(error)
 
 
 def update_job_progress(job_id: str, progress: int, message: str):
@@ -315,31 +824,21 @@ def update_job_progress(job_id: str, progress: int, message: str):
         jobs_db[job_id]["message"] = message
 
 
-async def save_transcription_results(job_id: str, result: TranscriptionResult):
-    """Salvar resultados em diferentes formatos."""
-    
-    # Salvar como JSON
-    import json
-    async with aiofiles.open(f"results/{job_id}.json", 'w', encoding='utf-8') as f:
-        await f.write(json.dumps(result.dict(), ensure_ascii=False, indent=2))
-    
-    # Salvar como TXT
-    async with aiofiles.open(f"results/{job_id}.txt", 'w', encoding='utf-8') as f:
-        for segment in result.segments:
-            speaker = segment.get("speaker", "SPEAKER_UNKNOWN")
-            text = segment.get("text", "")
-            await f.write(f"[{speaker}]: {text}\n")
-    
-    # Salvar como SRT
-    async with aiofiles.open(f"results/{job_id}.srt", 'w', encoding='utf-8') as f:
-        for i, segment in enumerate(result.segments, 1):
-            start = segment.get("start", "00:00:00.000")
-            end = segment.get("end", "00:00:00.000")
-            text = segment.get("text", "")
-            
-            await f.write(f"{i}\n")
-            await f.write(f"{start} --> {end}\n")
-            await f.write(f"{text}\n\n")
+async def save_transcription_results(job_id: str, result: Dict[str, Any]):
+    """
+    Salvar o resultado canônico (JSON).
+    
+    Os demais formatos são gerados sob demanda em download_result.
+    """
+    await write_result_file(f"results/{job_id}.json", render_json(result))
+
+
+async def write_result_file(path: str, content: str):
+    """Gravar um arquivo de resultado de uma vez, sem expor arquivos parciais."""
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    async with aiofiles.open(tmp_path, 'w', encoding='utf-8') as f:
+        await f.write(content)
+    os.replace(tmp_path, path)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos backends de ASR: vazão e memória (CPU).
+
+Cada backend roda em um processo próprio, para que o pico de memória
+medido seja só dele. Os modelos são lidos do cache local (ou de
+--modelos); sem rede, eles precisam ter sido baixados antes.
+
+Uso:
+    python benchmarks/bench_asr.py --audio exemplo.wav
+    python benchmarks/bench_asr.py --audio exemplo.wav --model small --backends whisper,faster-whisper
+    python benchmarks/bench_asr.py --modelos ~/.cache/modelos --threads 4
+"""
+
+import os
+import sys
+import time
+import argparse
+import multiprocessing as mp
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcritor.asr import BACKENDS, available_backends, load_backend
+
+SAMPLE_RATE = 16000
+
+
+def carregar_audio(caminho, duracao):
+    """Carrega o áudio de teste ou gera um sinal sintético."""
+    if caminho:
+        import whisper
+        audio = whisper.load_audio(caminho)
+    else:
+        rng = np.random.default_rng(0)
+        t = np.arange(int(duracao * SAMPLE_RATE)) / SAMPLE_RATE
+        audio = (0.1 * np.sin(2 * np.pi * 220 * t) + 0.02 * rng.standard_normal(t.size)).astype(np.float32)
+    return audio[:int(duracao * SAMPLE_RATE)]
+
+
+def rss_mb():
+    """Pico de memória residente do processo, em MB."""
+    import resource
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def medir(backend, modelo, audio, threads, modelos, repeticoes, saida):
+    """Executado em um processo separado: carrega, transcreve e reporta."""
+    import torch
+    torch.set_num_threads(threads)
+    opcoes = {"download_root": modelos}
+    if backend == "faster-whisper":
+        opcoes["cpu_threads"] = threads
+
+    base = rss_mb()
+    inicio = time.perf_counter()
+    asr = load_backend(backend, modelo, device="cpu", **opcoes)
+    carga = time.perf_counter() - inicio
+    memoria_modelo = rss_mb() - base
+
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        segmentos = asr.transcribe(audio, "pt")
+        tempos.append(time.perf_counter() - inicio)
+
+    saida.put({
+        "backend": backend,
+        "compute_type": asr.compute_type,
+        "carga": carga,
+        "tempo": min(tempos),
+        "memoria_modelo": memoria_modelo,
+        "pico": rss_mb(),
+        "texto": " ".join(s["text"].strip() for s in segmentos)
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos backends de ASR")
+    parser.add_argument("--audio", help="Arquivo de áudio (padrão: sinal sintético)")
+    parser.add_argument("--model", default="tiny", help="Modelo (padrão: tiny)")
+    parser.add_argument("--backends", default=",".join(available_backends()),
+                        help=f"Backends a comparar ({', '.join(BACKENDS)})")
+    parser.add_argument("--duration", type=float, default=60.0, help="Segundos de áudio")
+    parser.add_argument("--threads", type=int, default=os.cpu_count(), help="Threads por backend")
+    parser.add_argument("--repeat", type=int, default=2, help="Repetições (vale a mais rápida)")
+    parser.add_argument("--modelos", default=None, help="Pasta com os modelos já baixados")
+    args = parser.parse_args()
+
+    audio = carregar_audio(args.audio, args.duration)
+    segundos = len(audio) / SAMPLE_RATE
+    print(f"Modelo: {args.model} | áudio: {segundos:.0f}s | threads: {args.threads}")
+    print(f"{'backend':>15} {'tipo':>8} {'carga (s)':>10} {'tempo (s)':>10} {'áudio s/s':>10} "
+          f"{'modelo (MB)':>12} {'pico (MB)':>10}")
+
+    contexto = mp.get_context("spawn")
+    textos = {}
+    for backend in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        saida = contexto.Queue()
+        processo = contexto.Process(
+            target=medir,
+            args=(backend, args.model, audio, args.threads, args.modelos, args.repeat, saida)
+        )
+        processo.start()
+        processo.join()
+        if processo.exitcode != 0:
+            print(f"{backend:>15} falhou (código {processo.exitcode})")
+            continue
+        r = saida.get()
+        textos[backend] = r["texto"]
+        print(f"{r['backend']:>15} {r['compute_type']:>8} {r['carga']:>10.1f} {r['tempo']:>10.1f} "
+              f"{segundos / r['tempo']:>10.1f} {r['memoria_modelo']:>12.0f} {r['pico']:>10.0f}")
+
+    for backend, texto in textos.items():
+        print(f"\n[{backend}] {texto[:200]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark da inferência Whisper em lote: vazão x tamanho do batch (CPU).
+
+Simula vários jobs concorrentes enviando janelas de 30 s ao mesmo
+BatchingInferenceServer e mede janelas/s e segundos de áudio/s.
+
+Uso:
+    python benchmarks/bench_batching.py                      # áudio sintético
+    python benchmarks/bench_batching.py --audio exemplo.wav --model tiny
+    python benchmarks/bench_batching.py --batch-sizes 1,2,4,8 --jobs 8
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+import whisper
+from whisper.audio import N_SAMPLES, SAMPLE_RATE
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcritor.batching import BatchingInferenceServer, transcribe_batched
+
+
+def carregar_audio(caminho, duracao):
+    """Carrega o áudio de teste ou gera um sinal sintético."""
+    if caminho:
+        audio = whisper.load_audio(caminho)
+    else:
+        rng = np.random.default_rng(0)
+        t = np.arange(int(duracao * SAMPLE_RATE)) / SAMPLE_RATE
+        audio = (0.1 * np.sin(2 * np.pi * 220 * t) + 0.02 * rng.standard_normal(t.size)).astype(np.float32)
+    return audio[:int(duracao * SAMPLE_RATE)]
+
+
+def medir(modelo, audio, batch_size, jobs, max_wait):
+    """Roda `jobs` transcrições concorrentes com o batch indicado."""
+    servidor = BatchingInferenceServer(modelo, max_batch_size=batch_size, max_wait=max_wait).start()
+    try:
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            list(executor.map(lambda _: transcribe_batched(servidor, audio, "pt"), range(jobs)))
+        duracao = time.perf_counter() - inicio
+    finally:
+        servidor.stop()
+
+    estatisticas = servidor.stats()
+    return {
+        "batch_size": batch_size,
+        "tempo": duracao,
+        "janelas_por_s": estatisticas["windows"] / duracao,
+        "audio_por_s": jobs * len(audio) / SAMPLE_RATE / duracao,
+        "batch_medio": estatisticas["avg_batch_size"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inferência Whisper em lote")
+    parser.add_argument("--audio", help="Arquivo de áudio (padrão: sinal sintético)")
+    parser.add_argument("--model", default="tiny", help="Modelo Whisper (padrão: tiny)")
+    parser.add_argument("--duration", type=float, default=120.0, help="Segundos de áudio por job")
+    parser.add_argument("--jobs", type=int, default=8, help="Jobs concorrentes")
+    parser.add_argument("--batch-sizes", default="1,2,4,8,16", help="Tamanhos de batch a testar")
+    parser.add_argument("--max-wait-ms", type=float, default=50.0, help="Espera máxima para formar o batch")
+    parser.add_argument("--threads", type=int, default=os.cpu_count(), help="Threads do PyTorch")
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    modelo = whisper.load_model(args.model, device="cpu")
+    audio = carregar_audio(args.audio, args.duration)
+
+    janelas = -(-len(audio) // N_SAMPLES) * args.jobs
+    print(f"Modelo: {args.model} | jobs: {args.jobs} | janelas: {janelas} | threads: {args.threads}")
+    print(f"{'batch':>6} {'tempo (s)':>10} {'janelas/s':>10} {'áudio s/s':>10} {'batch médio':>12}")
+
+    base = None
+    for batch_size in [int(b) for b in args.batch_sizes.split(",")]:
+        r = medir(modelo, audio, batch_size, args.jobs, args.max_wait_ms / 1000)
+        base = base or r["audio_por_s"]
+        print(f"{r['batch_size']:>6} {r['tempo']:>10.1f} {r['janelas_por_s']:>10.2f} "
+              f"{r['audio_por_s']:>10.1f} {r['batch_medio']:>12.2f}  ({r['audio_por_s'] / base:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark da divisão de núcleos entre workers: vazão agregada x layout.
+
+Roda W processos simultâneos com uma carga de inferência na CPU e
+compara três layouts:
+  - livre:     cada worker usa as threads padrão do PyTorch (todos os núcleos)
+  - threads:   threads = núcleos / W, sem afinidade
+  - particao:  threads = núcleos / W e afinidade a um grupo disjunto (transcritor.cpu)
+
+A carga padrão é um encoder Transformer do tamanho do Whisper small; com
+--model, usa o encoder do Whisper de verdade (modelo em cache local).
+
+Uso:
+    python benchmarks/bench_cpu_partition.py
+    python benchmarks/bench_cpu_partition.py --workers 1,2,4,8 --seconds 20
+    python benchmarks/bench_cpu_partition.py --model tiny
+"""
+
+import os
+import sys
+import time
+import argparse
+import multiprocessing as mp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcritor.cpu import available_cores, format_cores, partition_cores, worker_env
+
+LAYOUTS = ("livre", "threads", "particao")
+
+
+def worker(env, modelo, segundos, inicio, saida):
+    """Executado em cada processo: aplica o ambiente, aquece e conta iterações."""
+    os.environ.update(env)
+    from transcritor.cpu import apply_cpu_profile
+    apply_cpu_profile()
+    import torch
+
+    with torch.inference_mode():
+        if modelo:
+            import whisper
+            encoder = whisper.load_model(modelo, device="cpu").encoder
+            entrada = torch.zeros(1, encoder.conv1.in_channels, 3000)
+        else:
+            camada = torch.nn.TransformerEncoderLayer(768, 12, 3072, batch_first=True)
+            encoder = torch.nn.TransformerEncoder(camada, 4).eval()
+            entrada = torch.randn(1, 750, 768)
+        encoder(entrada)
+
+        inicio.wait()  # todos começam juntos
+        fim = time.perf_counter() + segundos
+        iteracoes = 0
+        while time.perf_counter() < fim:
+            encoder(entrada)
+            iteracoes += 1
+    saida.put(iteracoes)
+
+
+def medir(layout, num_workers, cores, modelo, segundos):
+    """Vazão agregada (iterações/s) de `num_workers` processos com o layout."""
+    contexto = mp.get_context("spawn")
+    if layout == "livre":
+        envs = [{} for _ in range(num_workers)]
+    else:
+        envs = [worker_env(grupo) for grupo in partition_cores(num_workers, cores)]
+        if layout == "threads":
+            for env in envs:
+                env.pop("CPU_AFFINITY")
+
+    inicio = contexto.Barrier(num_workers)
+    saida = contexto.Queue()
+    processos = [
+        contexto.Process(target=worker, args=(env, modelo, segundos, inicio, saida))
+        for env in envs
+    ]
+    for processo in processos:
+        processo.start()
+    total = sum(saida.get() for _ in processos)
+    for processo in processos:
+        processo.join()
+    return total / segundos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da divisão de núcleos entre workers")
+    parser.add_argument("--workers", default="1,2,4", help="Quantidades de workers a testar")
+    parser.add_argument("--layouts", default=",".join(LAYOUTS), help=f"Layouts ({', '.join(LAYOUTS)})")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Duração de cada medida")
+    parser.add_argument("--model", default=None, help="Usar o encoder deste modelo Whisper")
+    args = parser.parse_args()
+
+    cores = available_cores()
+    layouts = [l.strip() for l in args.layouts.split(",") if l.strip()]
+    print(f"CPUs: {len(cores)} ({format_cores(cores)}) | carga: {args.model or 'transformer sintético'}")
+    print(f"{'workers':>8} " + " ".join(f"{layout + ' (it/s)':>16}" for layout in layouts) + f" {'partição':>30}")
+
+    for num_workers in [int(w) for w in args.workers.split(",")]:
+        vazoes = [medir(layout, num_workers, cores, args.model, args.seconds) for layout in layouts]
+        grupos = " ".join(format_cores(g) for g in partition_cores(num_workers, cores))
+        print(f"{num_workers:>8} " + " ".join(f"{v:>16.2f}" for v in vazoes) + f" {grupos:>30}")
+
+
+if __name__ == "__main__":
+    main()
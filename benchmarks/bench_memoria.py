@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memória por etapa: áudio inteiro na RAM x PCM mapeado do disco.
+
+Gera gravações sintéticas (fala com pausas, ruído e trechos de música, 16 kHz
+mono) de várias durações e, em um processo novo para cada caso, executa as
+etapas que tocam no áudio nos dois modos:
+  - ram:   como o whisper.load_audio (pipe do ffmpeg + conversão de int16),
+           regiões de fala concatenadas na RAM e o áudio inteiro (com o
+           espectrograma) entregue ao ASR de uma vez
+  - mmap:  transcritor.pcm (ffmpeg grava o PCM float32 em disco e as etapas
+           leem o arquivo mapeado), regiões de fala em outro arquivo mapeado
+           e o ASR recebendo janelas de ASR_WINDOW_SECONDS
+
+As etapas de modelo são simuladas com o mesmo acesso à memória: o ASR
+copia a janela e aloca o espectrograma log-mel (80 x quadros de 10 ms) que
+o Whisper montaria; a diarização percorre o áudio em blocos de 10 s como a
+inferência deslizante do pyannote. Para cada etapa é medido o pico da
+memória anônima (RssAnon: o que não pode ser devolvido ao sistema) e do
+RSS total (inclui páginas do arquivo mapeado, descartáveis pelo kernel).
+No modo mmap, a memória anônima deve ficar praticamente constante com a
+duração do áudio.
+
+Requer ffmpeg no PATH e Linux (/proc/self/status).
+
+Uso:
+    python benchmarks/bench_memoria.py                      # 4 h
+    python benchmarks/bench_memoria.py --horas 0.5,1,2,4
+    python benchmarks/bench_memoria.py --pasta /tmp/audios --manter
+"""
+
+import os
+import sys
+import json
+import time
+import wave
+import shutil
+import argparse
+import threading
+import subprocess
+from contextlib import contextmanager
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TAXA = 16000
+MODOS = ("ram", "mmap")
+ETAPAS = ("decode", "vad", "fala", "asr", "diarizacao")
+
+
+def gerar_audio(caminho, horas, semente=42):
+    """WAV int16 sintético, gerado em blocos de 60 s (sem montar o áudio inteiro)."""
+    rng = np.random.default_rng(semente)
+    total = int(horas * 3600 * TAXA)
+    bloco = 60 * TAXA
+    with wave.open(caminho, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(TAXA)
+        for inicio in range(0, total, bloco):
+            n = min(bloco, total - inicio)
+            t = (inicio + np.arange(n)) / TAXA
+            sinal = rng.normal(0, 0.003, n)
+            # Falas de 2-8 s separadas por pausas, com envelope silábico (~4 Hz)
+            pos = 0
+            while pos < n:
+                duracao = int(rng.uniform(2, 8) * TAXA)
+                fim = min(n, pos + duracao)
+                tom = rng.uniform(110, 230)
+                trecho = t[pos:fim]
+                envelope = np.clip(np.sin(2 * np.pi * rng.uniform(3, 5) * trecho), 0, None)
+                voz = sum(np.sin(2 * np.pi * tom * k * trecho) / k for k in range(1, 5))
+                sinal[pos:fim] += 0.15 * envelope * voz
+                pos = fim + int(rng.uniform(0.3, 2.0) * TAXA)
+            # Música de espera de vez em quando (energia constante)
+            if rng.random() < 0.1:
+                trecho = slice(0, min(n, 20 * TAXA))
+                sinal[trecho] = 0.1 * np.sin(2 * np.pi * 440 * t[trecho]) + 0.1 * np.sin(2 * np.pi * 554 * t[trecho])
+            wav.writeframes((np.clip(sinal, -1, 1) * 32767).astype("<i2").tobytes())
+
+
+class Monitor:
+    """Amostra VmRSS, RssAnon e RssFile do processo e registra o pico de cada etapa."""
+
+    def __init__(self, intervalo=0.005):
+        self.intervalo = intervalo
+        self.picos = {}
+        self._atual = None
+        self._ativo = True
+        threading.Thread(target=self._amostrar, daemon=True).start()
+
+    @staticmethod
+    def ler():
+        valores = {}
+        with open("/proc/self/status") as f:
+            for linha in f:
+                chave, _, resto = linha.partition(":")
+                if chave in ("VmRSS", "RssAnon", "RssFile"):
+                    valores[chave] = int(resto.split()[0]) / 1024  # MB
+        return valores
+
+    def _registrar(self):
+        if self._atual is None:
+            return
+        pico = self.picos.setdefault(self._atual, {"rss": 0.0, "anon": 0.0, "arquivo": 0.0})
+        valores = self.ler()
+        pico["rss"] = max(pico["rss"], valores.get("VmRSS", 0.0))
+        pico["anon"] = max(pico["anon"], valores.get("RssAnon", 0.0))
+        pico["arquivo"] = max(pico["arquivo"], valores.get("RssFile", 0.0))
+
+    def _amostrar(self):
+        while self._ativo:
+            self._registrar()
+            time.sleep(self.intervalo)
+
+    @contextmanager
+    def etapa(self, nome):
+        self._atual = nome
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._registrar()
+            self.picos[nome]["segundos"] = time.perf_counter() - inicio
+            self._atual = None
+
+
+def load_audio_ram(caminho):
+    """Equivalente ao whisper.load_audio (sem importar o whisper)."""
+    saida = subprocess.run(
+        ["ffmpeg", "-nostdin", "-threads", "0", "-i", caminho, "-f", "s16le", "-ac", "1",
+         "-acodec", "pcm_s16le", "-ar", str(TAXA), "-"],
+        capture_output=True, check=True
+    ).stdout
+    return np.frombuffer(saida, np.int16).flatten().astype(np.float32) / 32768.0
+
+
+def entrada_asr(janela):
+    """Memória que o Whisper aloca para transcrever `janela`: cópia do áudio e log-mel."""
+    audio = np.array(janela, dtype=np.float32)
+    mel = np.full((80, len(audio) // 160 + 1), -1.0, dtype=np.float32)
+    return float(audio[:1].sum() + mel[:, :1].sum())
+
+
+def filho(modo, caminho, trabalho):
+    """Executado em um processo novo: roda as etapas e imprime os picos em JSON."""
+    from transcritor import pcm
+    from transcritor.vad import detect_speech, keep_speech
+
+    janela_asr = float(os.getenv("ASR_WINDOW_SECONDS", "600"))
+    monitor = Monitor()
+    base = Monitor.ler()
+
+    with monitor.etapa("decode"):
+        audio = load_audio_ram(caminho) if modo == "ram" else pcm.decode(caminho, trabalho, TAXA)
+    with monitor.etapa("vad"):
+        regioes = detect_speech(audio, TAXA)
+    with monitor.etapa("fala"):
+        fala, _ = keep_speech(audio, regioes, TAXA, mapped=modo == "mmap", work_dir=trabalho)
+    with monitor.etapa("asr"):
+        if modo == "ram":
+            entrada_asr(fala)
+        else:
+            for inicio, fim in pcm.split_windows(fala, TAXA, janela_asr):
+                entrada_asr(fala[inicio:fim])
+    with monitor.etapa("diarizacao"):
+        passo = 10 * TAXA
+        energia = [float(np.square(audio[i:i + passo]).mean()) for i in range(0, len(audio), passo)]
+
+    monitor._ativo = False
+    print(json.dumps({
+        "base_anon": base.get("RssAnon", 0.0),
+        "audio_segundos": len(audio) / TAXA,
+        "fala_segundos": len(fala) / TAXA,
+        "janelas": len(energia),
+        "picos": monitor.picos
+    }))
+
+
+def medir(modo, caminho, trabalho):
+    saida = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--filho", modo, caminho, "--pasta", trabalho],
+        capture_output=True, text=True
+    )
+    if saida.returncode != 0:
+        raise RuntimeError(saida.stderr.strip().splitlines()[-1] if saida.stderr else "falha no processo")
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de memória: áudio na RAM x PCM mapeado")
+    parser.add_argument("--horas", default="4", help="Durações sintéticas, separadas por vírgula (padrão: 4)")
+    parser.add_argument("--pasta", default=None, help="Diretório dos áudios e do PCM (padrão: ./bench_memoria)")
+    parser.add_argument("--modos", default=",".join(MODOS), help="Modos a comparar (ram, mmap)")
+    parser.add_argument("--manter", action="store_true", help="Não apagar os áudios sintéticos no fim")
+    parser.add_argument("--filho", nargs=2, metavar=("MODO", "ARQUIVO"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    pasta = args.pasta or os.path.join(os.getcwd(), "bench_memoria")
+    if args.filho:
+        filho(args.filho[0], args.filho[1], pasta)
+        return
+
+    if not shutil.which("ffmpeg"):
+        print("❌ ffmpeg não encontrado no PATH")
+        sys.exit(1)
+    os.makedirs(pasta, exist_ok=True)
+
+    modos = [m.strip() for m in args.modos.split(",") if m.strip()]
+    print(f"{'horas':>5} {'modo':>5} " + " ".join(f"{etapa:>16}" for etapa in ETAPAS) + f" {'pico RSS':>9}")
+    print(f"{'':>11}" + " ".join(f"{'anon / rss MB':>16}" for _ in ETAPAS))
+    for horas in (float(h) for h in args.horas.split(",")):
+        caminho = os.path.join(pasta, f"sintetico_{horas:g}h.wav")
+        if not os.path.exists(caminho):
+            inicio = time.perf_counter()
+            gerar_audio(caminho, horas)
+            print(f"  (áudio de {horas:g} h gerado em {time.perf_counter() - inicio:.0f}s)")
+        for modo in modos:
+            resultado = medir(modo, caminho, pasta)
+            picos = resultado["picos"]
+            colunas = " ".join(
+                f"{picos[etapa]['anon']:>7.0f} / {picos[etapa]['rss']:>6.0f}" for etapa in ETAPAS
+            )
+            pico = max(p["rss"] for p in picos.values())
+            print(f"{horas:>5g} {modo:>5} {colunas} {pico:>9.0f}")
+        if not args.manter:
+            os.remove(caminho)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark da quantização int8: velocidade, memória e WER (CPU).
+
+Transcreve um conjunto local de amostras com o Whisper em float32 e em
+int8, cada um em um processo próprio. As referências são arquivos .txt
+com o mesmo nome do áudio; sem referência, a transcrição em float32 é
+usada como referência do int8.
+
+Uso:
+    python benchmarks/bench_quantization.py amostras/
+    python benchmarks/bench_quantization.py amostras/ --model small --threads 4
+    python benchmarks/bench_quantization.py amostras/ --cache /tmp/int8   # mede a 1ª carga
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import multiprocessing as mp
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+EXTENSOES = {'.wav', '.mp3', '.flac', '.m4a', '.ogg'}
+
+
+def palavras(texto):
+    """Normalizar para o cálculo do WER: minúsculas, sem pontuação."""
+    return re.findall(r"\w+", texto.lower())
+
+
+def wer(referencia, hipotese):
+    """Word error rate por distância de edição entre palavras."""
+    ref, hip = palavras(referencia), palavras(hipotese)
+    if not ref:
+        return 0.0 if not hip else 1.0
+    anterior = list(range(len(hip) + 1))
+    for i, r in enumerate(ref, 1):
+        atual = [i] + [0] * len(hip)
+        for j, h in enumerate(hip, 1):
+            atual[j] = min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + (r != h))
+        anterior = atual
+    return anterior[-1] / len(ref)
+
+
+def rss_mb():
+    """Pico de memória residente do processo, em MB."""
+    import resource
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def medir(compute_type, modelo, amostras, threads, cache, saida):
+    """Executado em um processo separado: carrega, transcreve e reporta."""
+    import torch
+    import whisper
+    from transcritor.quantization import load_quantized_whisper
+
+    torch.set_num_threads(threads)
+    inicio = time.perf_counter()
+    if compute_type == "int8":
+        model = load_quantized_whisper(modelo, cache)
+    else:
+        model = whisper.load_model(modelo, device="cpu")
+    carga = time.perf_counter() - inicio
+    memoria_modelo = rss_mb()
+
+    textos, tempo, segundos = {}, 0.0, 0.0
+    for amostra in amostras:
+        audio = whisper.load_audio(amostra)
+        inicio = time.perf_counter()
+        resultado = model.transcribe(audio, language="pt", fp16=False)
+        tempo += time.perf_counter() - inicio
+        segundos += len(audio) / whisper.audio.SAMPLE_RATE
+        textos[amostra] = resultado["text"]
+
+    saida.put({
+        "compute_type": compute_type,
+        "carga": carga,
+        "tempo": tempo,
+        "segundos": segundos,
+        "memoria_modelo": memoria_modelo,
+        "pico": rss_mb(),
+        "textos": textos
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da quantização int8 do Whisper")
+    parser.add_argument("amostras", help="Pasta com áudios (e referências .txt de mesmo nome)")
+    parser.add_argument("--model", default="small", help="Modelo Whisper (padrão: small)")
+    parser.add_argument("--threads", type=int, default=os.cpu_count(), help="Threads do PyTorch")
+    parser.add_argument("--cache", default=None, help="Pasta do cache int8 (padrão: ~/.cache/transcritor)")
+    args = parser.parse_args()
+
+    amostras = sorted(str(p) for p in Path(args.amostras).iterdir() if p.suffix.lower() in EXTENSOES)
+    if not amostras:
+        print(f"❌ Nenhum áudio em {args.amostras}")
+        sys.exit(1)
+
+    contexto = mp.get_context("spawn")
+    resultados = {}
+    for compute_type in ("float32", "int8"):
+        saida = contexto.Queue()
+        processo = contexto.Process(
+            target=medir, args=(compute_type, args.model, amostras, args.threads, args.cache, saida)
+        )
+        processo.start()
+        resultado = saida.get()
+        processo.join()
+        resultados[compute_type] = resultado
+
+    referencias = {}
+    for amostra in amostras:
+        arquivo = Path(amostra).with_suffix(".txt")
+        referencias[amostra] = (
+            arquivo.read_text(encoding="utf-8") if arquivo.exists()
+            else resultados["float32"]["textos"][amostra]
+        )
+    com_referencia = sum(Path(a).with_suffix(".txt").exists() for a in amostras)
+
+    print(f"Modelo: {args.model} | amostras: {len(amostras)} ({com_referencia} com referência) | threads: {args.threads}")
+    print(f"{'tipo':>8} {'carga (s)':>10} {'tempo (s)':>10} {'áudio s/s':>10} "
+          f"{'modelo (MB)':>12} {'pico (MB)':>10} {'WER':>7}")
+    base = resultados["float32"]["tempo"]
+    for compute_type, r in resultados.items():
+        erro = sum(wer(referencias[a], r["textos"][a]) for a in amostras) / len(amostras)
+        print(f"{compute_type:>8} {r['carga']:>10.1f} {r['tempo']:>10.1f} {r['segundos'] / r['tempo']:>10.1f} "
+              f"{r['memoria_modelo']:>12.0f} {r['pico']:>10.0f} {erro:>7.1%}  ({base / r['tempo']:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
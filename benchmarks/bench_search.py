@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark do índice de busca (SQLite FTS5): indexação e latência das consultas.
+
+Gera transcrições sintéticas em português (vocabulário com palavras comuns
+e termos raros, como em reuniões reais), indexa-as com
+transcritor.search.SearchIndex e mede a latência de consultas típicas:
+palavra rara, palavra comum, várias palavras, frase, prefixo e sem acento.
+
+Uso:
+    python benchmarks/bench_search.py
+    python benchmarks/bench_search.py --segments 1000000 --db /tmp/busca.db
+    python benchmarks/bench_search.py --db results/search.db --reuse   # índice existente
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcritor.search import SearchIndex
+
+COMUNS = (
+    "o a de que e do da em um para é com não uma os no se na por mais as dos como mas foi ao ele "
+    "das tem à seu sua ou ser quando muito há nos já está eu também só pelo pela até isso ela entre "
+    "era depois sem mesmo aos ter seus quem nas me esse eles estão você tinha foram essa num nem "
+    "suas meu às minha têm numa pelos elas havia seja qual será nós tenho lhe deles essas esses "
+    "pelas este fosse dele tu te vocês vos lhes meus minhas teu tua teus tuas nosso nossa nossos"
+).split()
+TEMAS = (
+    "orçamento reunião diretoria contrato projeto cliente entrega prazo relatório equipe vendas "
+    "marketing financeiro auditoria investimento estratégia mercado produto lançamento campanha "
+    "contratação demissão salário benefício treinamento qualidade processo sistema implantação "
+    "migração servidor segurança privacidade licitação fornecedor logística estoque exportação"
+).split()
+RAROS = [f"{tema}{sufixo}" for tema in TEMAS for sufixo in ("ção", "mente", "ista", "ável", "izado")]
+ORADORES = [f"SPEAKER_{i:02d}" for i in range(6)] + ["Ana", "Bruno", "Carla"]
+
+CONSULTAS = {
+    "rara": lambda: random.choice(RAROS),
+    "tema": lambda: random.choice(TEMAS),
+    "comum": lambda: random.choice(COMUNS[:20]),
+    "2 palavras": lambda: f"{random.choice(TEMAS)} {random.choice(TEMAS)}",
+    "frase": lambda: f'"{random.choice(COMUNS)} {random.choice(TEMAS)}"',
+    "prefixo": lambda: random.choice(TEMAS)[:4] + "*",
+    "sem acento": lambda: random.choice(["orcamento", "reuniao", "migracao", "licitacao"]),
+}
+
+
+def transcricao(numero_segmentos, inicio=0.0):
+    """Segmentos de uma transcrição sintética."""
+    segmentos, t = [], inicio
+    for _ in range(numero_segmentos):
+        palavras = [
+            random.choice(RAROS) if random.random() < 0.01
+            else random.choice(TEMAS) if random.random() < 0.08
+            else random.choice(COMUNS)
+            for _ in range(random.randint(6, 25))
+        ]
+        duracao = len(palavras) * 0.35
+        segmentos.append({
+            "start": round(t, 3), "end": round(t + duracao, 3),
+            "speaker": random.choice(ORADORES), "text": " ".join(palavras).capitalize() + "."
+        })
+        t += duracao + random.uniform(0.1, 1.5)
+    return segmentos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do índice de busca (FTS5)")
+    parser.add_argument("--segments", type=int, default=1_000_000, help="Total de segmentos sintéticos")
+    parser.add_argument("--per-job", type=int, default=1000, help="Segmentos por transcrição (~2 h de áudio)")
+    parser.add_argument("--db", default="bench_search.db", help="Arquivo do índice")
+    parser.add_argument("--reuse", action="store_true", help="Usar o índice existente sem gerar dados")
+    parser.add_argument("--queries", type=int, default=200, help="Consultas por tipo")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    if not args.reuse and os.path.exists(args.db):
+        for sufixo in ("", "-wal", "-shm"):
+            if os.path.exists(args.db + sufixo):
+                os.remove(args.db + sufixo)
+
+    indice = SearchIndex(args.db)
+    if not args.reuse:
+        inicio = time.perf_counter()
+        jobs = max(1, args.segments // args.per_job)
+        for numero in range(jobs):
+            indice.add(f"job-{numero:06d}", transcricao(args.per_job), filename=f"gravacao_{numero}.mp3")
+            if (numero + 1) % 100 == 0:
+                print(f"  {numero + 1}/{jobs} transcrições indexadas", end="\r")
+        indice.optimize()
+        decorrido = time.perf_counter() - inicio
+        total = jobs * args.per_job
+        print(f"Indexação: {total} segmentos em {decorrido:.1f}s ({total / decorrido:,.0f} segmentos/s)")
+
+    stats = indice.stats()
+    tamanho = sum(os.path.getsize(args.db + s) for s in ("", "-wal") if os.path.exists(args.db + s))
+    print(f"Índice: {stats['jobs']} jobs, {stats['segments']:,} segmentos, {tamanho / 1024**2:.0f} MB")
+    print(f"{'consulta':>12} {'p50 (ms)':>9} {'p95 (ms)':>9} {'máx (ms)':>9} {'resultados':>11}")
+    for nome, gerar in CONSULTAS.items():
+        tempos, resultados = [], []
+        for _ in range(args.queries):
+            consulta = gerar()
+            inicio = time.perf_counter()
+            resposta = indice.search(consulta, limit=20)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+            resultados.append(len(resposta["hits"]))
+        tempos.sort()
+        print(f"{nome:>12} {statistics.median(tempos):>9.2f} {tempos[int(0.95 * (len(tempos) - 1))]:>9.2f} "
+              f"{tempos[-1]:>9.2f} {statistics.mean(resultados):>11.1f}")
+    indice.close()
+
+
+if __name__ == "__main__":
+    main()
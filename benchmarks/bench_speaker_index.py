@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark do índice de voiceprints: latência de busca x tamanho do índice.
+
+Uso:
+    python benchmarks/bench_speaker_index.py
+    python benchmarks/bench_speaker_index.py --sizes 1000,100000 --dim 256 --queries 8
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcritor.speaker_index import SpeakerIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do índice de voiceprints")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Tamanhos de índice")
+    parser.add_argument("--dim", type=int, default=256, help="Dimensão dos embeddings")
+    parser.add_argument("--queries", type=int, default=4, help="Oradores por gravação")
+    parser.add_argument("--repeat", type=int, default=50, help="Repetições por medida")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'voiceprints':>12} {'cadastro (s)':>13} {'busca (ms)':>11} {'resolve (ms)':>13}")
+
+    for size in [int(s) for s in args.sizes.split(",")]:
+        vectors = rng.standard_normal((size, args.dim)).astype(np.float32)
+        index = SpeakerIndex()
+        inicio = time.perf_counter()
+        for start in range(0, size, 1000):
+            index.add(f"orador_{start}", vectors[start:start + 1000])
+        cadastro = time.perf_counter() - inicio
+
+        # Consultas: voiceprints cadastrados com ruído
+        alvo = rng.integers(0, size, args.queries)
+        consultas = vectors[alvo] + 0.3 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+        labels = [f"SPEAKER_{i:02d}" for i in range(args.queries)]
+
+        inicio = time.perf_counter()
+        for _ in range(args.repeat):
+            index.search(consultas, top_k=5)
+        busca = (time.perf_counter() - inicio) / args.repeat * 1000
+
+        inicio = time.perf_counter()
+        for _ in range(args.repeat):
+            index.resolve_labels(labels, consultas)
+        resolve = (time.perf_counter() - inicio) / args.repeat * 1000
+
+        print(f"{size:>12} {cadastro:>13.2f} {busca:>11.2f} {resolve:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
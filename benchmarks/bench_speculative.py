@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark da transcrição em duas passadas: custo e WER x modelo grande puro.
+
+Transcreve um conjunto local de amostras (sem diarização) de três formas,
+cada uma em um processo próprio:
+  - grande:   só o modelo principal (--model)
+  - rascunho: só o modelo rápido (--draft)
+  - 2passes:  rascunho + modelo principal nos trechos de baixa confiança
+
+As referências são arquivos .txt com o mesmo nome do áudio; sem
+referência, a saída do modelo grande é usada.
+
+Uso:
+    python benchmarks/bench_speculative.py amostras/
+    python benchmarks/bench_speculative.py amostras/ --model large --draft small
+    python benchmarks/bench_speculative.py amostras/ --logprob -0.6 --no-speech 0.4
+"""
+
+import os
+import sys
+import time
+import argparse
+import multiprocessing as mp
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_quantization import EXTENSOES, wer
+
+MODOS = ("grande", "rascunho", "2passes")
+
+
+def medir(modo, modelo, rascunho, amostras, limiares, saida):
+    """Executado em um processo separado: carrega os modelos, transcreve e reporta."""
+    os.environ["ESCALATION_LOGPROB"], os.environ["ESCALATION_NO_SPEECH"] = map(str, limiares)
+    import transcrever
+
+    inicio = time.perf_counter()
+    principal = transcrever.load_asr_model(rascunho if modo == "rascunho" else modelo)
+    draft = transcrever.load_draft_model(rascunho) if modo == "2passes" else ""
+    carga = time.perf_counter() - inicio
+
+    textos, tempo, segundos, escalado = {}, 0.0, 0.0, 0.0
+    for amostra in amostras:
+        stats = {}
+        inicio = time.perf_counter()
+        segmentos = transcrever.transcribe_segments(
+            amostra, principal, enable_diarization=False, draft_model=draft, stats=stats
+        )
+        tempo += time.perf_counter() - inicio
+        segundos += stats["audio_seconds"]
+        escalado += stats.get("speculative", {}).get("escalated_seconds", 0.0)
+        textos[amostra] = " ".join(segmento["text"] for segmento in segmentos)
+
+    saida.put({"carga": carga, "tempo": tempo, "segundos": segundos, "escalado": escalado, "textos": textos})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da transcrição em duas passadas")
+    parser.add_argument("amostras", help="Pasta com áudios (e referências .txt de mesmo nome)")
+    parser.add_argument("--model", default="large", help="Modelo principal (padrão: large)")
+    parser.add_argument("--draft", default="tiny", help="Modelo de rascunho (padrão: tiny)")
+    parser.add_argument("--logprob", type=float, default=None, help="Limiar de avg_logprob (padrão do transcritor)")
+    parser.add_argument("--no-speech", type=float, default=None, help="Limiar de no_speech_prob (padrão do transcritor)")
+    args = parser.parse_args()
+
+    from transcritor.speculative import DEFAULT_LOGPROB_THRESHOLD, DEFAULT_NO_SPEECH_THRESHOLD
+    limiares = (
+        DEFAULT_LOGPROB_THRESHOLD if args.logprob is None else args.logprob,
+        DEFAULT_NO_SPEECH_THRESHOLD if args.no_speech is None else args.no_speech
+    )
+
+    amostras = sorted(str(p) for p in Path(args.amostras).iterdir() if p.suffix.lower() in EXTENSOES)
+    if not amostras:
+        print(f"❌ Nenhum áudio em {args.amostras}")
+        sys.exit(1)
+
+    contexto = mp.get_context("spawn")
+    resultados = {}
+    for modo in MODOS:
+        saida = contexto.Queue()
+        processo = contexto.Process(
+            target=medir, args=(modo, args.model, args.draft, amostras, limiares, saida)
+        )
+        processo.start()
+        resultados[modo] = saida.get()
+        processo.join()
+
+    referencias = {}
+    for amostra in amostras:
+        arquivo = Path(amostra).with_suffix(".txt")
+        referencias[amostra] = (
+            arquivo.read_text(encoding="utf-8") if arquivo.exists()
+            else resultados["grande"]["textos"][amostra]
+        )
+    com_referencia = sum(Path(a).with_suffix(".txt").exists() for a in amostras)
+
+    print(f"Principal: {args.model} | rascunho: {args.draft} | amostras: {len(amostras)} "
+          f"({com_referencia} com referência) | limiares: avg_logprob < {limiares[0]}, "
+          f"no_speech_prob > {limiares[1]}")
+    print(f"{'modo':>9} {'carga (s)':>10} {'tempo (s)':>10} {'áudio s/s':>10} {'escalado':>9} {'WER':>7}")
+    base = resultados["grande"]["tempo"]
+    for modo, r in resultados.items():
+        erro = sum(wer(referencias[a], r["textos"][a]) for a in amostras) / len(amostras)
+        escalado = f"{r['escalado'] / r['segundos']:.1%}" if modo == "2passes" and r["segundos"] else "-"
+        print(f"{modo:>9} {r['carga']:>10.1f} {r['tempo']:>10.1f} {r['segundos'] / r['tempo']:>10.1f} "
+              f"{escalado:>9} {erro:>7.1%}  ({base / r['tempo']:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
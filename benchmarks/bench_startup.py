@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark do tempo de inicialização: CLI, API e scripts.
+
+Mede, em processos novos, quanto tempo cada ponto de entrada leva para
+responder sem trabalho de verdade (--help, uso sem argumentos, importação
+da aplicação FastAPI). torch, whisper e pyannote só devem ser importados
+quando uma etapa precisa deles; a meta é ficar abaixo de 1 s.
+
+Uso:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --target 0.5
+    python benchmarks/bench_startup.py --importtime   # módulos mais lentos de cada caso
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+# Módulos que não deveriam ser importados só para iniciar
+PESADOS = ("torch", "whisper", "pyannote.audio", "faster_whisper")
+
+
+def casos():
+    """(nome, argumentos do python, diretório de trabalho) de cada ponto de entrada."""
+    lista = [
+        ("transcrever --help", ["transcrever.py", "--help"], RAIZ),
+        ("transcrever (arquivo inexistente)", ["transcrever.py", "nao_existe.wav"], RAIZ),
+        ("import transcrever", ["-c", "import transcrever"], RAIZ),
+        ("API (import main)", ["-c", "import main"], RAIZ / "backend"),
+    ]
+    for script in sorted((RAIZ / "scripts").glob("*.py")):
+        texto = script.read_text(encoding="utf-8")
+        args = ["--help"] if "argparse" in texto else []  # os demais mostram o uso sem argumentos
+        lista.append((f"scripts/{script.name}", [str(script), *args], RAIZ))
+    return lista
+
+
+def executar(args, cwd, extra=()):
+    """Rodar o python com `args` e retornar (segundos, processo concluído)."""
+    inicio = time.perf_counter()
+    processo = subprocess.run(
+        [sys.executable, *extra, *args], cwd=cwd, capture_output=True, text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    )
+    return time.perf_counter() - inicio, processo
+
+
+def pesados_importados(args, cwd):
+    """Módulos pesados carregados pelo caso (via -X importtime)."""
+    _, processo = executar(args, cwd, ("-X", "importtime"))
+    modulos = set(re.findall(r"\|\s+(\S+)$", processo.stderr, re.MULTILINE))
+    return [m for m in PESADOS if m in modulos]
+
+
+def mais_lentos(args, cwd, n):
+    """Os `n` módulos com maior tempo acumulado de importação."""
+    _, processo = executar(args, cwd, ("-X", "importtime"))
+    tempos = []
+    for linha in processo.stderr.splitlines():
+        partes = linha.split("|")
+        if len(partes) == 3 and partes[1].strip().isdigit():
+            tempos.append((int(partes[1]), partes[2].rstrip()))
+    return sorted(tempos, reverse=True)[:n]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do tempo de inicialização")
+    parser.add_argument("--runs", type=int, default=5, help="Execuções por caso (usa a mediana)")
+    parser.add_argument("--target", type=float, default=1.0, help="Meta em segundos (padrão: 1.0)")
+    parser.add_argument("--importtime", action="store_true", help="Listar os módulos mais lentos de cada caso")
+    parser.add_argument("--top", type=int, default=8, help="Quantos módulos listar com --importtime")
+    args = parser.parse_args()
+
+    print(f"Python: {sys.executable} | execuções: {args.runs} | meta: {args.target:.2f}s")
+    print(f"{'caso':<40} {'mediana (s)':>12} {'mín (s)':>8} {'saída':>6}  pesados")
+    acima = 0
+    for nome, argumentos, cwd in casos():
+        executar(argumentos, cwd)  # aquecer o cache de disco
+        tempos, codigo = [], 0
+        for _ in range(args.runs):
+            segundos, processo = executar(argumentos, cwd)
+            tempos.append(segundos)
+            codigo = processo.returncode
+        mediana = statistics.median(tempos)
+        pesados = pesados_importados(argumentos, cwd)
+        marca = "✅" if mediana <= args.target else "❌"
+        acima += mediana > args.target
+        print(f"{marca} {nome:<38} {mediana:>12.3f} {min(tempos):>8.3f} {codigo:>6}  {', '.join(pesados) or '-'}")
+
+        if args.importtime:
+            for micros, modulo in mais_lentos(argumentos, cwd, args.top):
+                print(f"      {micros / 1e6:>8.3f}s {modulo}")
+
+    if acima:
+        print(f"\n{acima} caso(s) acima da meta de {args.target:.2f}s")
+    sys.exit(1 if acima else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark da transcrição binária: consulta por trecho x JSON completo.
+
+Gera transcrições sintéticas de várias durações, grava cada uma como o
+resultado canônico (JSON) e com transcritor.transcript_store, e mede a
+latência de buscar os segmentos de um trecho de poucos minutos em posição
+aleatória:
+  - json:  ler e decodificar results/<job>.json inteiro e filtrar (o que
+           um cliente faz hoje com o download)
+  - store: open_store + range (o que GET /jobs/{job_id}/segments faz)
+
+Na transcrição binária a latência deve ficar praticamente constante com
+a duração; no JSON ela cresce linearmente.
+
+Uso:
+    python benchmarks/bench_transcript_store.py
+    python benchmarks/bench_transcript_store.py --horas 1,10,100 --trecho 120
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcritor import transcript_store
+from transcritor.export import render_json, seconds
+
+PALAVRAS = (
+    "a reunião de hoje é sobre o orçamento do projeto e o prazo de entrega para o cliente "
+    "precisamos revisar o contrato com o fornecedor antes da auditoria do próximo mês"
+).split()
+ORADORES = [f"SPEAKER_{i:02d}" for i in range(4)]
+
+
+def relogio(t):
+    horas, resto = divmod(t, 3600)
+    minutos, segundos = divmod(resto, 60)
+    return f"{int(horas):02d}:{int(minutos):02d}:{segundos:06.3f}"
+
+
+def transcricao(horas):
+    """Resultado sintético no formato do pipeline (tempos em HH:MM:SS.mmm)."""
+    segmentos, t, numero = [], 0.0, 0
+    while t < horas * 3600:
+        palavras = [random.choice(PALAVRAS) for _ in range(random.randint(6, 25))]
+        duracao = len(palavras) * 0.35
+        segmentos.append({
+            "id": f"segment_{numero:03d}", "start": relogio(t), "end": relogio(t + duracao),
+            "duration": round(duracao, 3), "speaker": random.choice(ORADORES),
+            "text": " ".join(palavras).capitalize() + ".", "confidence": 0.9, "language": "pt"
+        })
+        t += duracao + random.uniform(0.1, 1.5)
+        numero += 1
+    return {"segments": segmentos, "metadata": {"total_duration": t}}
+
+
+def consulta_json(caminho, inicio, fim):
+    with open(caminho, encoding="utf-8") as f:
+        resultado = json.load(f)
+    return [s for s in resultado["segments"] if seconds(s["start"]) < fim and seconds(s["end"]) > inicio]
+
+
+def consulta_store(caminho, inicio, fim):
+    return transcript_store.open_store(caminho).range(inicio, fim)
+
+
+def medir(funcao, caminho, duracao, trecho, consultas):
+    tempos, encontrados = [], 0
+    for _ in range(consultas):
+        inicio = random.uniform(0, max(0.0, duracao - trecho))
+        antes = time.perf_counter()
+        encontrados += len(funcao(caminho, inicio, inicio + trecho))
+        tempos.append((time.perf_counter() - antes) * 1000)
+    tempos.sort()
+    return statistics.median(tempos), tempos[int(0.95 * (len(tempos) - 1))], encontrados / consultas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da transcrição binária (consulta por trecho)")
+    parser.add_argument("--horas", default="0.5,2,10,50", help="Durações sintéticas, separadas por vírgula")
+    parser.add_argument("--trecho", type=float, default=300, help="Duração do trecho consultado em segundos")
+    parser.add_argument("--consultas", type=int, default=200, help="Consultas por caso (store)")
+    parser.add_argument("--consultas-json", type=int, default=10, help="Consultas por caso (json)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    pasta = tempfile.mkdtemp(prefix="bench_tseg-")
+    print(f"{'horas':>6} {'segmentos':>10} {'json MB':>8} {'tseg MB':>8} "
+          f"{'json p50':>9} {'store p50':>10} {'store p95':>10} {'segm./consulta':>15}")
+    for horas in (float(h) for h in args.horas.split(",")):
+        resultado = transcricao(horas)
+        duracao = resultado["metadata"]["total_duration"]
+        caminho_json = os.path.join(pasta, f"sintetico_{horas:g}h.json")
+        caminho_store = os.path.join(pasta, f"sintetico_{horas:g}h.{transcript_store.EXTENSION}")
+        with open(caminho_json, "w", encoding="utf-8") as f:
+            f.write(render_json(resultado))
+        transcript_store.write(caminho_store, resultado["segments"], duration=duracao)
+
+        json_p50, _, _ = medir(consulta_json, caminho_json, duracao, args.trecho, args.consultas_json)
+        store_p50, store_p95, media = medir(consulta_store, caminho_store, duracao, args.trecho, args.consultas)
+        print(f"{horas:>6g} {len(resultado['segments']):>10} "
+              f"{os.path.getsize(caminho_json) / 1024**2:>8.1f} {os.path.getsize(caminho_store) / 1024**2:>8.1f} "
+              f"{json_p50:>8.1f}ms {store_p50:>8.3f}ms {store_p95:>8.3f}ms {media:>15.1f}")
+
+        transcript_store.forget(caminho_store)
+        os.remove(caminho_json)
+        os.remove(caminho_store)
+    os.rmdir(pasta)
+
+
+if __name__ == "__main__":
+    main()
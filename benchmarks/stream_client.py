@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Cliente de teste do streaming: reproduz um áudio em tempo real no WebSocket
+/ws/stream e mede o atraso das legendas em relação ao "ao vivo".
+
+O atraso de uma mensagem é quanto áudio já tinha sido enviado quando ela
+chegou menos o fim do trecho que ela legenda (em segundos de áudio). A
+meta é ficar abaixo de 2 s nos segmentos finais com um modelo pequeno
+na CPU. Áudios que não são WAV PCM 16 kHz mono são convertidos com ffmpeg.
+
+Requer: pip install websockets
+
+Uso:
+    python benchmarks/stream_client.py reuniao.wav
+    python benchmarks/stream_client.py reuniao.mp3 --model base --chunk-ms 100
+    python benchmarks/stream_client.py reuniao.wav --speed 2 --url ws://servidor:8000/ws/stream
+"""
+
+import sys
+import json
+import time
+import wave
+import asyncio
+import argparse
+import subprocess
+import statistics
+
+TAXA = 16000
+
+
+def carregar_pcm(caminho):
+    """Bytes PCM s16le mono 16 kHz do arquivo."""
+    try:
+        with wave.open(caminho, "rb") as wav:
+            if (wav.getframerate(), wav.getnchannels(), wav.getsampwidth()) == (TAXA, 1, 2):
+                return wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError):
+        pass
+    return subprocess.run(
+        ["ffmpeg", "-loglevel", "error", "-i", caminho, "-f", "s16le", "-ac", "1", "-ar", str(TAXA), "pipe:1"],
+        check=True, capture_output=True
+    ).stdout
+
+
+def percentis(valores):
+    if not valores:
+        return "-"
+    ordenados = sorted(valores)
+    p95 = ordenados[min(len(ordenados) - 1, int(0.95 * len(ordenados)))]
+    return f"p50 {statistics.median(ordenados):.2f}s | p95 {p95:.2f}s | máx {ordenados[-1]:.2f}s"
+
+
+async def transmitir(args):
+    import websockets
+
+    pcm = carregar_pcm(args.arquivo)
+    bloco = int(TAXA * args.chunk_ms / 1000) * 2
+    url = f"{args.url}?model={args.model}&language={args.language}"
+    atrasos = {"final": [], "partial": []}
+    finais = []
+
+    async with websockets.connect(url, max_size=None) as ws:
+        pronto = json.loads(await ws.recv())
+        if pronto.get("type") != "ready":
+            print(f"❌ {pronto.get('detail', pronto)}")
+            return 1
+        print(f"📡 Conectado: modelo {pronto['model']}, passo {pronto['step_seconds']}s")
+        inicio = time.perf_counter()
+
+        async def enviar():
+            for i in range(0, len(pcm), bloco):
+                # Enviar no ritmo do áudio (ou `speed` vezes mais rápido)
+                alvo = inicio + (i / 2 / TAXA) / args.speed
+                await asyncio.sleep(max(0.0, alvo - time.perf_counter()))
+                await ws.send(pcm[i:i + bloco])
+            await ws.send(json.dumps({"type": "end"}))
+
+        async def receber():
+            async for texto in ws:
+                mensagem = json.loads(texto)
+                if mensagem["type"] == "done":
+                    return mensagem["stats"]
+                enviado = min((time.perf_counter() - inicio) * args.speed, len(pcm) / 2 / TAXA)
+                atraso = enviado - mensagem["end"]
+                if mensagem["type"] in atrasos:
+                    atrasos[mensagem["type"]].append(atraso)
+                if mensagem["type"] == "final":
+                    finais.append(mensagem)
+                    print(f"  [{mensagem['start']:7.2f}-{mensagem['end']:7.2f}] (+{atraso:.2f}s) {mensagem['text']}")
+                elif args.verbose:
+                    print(f"  … (+{atraso:.2f}s) {mensagem['text']}")
+
+        _, stats = await asyncio.gather(enviar(), receber())
+
+    duracao = len(pcm) / 2 / TAXA
+    print(f"\n🎧 Áudio: {duracao:.1f}s | tempo total: {time.perf_counter() - inicio:.1f}s | velocidade: {args.speed}x")
+    print(f"⏱️  Atraso dos finais:   {percentis(atrasos['final'])}")
+    print(f"⏱️  Atraso dos parciais: {percentis(atrasos['partial'])}")
+    print(f"🧠 Servidor: {stats}")
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({"finais": finais, "atrasos": atrasos, "servidor": stats}, f, ensure_ascii=False, indent=2)
+    p95 = sorted(atrasos["final"])[int(0.95 * (len(atrasos["final"]) - 1))] if atrasos["final"] else None
+    return 0 if p95 is not None and p95 <= args.meta else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cliente de teste do streaming (/ws/stream)")
+    parser.add_argument("arquivo", help="Áudio a reproduzir (WAV 16 kHz mono ou qualquer formato do ffmpeg)")
+    parser.add_argument("--url", default="ws://localhost:8000/ws/stream", help="Endereço do WebSocket")
+    parser.add_argument("--model", default="small", help="Modelo Whisper (padrão: small)")
+    parser.add_argument("--language", default="pt", help="Idioma (padrão: pt)")
+    parser.add_argument("--chunk-ms", type=int, default=200, help="Tamanho de cada envio em ms")
+    parser.add_argument("--speed", type=float, default=1.0, help="Velocidade da reprodução (1 = tempo real)")
+    parser.add_argument("--meta", type=float, default=2.0, help="Meta de atraso p95 dos finais, em segundos")
+    parser.add_argument("--saida", default=None, help="Gravar segmentos e atrasos neste JSON")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Mostrar também os parciais")
+    args = parser.parse_args()
+
+    try:
+        import websockets  # noqa: F401
+    except ImportError:
+        print("❌ Instale o cliente WebSocket: pip install websockets")
+        sys.exit(1)
+    sys.exit(asyncio.run(transmitir(args)))
+
+
+if __name__ == "__main__":
+    main()
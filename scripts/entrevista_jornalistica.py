@@ -6,26 +6,16 @@ Configurado para máxima qualidade e identificação precisa de entrevistador/en
 
 import os
 import sys
-import subprocess
+import time
 from pathlib import Path
 
-# Configurações específicas para entrevistas jornalísticas
-ENTREVISTA_CONFIG = {
-    'WHISPER_MODEL': 'large',
-    'OUTPUT_FORMAT': 'txt,json',
-    'NUM_SPEAKERS': '2',  # Geralmente entrevistador + entrevistado
-    'MIN_SPEAKERS': '2',
-    'MAX_SPEAKERS': '3',
-    'INTERVIEW_MODE': 'true',
-    'VERBOSE_LOGGING': 'true',
-    'CONFIDENCE_THRESHOLD': '0.8',
-    'AUTO_NORMALIZE_VOLUME': 'true',
-    'PORTUGUESE_POSTPROCESSING': 'true',
-    'ENABLE_TEXT_CORRECTIONS': 'true',
-    'AUDIO_SAMPLE_RATE': '22050'  # Maior qualidade para áudio jornalístico
-}
+# Adicionar o diretório raiz ao path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
 
-def processar_entrevista(arquivo_entrada, pasta_saida=None, nome_entrevistado=None):
+from transcritor.presets import ENTREVISTA
+
+def processar_entrevista(arquivo_entrada, pasta_saida=None, nome_entrevistado=None, pipeline=None):
     """
     Processa uma entrevista com configurações otimizadas.
     
@@ -33,11 +23,15 @@ def processar_entrevista(arquivo_entrada, pasta_saida=None, nome_entrevistado=No
         arquivo_entrada (str): Caminho para o arquivo de áudio/vídeo
         pasta_saida (str): Pasta de destino para os resultados
         nome_entrevistado (str): Nome do entrevistado para personalizar saída
+        pipeline (transcrever.Pipeline): Pipeline já carregado (opcional)
+
+    Returns:
+        TranscriptionResult ou None em caso de erro
     """
     
     if not os.path.exists(arquivo_entrada):
         print(f"❌ Arquivo não encontrado: {arquivo_entrada}")
-        return False
+        return None
     
     # Configurar pasta de saída
     if pasta_saida is None:
@@ -49,57 +43,37 @@ def processar_entrevista(arquivo_entrada, pasta_saida=None, nome_entrevistado=No
     
     os.makedirs(pasta_saida, exist_ok=True)
     
-    # Aplicar configurações
-    env = os.environ.copy()
-    env.update(ENTREVISTA_CONFIG)
-    env['OUTPUT_DIR'] = pasta_saida
-    
+    nome_base = None
     if nome_entrevistado:
-        env['OUTPUT_PREFIX'] = f"entrevista_{nome_entrevistado.replace(' ', '_')}_"
+        nome_base = f"entrevista_{nome_entrevistado.replace(' ', '_')}_{Path(arquivo_entrada).stem}"
     
     print(f"🎤 Processando entrevista: {arquivo_entrada}")
     if nome_entrevistado:
         print(f"👤 Entrevistado: {nome_entrevistado}")
     print(f"📁 Resultado será salvo em: {pasta_saida}")
-    print("⚙️ Configurações: Entrevista Jornalística (Máxima Qualidade)")
+    print(f"⚙️ Configurações: {ENTREVISTA.description}")
     print("👥 Detectando 2 oradores (entrevistador/entrevistado)...")
     
-    # Executar transcrição
-    comando = [sys.executable, 'transcrever.py', arquivo_entrada]
-    
     try:
-        resultado = subprocess.run(comando, env=env, capture_output=True, text=True)
-        
-        if resultado.returncode == 0:
-            print("✅ Entrevista processada com sucesso!")
-            print(f"📰 Material pronto para edição em: {pasta_saida}")
-            
-            # Gerar arquivo adicional com formatação jornalística
-            gerar_formato_jornalistico(pasta_saida, nome_entrevistado)
-            return True
-        else:
-            print(f"❌ Erro no processamento: {resultado.stderr}")
-            return False
-            
+        if pipeline is None:
+            from transcrever import Pipeline
+            pipeline = Pipeline(preset=ENTREVISTA)
+        resultado = pipeline.run(arquivo_entrada, output_dir=pasta_saida, basename=nome_base)
     except Exception as e:
-        print(f"❌ Erro inesperado: {e}")
-        return False
+        print(f"❌ Erro no processamento: {e}")
+        return None
+    
+    print("✅ Entrevista processada com sucesso!")
+    print(f"📰 Material pronto para edição em: {pasta_saida}")
+    
+    # Gerar arquivo adicional com formatação jornalística
+    gerar_formato_jornalistico(resultado.transcript, pasta_saida, nome_entrevistado)
+    return resultado
 
-def gerar_formato_jornalistico(pasta_saida, nome_entrevistado):
+def gerar_formato_jornalistico(transcricao, pasta_saida, nome_entrevistado):
     """Gera um arquivo formatado especificamente para uso jornalístico."""
     
     try:
-        # Buscar arquivo JSON gerado
-        arquivos_json = list(Path(pasta_saida).glob("*.json"))
-        if not arquivos_json:
-            return
-        
-        import json
-        
-        with open(arquivos_json[0], 'r', encoding='utf-8') as f:
-            transcricao = json.load(f)
-        
-        # Gerar formato jornalístico
         arquivo_jornalistico = Path(pasta_saida) / "formato_jornalistico.txt"
         
         with open(arquivo_jornalistico, 'w', encoding='utf-8') as f:
@@ -109,7 +83,7 @@ def gerar_formato_jornalistico(pasta_saida, nome_entrevistado):
             
             if nome_entrevistado:
                 f.write(f"ENTREVISTADO: {nome_entrevistado}\n")
-            f.write(f"DATA: {Path(arquivos_json[0]).stat().st_mtime}\n")
+            f.write(f"DATA: {time.strftime('%d/%m/%Y %H:%M')}\n")
             f.write("OBSERVAÇÃO: Verificar citações antes da publicação\n\n")
             
             f.write("-" * 60 + "\n")
@@ -141,8 +115,8 @@ def main():
     pasta_saida = sys.argv[2] if len(sys.argv) > 2 else None
     nome_entrevistado = sys.argv[3] if len(sys.argv) > 3 else None
     
-    sucesso = processar_entrevista(arquivo, pasta_saida, nome_entrevistado)
-    sys.exit(0 if sucesso else 1)
+    resultado = processar_entrevista(arquivo, pasta_saida, nome_entrevistado)
+    sys.exit(0 if resultado else 1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
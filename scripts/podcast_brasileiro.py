@@ -6,27 +6,26 @@ Configurado para conteúdo longo, múltiplos oradores e geração de legendas.
 
 import os
 import sys
-import subprocess
+import time
+import argparse
+from collections import Counter
 from pathlib import Path
 
-# Configurações específicas para podcasts
-PODCAST_CONFIG = {
-    'WHISPER_MODEL': 'medium',
-    'OUTPUT_FORMAT': 'txt,srt,json',
-    'NUM_SPEAKERS': 'auto',
-    'MIN_SPEAKERS': '2',
-    'MAX_SPEAKERS': '5',
-    'PODCAST_MODE': 'true',
-    'VERBOSE_LOGGING': 'false',  # Menos verboso para conteúdo longo
-    'CONFIDENCE_THRESHOLD': '0.6',
-    'AUTO_NORMALIZE_VOLUME': 'true',
-    'PORTUGUESE_POSTPROCESSING': 'true',
-    'ENABLE_TEXT_CORRECTIONS': 'true',
-    'PROCESSING_TIMEOUT': '7200',  # 2 horas timeout para podcasts longos
-    'BATCH_SIZE': '8'  # Menor batch para economia de memória
-}
-
-def processar_podcast(arquivo_entrada, pasta_saida=None, nome_podcast=None, episodio=None):
+# Adicionar diretório raiz ao path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from transcritor.export import render_vtt, seconds
+from transcritor.presets import PODCAST
+from transcritor.speaker_index import SpeakerIndex
+
+# Extensões aceitas no modo série
+EXTENSOES_EPISODIOS = {'.mp3', '.wav', '.m4a', '.flac', '.ogg', '.mp4', '.mkv', '.mov', '.webm'}
+
+# Índice de voiceprints dos apresentadores, salvo na pasta da série
+ARQUIVO_APRESENTADORES = "apresentadores.npz"
+
+def processar_podcast(arquivo_entrada, pasta_saida=None, nome_podcast=None, episodio=None, pipeline=None):
     """
     Processa um podcast com configurações otimizadas.
     
@@ -35,11 +34,15 @@ def processar_podcast(arquivo_entrada, pasta_saida=None, nome_podcast=None, epis
         pasta_saida (str): Pasta de destino para os resultados
         nome_podcast (str): Nome do podcast
         episodio (str): Número ou nome do episódio
+        pipeline (transcrever.Pipeline): Pipeline já carregado (opcional)
+
+    Returns:
+        TranscriptionResult ou None em caso de erro
     """
     
     if not os.path.exists(arquivo_entrada):
         print(f"❌ Arquivo não encontrado: {arquivo_entrada}")
-        return False
+        return None
     
     # Configurar pasta de saída
     if pasta_saida is None:
@@ -53,16 +56,11 @@ def processar_podcast(arquivo_entrada, pasta_saida=None, nome_podcast=None, epis
     
     os.makedirs(pasta_saida, exist_ok=True)
     
-    # Aplicar configurações
-    env = os.environ.copy()
-    env.update(PODCAST_CONFIG)
-    env['OUTPUT_DIR'] = pasta_saida
-    
+    nome_base = None
     if nome_podcast:
-        prefix = f"{nome_podcast.replace(' ', '_')}"
+        nome_base = f"{nome_podcast.replace(' ', '_')}"
         if episodio:
-            prefix += f"_ep{episodio}"
-        env['OUTPUT_PREFIX'] = prefix + "_"
+            nome_base += f"_ep{episodio}"
     
     print(f"🎧 Processando podcast: {arquivo_entrada}")
     if nome_podcast:
@@ -70,107 +68,226 @@ def processar_podcast(arquivo_entrada, pasta_saida=None, nome_podcast=None, epis
     if episodio:
         print(f"📺 Episódio: {episodio}")
     print(f"📁 Resultado será salvo em: {pasta_saida}")
-    print("⚙️ Configurações: Podcast (Otimizado para conteúdo longo)")
+    print(f"⚙️ Configurações: {PODCAST.description}")
     print("👥 Detectando múltiplos oradores automaticamente...")
     print("⏱️ Processamento pode demorar para arquivos longos...")
     
-    # Executar transcrição
-    comando = [sys.executable, 'transcrever.py', arquivo_entrada]
-    
     try:
-        resultado = subprocess.run(comando, env=env, capture_output=True, text=True)
-        
-        if resultado.returncode == 0:
-            print("✅ Podcast processado com sucesso!")
-            print(f"🎧 Material pronto para publicação em: {pasta_saida}")
-            
-            # Gerar arquivos adicionais para podcast
-            gerar_arquivos_podcast(pasta_saida, nome_podcast, episodio)
-            return True
-        else:
-            print(f"❌ Erro no processamento: {resultado.stderr}")
-            return False
-            
+        if pipeline is None:
+            from transcrever import Pipeline
+            pipeline = Pipeline(preset=PODCAST)
+        resultado = pipeline.run(arquivo_entrada, output_dir=pasta_saida, basename=nome_base)
     except Exception as e:
-        print(f"❌ Erro inesperado: {e}")
-        return False
+        print(f"❌ Erro no processamento: {e}")
+        return None
+    
+    print("✅ Podcast processado com sucesso!")
+    print(f"🎧 Material pronto para publicação em: {pasta_saida}")
+    
+    # Gerar arquivos adicionais para podcast
+    gerar_arquivos_podcast(
+        resultado.transcript, pasta_saida, nome_base or Path(arquivo_entrada).stem,
+        nome_podcast, episodio
+    )
+    return resultado
 
-def gerar_arquivos_podcast(pasta_saida, nome_podcast, episodio):
+def gerar_arquivos_podcast(transcricao, pasta_saida, nome_base, nome_podcast, episodio):
     """Gera arquivos adicionais específicos para podcasts."""
     
     try:
-        # Buscar arquivos gerados
         pasta = Path(pasta_saida)
-        arquivos_srt = list(pasta.glob("*.srt"))
-        arquivos_json = list(pasta.glob("*.json"))
         
-        if arquivos_json:
-            import json
-            
-            with open(arquivos_json[0], 'r', encoding='utf-8') as f:
-                transcricao = json.load(f)
+        # Gerar show notes básicas
+        arquivo_shownotes = pasta / "show_notes.md"
+        
+        with open(arquivo_shownotes, 'w', encoding='utf-8') as f:
+            f.write("# Show Notes\n\n")
+            if nome_podcast:
+                f.write(f"**Podcast:** {nome_podcast}\n")
+            if episodio:
+                f.write(f"**Episódio:** {episodio}\n")
+            f.write(f"**Duração:** Aprox. {calcular_duracao(transcricao)} minutos\n")
+            f.write(f"**Oradores identificados:** {len(set(t['speaker'] for t in transcricao))}\n\n")
             
-            # Gerar show notes básicas
-            arquivo_shownotes = pasta / "show_notes.md"
+            f.write("## Transcrição Completa\n\n")
+            f.write("*Gerada automaticamente - revisar antes da publicação*\n\n")
             
-            with open(arquivo_shownotes, 'w', encoding='utf-8') as f:
-                f.write("# Show Notes\n\n")
-                if nome_podcast:
-                    f.write(f"**Podcast:** {nome_podcast}\n")
-                if episodio:
-                    f.write(f"**Episódio:** {episodio}\n")
-                f.write(f"**Duração:** Aprox. {calcular_duracao(transcricao)} minutos\n")
-                f.write(f"**Oradores identificados:** {len(set(t['speaker'] for t in transcricao))}\n\n")
-                
-                f.write("## Transcrição Completa\n\n")
-                f.write("*Gerada automaticamente - revisar antes da publicação*\n\n")
-                
-                for entrada in transcricao[:10]:  # Primeiros 10 segmentos como amostra
-                    f.write(f"**{entrada['speaker']}:** {entrada['text']}\n\n")
-                
-                f.write("...\n\n*(Transcrição completa nos outros arquivos)*")
+            for entrada in transcricao[:10]:  # Primeiros 10 segmentos como amostra
+                f.write(f"**{entrada['speaker']}:** {entrada['text']}\n\n")
             
-            print(f"📝 Show notes geradas: {arquivo_shownotes}")
+            f.write("...\n\n*(Transcrição completa nos outros arquivos)*")
+        
+        print(f"📝 Show notes geradas: {arquivo_shownotes}")
         
-        if arquivos_srt:
-            # Converter SRT para WebVTT para web
-            arquivo_vtt = pasta / f"{arquivos_srt[0].stem}.vtt"
-            converter_srt_para_vtt(arquivos_srt[0], arquivo_vtt)
-            print(f"🌐 Legendas WebVTT geradas: {arquivo_vtt}")
+        # Legendas WebVTT para web, a partir da mesma transcrição
+        arquivo_vtt = pasta / f"{nome_base}.vtt"
+        with open(arquivo_vtt, 'w', encoding='utf-8') as f:
+            f.write(render_vtt(transcricao))
+        print(f"🌐 Legendas WebVTT geradas: {arquivo_vtt}")
         
     except Exception as e:
         print(f"⚠️ Erro ao gerar arquivos adicionais: {e}")
 
+def listar_episodios(entradas):
+    """Lista os episódios a partir de arquivos e/ou diretórios, em ordem."""
+    
+    episodios = []
+    for entrada in map(Path, entradas):
+        if entrada.is_dir():
+            episodios.extend(sorted(
+                arquivo for arquivo in entrada.iterdir()
+                if arquivo.is_file() and arquivo.suffix.lower() in EXTENSOES_EPISODIOS
+            ))
+        elif entrada.is_file():
+            episodios.append(entrada)
+        else:
+            print(f"⚠️ Ignorando entrada não encontrada: {entrada}")
+    return episodios
+
+def tempo_de_fala(segmentos):
+    """Segundos de fala por orador."""
+    
+    tempos = Counter()
+    for segmento in segmentos:
+        tempos[segmento['speaker']] += segmento['end'] - segmento['start']
+    return tempos
+
+def cadastrar_apresentadores(indice, segmentos, embeddings, apresentadores):
+    """
+    Cadastra os apresentadores ainda ausentes do índice.
+    
+    Os oradores não reconhecidos que mais falaram no episódio recebem os
+    nomes pendentes, em ordem. Por isso o primeiro episódio processado
+    deve ter os apresentadores e, de preferência, poucos convidados.
+    """
+    
+    cadastrados = set(indice.names)
+    pendentes = [nome for nome in apresentadores if nome not in cadastrados]
+    if not pendentes:
+        return []
+    
+    candidatos = [
+        rotulo for rotulo, _ in tempo_de_fala(segmentos).most_common()
+        if rotulo in embeddings and rotulo not in cadastrados
+    ]
+    novos = []
+    for nome, rotulo in zip(pendentes, candidatos):
+        indice.add(nome, embeddings[rotulo])
+        novos.append((rotulo, nome))
+    return novos
+
+def processar_serie(entradas, pasta_saida, nome_podcast=None, apresentadores=("Apresentador 1", "Apresentador 2")):
+    """
+    Processa vários episódios de uma série com os modelos carregados uma vez.
+    
+    Os apresentadores são cadastrados a partir do primeiro episódio (pelo
+    tempo de fala) e reconhecidos pelo nome nos seguintes; a quantidade de
+    apresentadores cadastrados é usada como número mínimo de oradores na
+    diarização. O índice fica salvo na pasta da série e é reaproveitado
+    em execuções futuras.
+    """
+    
+    episodios = listar_episodios(entradas)
+    if not episodios:
+        print("❌ Nenhum episódio encontrado")
+        return []
+    
+    from transcrever import Pipeline
+    
+    pasta_serie = Path(pasta_saida)
+    pasta_serie.mkdir(parents=True, exist_ok=True)
+    arquivo_indice = pasta_serie / ARQUIVO_APRESENTADORES
+    indice = SpeakerIndex.load(str(arquivo_indice))
+    pipeline = Pipeline(preset=PODCAST, speaker_index=indice)
+    
+    print(f"🎧 Série com {len(episodios)} episódio(s)")
+    print("⚙️ Carregando modelos (uma única vez para toda a série)...")
+    inicio = time.time()
+    pipeline.load()
+    print(f"✅ Modelos carregados em {time.time() - inicio:.1f}s")
+    
+    resultados = []
+    for numero, episodio in enumerate(episodios, 1):
+        print("=" * 60)
+        print(f"📺 [{numero}/{len(episodios)}] {episodio.name}")
+        pasta_episodio = pasta_serie / episodio.stem
+        inicio = time.time()
+        
+        try:
+            embeddings = {}
+            # Os apresentadores cadastrados podem faltar no episódio: contam
+            # só para o máximo (mais um convidado), não para o mínimo
+            resultado = pipeline.run(
+                str(episodio), speaker_embeddings=embeddings,
+                max_speakers=max(PODCAST.max_speakers, len(set(indice.names)) + 1)
+            )
+            
+            novos = cadastrar_apresentadores(indice, resultado.segments, embeddings, apresentadores)
+            if novos:
+                mapeamento = dict(novos)
+                for segmento in resultado.segments:
+                    segmento['speaker'] = mapeamento.get(segmento['speaker'], segmento['speaker'])
+                for rotulo, nome in novos:
+                    print(f"🗣️ {rotulo} cadastrado como {nome}")
+                indice.save(str(arquivo_indice))
+            
+            pipeline.save(resultado, str(pasta_episodio))
+            gerar_arquivos_podcast(resultado.transcript, pasta_episodio, episodio.stem, nome_podcast, episodio.stem)
+            
+            duracao = time.time() - inicio
+            print(f"✅ Episódio concluído em {duracao:.1f}s")
+            resultados.append({'episodio': episodio, 'sucesso': True, 'duracao': duracao})
+        except Exception as e:
+            print(f"❌ Erro no episódio {episodio.name}: {e}")
+            resultados.append({'episodio': episodio, 'sucesso': False, 'duracao': time.time() - inicio})
+    
+    sucessos = sum(1 for r in resultados if r['sucesso'])
+    print("=" * 60)
+    print(f"📊 {sucessos}/{len(resultados)} episódio(s) processado(s); resultados em {pasta_serie}")
+    return resultados
+
 def calcular_duracao(transcricao):
     """Calcula duração aproximada do podcast em minutos."""
     if not transcricao:
         return 0
     
-    ultimo_timestamp = transcricao[-1]['start']
-    # Converter timestamp para segundos
-    partes = ultimo_timestamp.split(':')
-    segundos = int(partes[0]) * 3600 + int(partes[1]) * 60 + int(partes[2])
+    ultimo = transcricao[-1]
+    segundos = seconds(ultimo.get('end') or ultimo['start'])
     return round(segundos / 60)
 
-def converter_srt_para_vtt(arquivo_srt, arquivo_vtt):
-    """Converte arquivo SRT para WebVTT."""
+def main_serie(argumentos):
+    """Modo série: vários episódios com modelos e apresentadores reaproveitados."""
     
-    with open(arquivo_srt, 'r', encoding='utf-8') as f:
-        conteudo_srt = f.read()
+    parser = argparse.ArgumentParser(
+        prog="podcast_brasileiro.py --serie",
+        description="Processa vários episódios de um podcast com os modelos carregados uma vez"
+    )
+    parser.add_argument("entradas", nargs="+", help="Arquivos de episódios e/ou diretórios")
+    parser.add_argument("-o", "--saida", default=None, help="Pasta da série")
+    parser.add_argument("-n", "--nome", default=None, help="Nome do podcast")
+    parser.add_argument("--apresentadores", default="Apresentador 1,Apresentador 2",
+                        help="Nomes dos apresentadores, separados por vírgula")
+    args = parser.parse_args(argumentos)
     
-    # Converter formato
-    conteudo_vtt = "WEBVTT\n\n" + conteudo_srt.replace(',', '.')
-    
-    with open(arquivo_vtt, 'w', encoding='utf-8') as f:
-        f.write(conteudo_vtt)
+    pasta_saida = args.saida or (
+        f"output/podcast_{args.nome.replace(' ', '_')}" if args.nome else "output/podcast_serie"
+    )
+    apresentadores = [nome.strip() for nome in args.apresentadores.split(",") if nome.strip()]
+    resultados = processar_serie(args.entradas, pasta_saida, args.nome, apresentadores)
+    sys.exit(0 if resultados and all(r['sucesso'] for r in resultados) else 1)
 
 def main():
     """Função principal para execução via linha de comando."""
     
+    if len(sys.argv) > 1 and sys.argv[1] == "--serie":
+        main_serie(sys.argv[2:])
+    
     if len(sys.argv) < 2:
         print("📋 Uso: python podcast_brasileiro.py <arquivo> [pasta_saida] [nome_podcast] [episodio]")
+        print("📋 Uso: python podcast_brasileiro.py --serie <episodios...|pasta> [-o pasta] [-n nome] [--apresentadores 'Ana,Bruno']")
         print("📋 Exemplo: python podcast_brasileiro.py podcast.mp3")
         print("📋 Exemplo: python podcast_brasileiro.py podcast.mp3 resultados/ 'Meu Podcast' '001'")
+        print("📋 Exemplo: python podcast_brasileiro.py --serie episodios/ -n 'Meu Podcast' --apresentadores 'Ana,Bruno'")
         sys.exit(1)
     
     arquivo = sys.argv[1]
@@ -178,8 +295,8 @@ def main():
     nome_podcast = sys.argv[3] if len(sys.argv) > 3 else None
     episodio = sys.argv[4] if len(sys.argv) > 4 else None
     
-    sucesso = processar_podcast(arquivo, pasta_saida, nome_podcast, episodio)
-    sys.exit(0 if sucesso else 1)
+    resultado = processar_podcast(arquivo, pasta_saida, nome_podcast, episodio)
+    sys.exit(0 if resultado else 1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -6,11 +6,20 @@ Otimizado para processar grandes volumes de conteúdo brasileiro.
 
 import os
 import sys
-import subprocess
 import time
-import threading
+import argparse
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Adicionar diretório raiz ao path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from transcritor.concurrency import ConcurrencyController, memory_bound_workers
+from transcritor.manifest import Manifest
+from transcritor.report import BatchReport
+from transcritor.staged import bottleneck
+from transcritor.watch import FolderWatcher
+from transcritor.worker_pool import WorkerPool
 
 # Configurações para processamento em lote
 LOTE_CONFIG = {
@@ -24,6 +33,9 @@ LOTE_CONFIG = {
     'PORTUGUESE_POSTPROCESSING': 'true'
 }
 
+# Diário que permite retomar o lote sem reprocessar arquivos concluídos
+ARQUIVO_MANIFESTO = ".manifesto.jsonl"
+
 # Extensões de arquivo suportadas
 EXTENSOES_SUPORTADAS = {
     '.mp3', '.wav', '.m4a', '.flac', '.ogg',  # Áudio
@@ -49,61 +61,45 @@ def encontrar_arquivos(diretorio):
     
     return sorted(arquivos)
 
-def processar_arquivo_unico(arquivo, pasta_saida, progresso_callback=None):
-    """Processa um único arquivo."""
-    
-    nome_arquivo = arquivo.stem
-    pasta_arquivo = Path(pasta_saida) / nome_arquivo
-    pasta_arquivo.mkdir(parents=True, exist_ok=True)
-    
-    # Configurar ambiente
-    env = os.environ.copy()
-    env.update(LOTE_CONFIG)
-    env['OUTPUT_DIR'] = str(pasta_arquivo)
-    env['INPUT_FILE'] = str(arquivo)
+def pasta_do_arquivo(arquivo, diretorio_entrada, pasta_saida):
+    """
+    Pasta de saída de um arquivo: o caminho relativo à entrada, com a extensão.
     
-    inicio = time.time()
+    entrada/a/aula.mp3 e entrada/b/aula.mp3 (ou aula.mp3 e aula.mp4) não
+    podem gravar na mesma pasta e sobrescrever as saídas uma da outra.
+    """
+    raiz = Path(diretorio_entrada)
+    if raiz.is_file():
+        raiz = raiz.parent
+    return Path(pasta_saida) / os.path.relpath(os.path.abspath(arquivo), os.path.abspath(raiz))
+
+def filtrar_pendentes(arquivos, manifesto, verificar_saidas=False):
+    """Separa os arquivos que precisam ser (re)processados segundo o manifesto."""
     
-    try:
-        # Executar transcrição
-        comando = [sys.executable, 'transcrever.py', str(arquivo)]
-        resultado = subprocess.run(comando, env=env, capture_output=True, text=True)
-        
-        fim = time.time()
-        duracao = fim - inicio
-        
-        if resultado.returncode == 0:
-            status = "✅ SUCESSO"
-            erro = None
+    pendentes = []
+    pulados = 0
+    for arquivo in arquivos:
+        precisa, motivo = manifesto.needs_processing(arquivo, verify_outputs=verificar_saidas)
+        if precisa:
+            if motivo != "novo":
+                print(f"🔁 {arquivo.name}: {motivo}, será reprocessado")
+            pendentes.append(arquivo)
         else:
-            status = "❌ ERRO"
-            erro = resultado.stderr
-        
-        if progresso_callback:
-            progresso_callback(arquivo, status, duracao, erro)
-        
-        return {
-            'arquivo': arquivo,
-            'sucesso': resultado.returncode == 0,
-            'duracao': duracao,
-            'erro': erro,
-            'pasta_saida': pasta_arquivo
-        }
-        
-    except Exception as e:
-        if progresso_callback:
-            progresso_callback(arquivo, f"❌ EXCEÇÃO: {e}", time.time() - inicio, str(e))
-        
-        return {
-            'arquivo': arquivo,
-            'sucesso': False,
-            'duracao': time.time() - inicio,
-            'erro': str(e),
-            'pasta_saida': pasta_arquivo
-        }
+            pulados += 1
+    
+    return pendentes, pulados
 
-def processar_lote(diretorio_entrada, pasta_saida, max_workers=2):
-    """Processa múltiplos arquivos em paralelo."""
+def processar_lote(diretorio_entrada, pasta_saida, max_workers=2, forcar=False, verificar_saidas=False,
+                   adaptativo=False, limite_workers=None, em_etapas=True, particionar_cpu=True):
+    """
+    Processa múltiplos arquivos em paralelo, retomando lotes interrompidos.
+    
+    Com `adaptativo`, `max_workers` é só o ponto de partida: o número de
+    workers é ajustado pela vazão medida, até `limite_workers`. Com
+    `em_etapas`, cada worker sobrepõe a decodificação e a gravação de um
+    arquivo com a inferência de outro. Com `particionar_cpu`, cada worker
+    usa um grupo próprio de núcleos.
+    """
     
     arquivos = encontrar_arquivos(diretorio_entrada)
     
@@ -111,8 +107,26 @@ def processar_lote(diretorio_entrada, pasta_saida, max_workers=2):
         print(f"❌ Nenhum arquivo de áudio/vídeo encontrado em: {diretorio_entrada}")
         return []
     
-    print(f"📁 Encontrados {len(arquivos)} arquivo(s) para processar")
-    print(f"⚙️ Usando {max_workers} worker(s) paralelo(s)")
+    print(f"📁 Encontrados {len(arquivos)} arquivo(s)")
+    
+    # Pular arquivos já concluídos e inalterados desde a última execução
+    manifesto = Manifest(Path(pasta_saida) / ARQUIVO_MANIFESTO)
+    if not forcar:
+        arquivos, pulados = filtrar_pendentes(arquivos, manifesto, verificar_saidas)
+        if pulados:
+            print(f"⏭️ {pulados} arquivo(s) já processado(s) e inalterado(s), pulando")
+        if not arquivos:
+            print("✅ Nada a fazer: todos os arquivos já foram processados")
+            return []
+    
+    if adaptativo and limite_workers is None:
+        # Cada worker tem os próprios modelos: o limite vem da memória, não dos núcleos
+        limite_workers = max(max_workers, memory_bound_workers(LOTE_CONFIG['WHISPER_MODEL']))
+    
+    print(f"📁 {len(arquivos)} arquivo(s) para processar")
+    print(f"⚙️ Usando {max_workers} worker(s) paralelo(s) com modelos carregados uma vez")
+    if adaptativo:
+        print(f"🎚️ Concorrência adaptativa ativada (limite: {limite_workers} workers)")
     print(f"📂 Resultados serão salvos em: {pasta_saida}")
     print("=" * 60)
     
@@ -143,21 +157,46 @@ def processar_lote(diretorio_entrada, pasta_saida, max_workers=2):
         if erro and "ERRO" in status:
             print(f"    💡 Erro: {erro[:100]}...")
     
-    # Processamento paralelo
+    # Processamento paralelo: cada worker carrega os modelos uma única vez
     resultados = []
     inicio_total = time.time()
+    controlador = ConcurrencyController(max_workers, max_workers=limite_workers) if adaptativo else None
+    relatorio = BatchReport(pasta_saida)
     
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submeter tarefas
-        futures = {
-            executor.submit(processar_arquivo_unico, arquivo, pasta_saida, callback_progresso): arquivo
-            for arquivo in arquivos
-        }
+    with WorkerPool(max_workers, env=LOTE_CONFIG, staged=em_etapas, cpu_partition=particionar_cpu) as pool:
+        for arquivo in arquivos:
+            pool.submit(arquivo, pasta_do_arquivo(arquivo, diretorio_entrada, pasta_saida))
         
-        # Coletar resultados
-        for future in as_completed(futures):
-            resultado = future.result()
+        # Coletar resultados conforme os arquivos terminam
+        for mensagem in pool.results():
+            resultado = {
+                'arquivo': Path(mensagem['path']),
+                'sucesso': mensagem['sucesso'],
+                'duracao': mensagem['duracao'],
+                'erro': mensagem['erro'],
+                'pasta_saida': Path(mensagem['output_dir']),
+                'tempos': mensagem.get('timings', {})
+            }
+            registrar_resultado(mensagem, manifesto, relatorio)
+            status = "✅ SUCESSO" if resultado['sucesso'] else "❌ ERRO"
+            callback_progresso(resultado['arquivo'], status, resultado['duracao'], resultado['erro'])
             resultados.append(resultado)
+            
+            # Ajustar o número de workers pela vazão (segundos de áudio por segundo)
+            if controlador:
+                controlador.record(mensagem['audio_seconds'])
+                novo_limite = controlador.update()
+                if novo_limite > pool.num_workers:
+                    # Não abrir workers sem arquivo para pegar; o controlador
+                    # passa a medir com o número realmente aplicado
+                    novo_limite = max(pool.num_workers, min(novo_limite, pool.pending))
+                    controlador.applied(novo_limite)
+                if novo_limite != pool.num_workers:
+                    pool.resize(novo_limite)
+        
+        etapas = pool.stage_stats()
+    
+    manifesto.compact()
     
     # Relatório final
     fim_total = time.time()
@@ -173,11 +212,106 @@ def processar_lote(diretorio_entrada, pasta_saida, max_workers=2):
     print(f"⚡ Tempo médio por arquivo: {duracao_total/len(arquivos):.1f}s")
     print(f"📂 Resultados em: {pasta_saida}")
     
+    if etapas:
+        mostrar_etapas(etapas)
+    
+    resumo = relatorio.finish(workers=max_workers, em_etapas=em_etapas, etapas=etapas)
+    mostrar_resumo(resumo, relatorio)
+    
     # Gerar relatório detalhado
     gerar_relatorio(resultados, pasta_saida)
     
     return resultados
 
+def registrar_resultado(mensagem, manifesto, relatorio):
+    """Registra um arquivo concluído no relatório e no manifesto."""
+    
+    relatorio.add(mensagem)
+    manifesto.record(
+        mensagem['path'],
+        "completed" if mensagem['sucesso'] else "failed",
+        output_dir=mensagem['output_dir'],
+        error=mensagem['erro'],
+        outputs=mensagem.get('outputs', [])
+    )
+
+def observar_pasta(diretorio_entrada, pasta_saida, max_workers=2, intervalo=2.0,
+                   espera_estavel=5.0, em_etapas=True, particionar_cpu=True):
+    """
+    Modo contínuo (hot folder): transcreve arquivos conforme chegam.
+    
+    Os workers ficam com os modelos carregados; a pasta é verificada a
+    cada `intervalo` segundos e um arquivo só entra na fila depois que o
+    tamanho fica estável por `espera_estavel` segundos. Arquivos já
+    concluídos (manifesto) não são reprocessados ao reiniciar.
+    """
+    
+    Path(pasta_saida).mkdir(parents=True, exist_ok=True)
+    manifesto = Manifest(Path(pasta_saida) / ARQUIVO_MANIFESTO)
+    relatorio = BatchReport(pasta_saida)
+    observador = FolderWatcher(
+        diretorio_entrada, EXTENSOES_SUPORTADAS, espera_estavel,
+        exclude=[pasta_saida]  # a saída pode estar dentro da pasta observada
+    )
+    
+    print(f"👀 Observando {diretorio_entrada} (Ctrl+C para encerrar)")
+    print(f"⚙️ {max_workers} worker(s) com modelos carregados; resultados em {pasta_saida}")
+    
+    processados = 0
+    with WorkerPool(max_workers, env=LOTE_CONFIG, staged=em_etapas, cpu_partition=particionar_cpu) as pool:
+        try:
+            while True:
+                for caminho in observador.poll():
+                    arquivo = Path(caminho)
+                    precisa, motivo = manifesto.needs_processing(arquivo)
+                    if not precisa:
+                        continue
+                    print(f"📥 {arquivo.name} ({motivo})")
+                    pool.submit(arquivo, pasta_do_arquivo(arquivo, diretorio_entrada, pasta_saida))
+                
+                for mensagem in pool.results(block_until_empty=False):
+                    processados += 1
+                    registrar_resultado(mensagem, manifesto, relatorio)
+                    status = "✅ SUCESSO" if mensagem['sucesso'] else "❌ ERRO"
+                    print(f"[{processados}] {Path(mensagem['path']).name} - {status} "
+                          f"({mensagem['duracao']:.1f}s, {pool.pending} na fila)")
+                
+                time.sleep(intervalo)
+        except KeyboardInterrupt:
+            print(f"\n⏹️ Encerrando; aguardando {pool.pending} arquivo(s) em andamento...")
+            for mensagem in pool.results():
+                registrar_resultado(mensagem, manifesto, relatorio)
+    
+    manifesto.compact()
+    resumo = relatorio.finish(workers=max_workers, em_etapas=em_etapas, modo="observar")
+    mostrar_resumo(resumo, relatorio)
+
+def mostrar_etapas(etapas):
+    """Mostra a utilização de cada etapa do pipeline e aponta o gargalo."""
+    
+    gargalo = bottleneck(etapas)
+    print("🚰 Utilização por etapa:")
+    for nome, dados in etapas.items():
+        marca = " ⬅️ gargalo" if nome == gargalo else ""
+        print(f"   {nome:<14} {dados['utilization']:>6.1%}  "
+              f"ocupada {dados['busy_seconds']:.1f}s, bloqueada {dados['blocked_seconds']:.1f}s{marca}")
+
+def mostrar_resumo(resumo, relatorio):
+    """Mostra os percentis e a vazão do lote."""
+    
+    latencia = resumo['latency_seconds']
+    if latencia['p50'] is not None:
+        print(f"⏱️ Latência por arquivo: p50 {latencia['p50']:.1f}s, "
+              f"p95 {latencia['p95']:.1f}s, p99 {latencia['p99']:.1f}s")
+    if resumo['audio_hours_per_wall_hour']:
+        print(f"🚀 Vazão: {resumo['audio_hours_per_wall_hour']:.2f} horas de áudio por hora")
+    if resumo['escalated_ratio'] is not None:
+        print(f"🎯 Áudio escalado ao modelo principal: {resumo['escalated_ratio']:.1%}")
+    for lento in resumo['slowest'][:3]:
+        print(f"   🐢 {Path(lento['file']).name}: {lento['wall_seconds']:.1f}s")
+    print(f"📈 Registros por arquivo: {relatorio.jsonl_path} / {relatorio.csv_path}")
+    print(f"📈 Resumo da execução {resumo['run_id']}: {relatorio.summary_path}")
+
 def gerar_relatorio(resultados, pasta_saida):
     """Gera relatório detalhado do processamento em lote."""
     
@@ -201,6 +335,9 @@ def gerar_relatorio(resultados, pasta_saida):
             f.write(f"   Status: {status}\n")
             f.write(f"   Duração: {resultado['duracao']:.1f}s\n")
             f.write(f"   Pasta: {resultado['pasta_saida']}\n")
+            if resultado['tempos']:
+                etapas = ", ".join(f"{nome} {valor:.1f}s" for nome, valor in resultado['tempos'].items())
+                f.write(f"   Etapas: {etapas}\n")
             
             if resultado['erro']:
                 f.write(f"   Erro: {resultado['erro']}\n")
@@ -210,22 +347,75 @@ def gerar_relatorio(resultados, pasta_saida):
 def main():
     """Função principal para execução via linha de comando."""
     
-    if len(sys.argv) < 2:
-        print("📋 Uso: python processar_lote.py <diretorio_entrada> [pasta_saida] [workers]")
-        print("📋 Exemplo: python processar_lote.py audios/")
-        print("📋 Exemplo: python processar_lote.py videos/ resultados/ 4")
-        print("📋 Exemplo: python processar_lote.py arquivo.mp4 resultados/")
+    parser = argparse.ArgumentParser(
+        description="Processamento em lote de arquivos de áudio/vídeo",
+        epilog=(
+            "Exemplos:\n"
+            "  python processar_lote.py audios/\n"
+            "  python processar_lote.py videos/ resultados/ 4\n"
+            "  python processar_lote.py arquivo.mp4 resultados/\n"
+            "  python processar_lote.py audios/ resultados/ --forcar\n"
+            "  python processar_lote.py audios/ resultados/ 2 --adaptativo\n"
+            "  python processar_lote.py entrada/ resultados/ 2 --observar"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("diretorio_entrada", help="Arquivo ou diretório de entrada")
+    parser.add_argument("pasta_saida", nargs="?", default="output/lote", help="Pasta de saída")
+    parser.add_argument("workers", nargs="?", type=int, default=2, help="Número de workers")
+    parser.add_argument("--adaptativo", action="store_true",
+                        help="Ajustar o número de workers automaticamente pela vazão")
+    parser.add_argument("--limite-workers", type=int, default=None,
+                        help="Máximo de workers no modo adaptativo (padrão: quantos modelos "
+                             "cabem na memória disponível, até o número de núcleos)")
+    parser.add_argument("--observar", "--watch", action="store_true",
+                        help="Modo contínuo: processar arquivos conforme chegam na pasta")
+    parser.add_argument("--intervalo", type=float, default=2.0,
+                        help="Segundos entre verificações no modo --observar")
+    parser.add_argument("--espera-estavel", type=float, default=5.0,
+                        help="Segundos com tamanho estável antes de processar um arquivo novo")
+    parser.add_argument("--compute-type", choices=["float32", "float16", "int8"], default=None,
+                        help="Precisão da inferência nos workers (int8: quantização na CPU)")
+    parser.add_argument("--modelo-rascunho", default=None, metavar="MODELO",
+                        help="Transcrição em duas passadas: rascunho com este modelo (ex.: tiny) e "
+                             "o modelo do lote só nos trechos de baixa confiança")
+    parser.add_argument("--sem-particao-cpu", action="store_true",
+                        help="Não dividir os núcleos entre os workers (cada um usa todos)")
+    parser.add_argument("--sequencial", action="store_true",
+                        help="Processar cada arquivo do início ao fim, sem sobrepor etapas")
+    parser.add_argument("--forcar", action="store_true",
+                        help="Reprocessar todos os arquivos, ignorando o manifesto")
+    parser.add_argument("--verificar-saidas", action="store_true",
+                        help="Conferir o checksum das saídas antes de pular um arquivo")
+    args = parser.parse_args()
+    
+    if not os.path.exists(args.diretorio_entrada):
+        print(f"❌ Diretório não encontrado: {args.diretorio_entrada}")
         sys.exit(1)
     
-    diretorio_entrada = sys.argv[1]
-    pasta_saida = sys.argv[2] if len(sys.argv) > 2 else "output/lote"
-    max_workers = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+    if args.compute_type:
+        LOTE_CONFIG['COMPUTE_TYPE'] = args.compute_type
     
-    if not os.path.exists(diretorio_entrada):
-        print(f"❌ Diretório não encontrado: {diretorio_entrada}")
-        sys.exit(1)
+    if args.modelo_rascunho:
+        LOTE_CONFIG['DRAFT_MODEL'] = args.modelo_rascunho
+    
+    if args.observar:
+        if not os.path.isdir(args.diretorio_entrada):
+            print(f"❌ --observar exige um diretório: {args.diretorio_entrada}")
+            sys.exit(1)
+        observar_pasta(
+            args.diretorio_entrada, args.pasta_saida, args.workers,
+            intervalo=args.intervalo, espera_estavel=args.espera_estavel,
+            em_etapas=not args.sequencial, particionar_cpu=not args.sem_particao_cpu
+        )
+        return
     
-    resultados = processar_lote(diretorio_entrada, pasta_saida, max_workers)
+    resultados = processar_lote(
+        args.diretorio_entrada, args.pasta_saida, args.workers,
+        forcar=args.forcar, verificar_saidas=args.verificar_saidas,
+        adaptativo=args.adaptativo, limite_workers=args.limite_workers,
+        em_etapas=not args.sequencial, particionar_cpu=not args.sem_particao_cpu
+    )
     
     # Código de saída baseado nos resultados
     erros = sum(1 for r in resultados if not r['sucesso'])
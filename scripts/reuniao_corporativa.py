@@ -6,35 +6,30 @@ Configurado para detectar múltiplos oradores e gerar relatórios estruturados.
 
 import os
 import sys
-import subprocess
 from pathlib import Path
 
-# Configurações específicas para reuniões corporativas
-REUNIAO_CONFIG = {
-    'WHISPER_MODEL': 'medium',
-    'OUTPUT_FORMAT': 'txt,json,srt',
-    'NUM_SPEAKERS': 'auto',
-    'MIN_SPEAKERS': '2',
-    'MAX_SPEAKERS': '8',
-    'CORPORATE_MODE': 'true',
-    'VERBOSE_LOGGING': 'true',
-    'CONFIDENCE_THRESHOLD': '0.7',
-    'AUTO_NORMALIZE_VOLUME': 'true',
-    'PORTUGUESE_POSTPROCESSING': 'true'
-}
+# Adicionar o diretório raiz ao path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
 
-def processar_reuniao(arquivo_entrada, pasta_saida=None):
+from transcritor.presets import REUNIAO
+
+def processar_reuniao(arquivo_entrada, pasta_saida=None, pipeline=None):
     """
     Processa um arquivo de reunião com configurações otimizadas.
     
     Args:
         arquivo_entrada (str): Caminho para o arquivo de áudio/vídeo
         pasta_saida (str): Pasta de destino para os resultados
+        pipeline (transcrever.Pipeline): Pipeline já carregado (opcional)
+
+    Returns:
+        TranscriptionResult ou None em caso de erro
     """
     
     if not os.path.exists(arquivo_entrada):
         print(f"❌ Arquivo não encontrado: {arquivo_entrada}")
-        return False
+        return None
     
     # Configurar pasta de saída
     if pasta_saida is None:
@@ -43,33 +38,24 @@ def processar_reuniao(arquivo_entrada, pasta_saida=None):
     
     os.makedirs(pasta_saida, exist_ok=True)
     
-    # Aplicar configurações
-    env = os.environ.copy()
-    env.update(REUNIAO_CONFIG)
-    env['OUTPUT_DIR'] = pasta_saida
-    
     print(f"🎙️ Processando reunião: {arquivo_entrada}")
     print(f"📁 Resultado será salvo em: {pasta_saida}")
-    print("⚙️ Configurações: Reunião Corporativa")
+    print(f"⚙️ Configurações: {REUNIAO.description}")
     print("👥 Detectando múltiplos oradores automaticamente...")
     
-    # Executar transcrição
-    comando = [sys.executable, 'transcrever.py', arquivo_entrada]
-    
     try:
-        resultado = subprocess.run(comando, env=env, capture_output=True, text=True)
-        
-        if resultado.returncode == 0:
-            print("✅ Reunião processada com sucesso!")
-            print(f"📊 Verifique os resultados em: {pasta_saida}")
-            return True
-        else:
-            print(f"❌ Erro no processamento: {resultado.stderr}")
-            return False
-            
+        if pipeline is None:
+            from transcrever import Pipeline
+            pipeline = Pipeline(preset=REUNIAO)
+        resultado = pipeline.run(arquivo_entrada, output_dir=pasta_saida)
     except Exception as e:
-        print(f"❌ Erro inesperado: {e}")
-        return False
+        print(f"❌ Erro no processamento: {e}")
+        return None
+    
+    print("✅ Reunião processada com sucesso!")
+    print(f"👥 Oradores identificados: {len(resultado.speakers)}")
+    print(f"📊 Verifique os resultados em: {pasta_saida}")
+    return resultado
 
 def main():
     """Função principal para execução via linha de comando."""
@@ -83,8 +69,8 @@ def main():
     arquivo = sys.argv[1]
     pasta_saida = sys.argv[2] if len(sys.argv) > 2 else None
     
-    sucesso = processar_reuniao(arquivo, pasta_saida)
-    sys.exit(0 if sucesso else 1)
+    resultado = processar_reuniao(arquivo, pasta_saida)
+    sys.exit(0 if resultado else 1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,11 +1,12 @@
-import whisper
-import torch
-from pyannote.audio import Pipeline
+import numpy as np
 import subprocess
 import os
+import time
+import threading
 import datetime
-import json
 import argparse
+from contextlib import nullcontext
+from dataclasses import dataclass, field
 from pathlib import Path
 from dotenv import load_dotenv
 from rich.console import Console
@@ -13,6 +14,18 @@ from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.panel import Panel
 from rich.table import Table
 
+from transcritor.asr import ASRBackend, BACKENDS, DEFAULT_BACKEND, load_backend
+from transcritor.cpu import apply_cpu_profile, apply_pending_threads
+from transcritor.dag import Node, StageCache, StageGraph
+from transcritor.export import RENDERERS, render
+from transcritor.manifest import file_sha256
+from transcritor import pcm
+from transcritor.presets import get_preset
+from transcritor.speaker_index import SpeakerIndex
+from transcritor.speculative import DEFAULT_LOGPROB_THRESHOLD, DEFAULT_NO_SPEECH_THRESHOLD, refine
+from transcritor.staged import Stage
+from transcritor.vad import detect_speech, keep_speech, remap_segments, speech_report
+
 # Carregar variáveis de ambiente
 load_dotenv()
 
@@ -23,62 +36,415 @@ HF_TOKEN = os.getenv("HF_TOKEN")
 INPUT_FILE = os.getenv("INPUT_FILE", "exemplo.mp4")
 WHISPER_MODEL = os.getenv("WHISPER_MODEL", "medium")
 WHISPER_LANGUAGE = os.getenv("WHISPER_LANGUAGE", "pt")
+ASR_BACKEND = os.getenv("ASR_BACKEND", DEFAULT_BACKEND)
+COMPUTE_TYPE = os.getenv("COMPUTE_TYPE", "")
+QUANTIZED_CACHE_DIR = os.getenv("QUANTIZED_CACHE_DIR", "")
+DRAFT_MODEL = os.getenv("DRAFT_MODEL", "")
+ESCALATION_LOGPROB = float(os.getenv("ESCALATION_LOGPROB", str(DEFAULT_LOGPROB_THRESHOLD)))
+ESCALATION_NO_SPEECH = float(os.getenv("ESCALATION_NO_SPEECH", str(DEFAULT_NO_SPEECH_THRESHOLD)))
 OUTPUT_FORMAT = os.getenv("OUTPUT_FORMAT", "txt")
 OUTPUT_DIR = os.getenv("OUTPUT_DIR", "output")
 USE_GPU = os.getenv("USE_GPU", "true").lower() == "true"
 NUM_SPEAKERS = os.getenv("NUM_SPEAKERS", "auto")
+MIN_SPEAKERS = os.getenv("MIN_SPEAKERS", "")
+MAX_SPEAKERS = os.getenv("MAX_SPEAKERS", "")
+DETECT_SINGLE_SPEAKER = os.getenv("DETECT_SINGLE_SPEAKER", "false").lower() == "true"
+SINGLE_SPEAKER_THRESHOLD = float(os.getenv("SINGLE_SPEAKER_THRESHOLD", "0.6"))
+SPEAKER_INDEX = os.getenv("SPEAKER_INDEX", "")
+SPEAKER_MATCH_THRESHOLD = float(os.getenv("SPEAKER_MATCH_THRESHOLD", "0.5"))
+REMOVE_SILENCE = os.getenv("REMOVE_SILENCE", "false").lower() == "true"
 AUDIO_SAMPLE_RATE = int(os.getenv("AUDIO_SAMPLE_RATE", "16000"))
 AUDIO_CHANNELS = int(os.getenv("AUDIO_CHANNELS", "1"))
+STAGE_CACHE_DIR = os.getenv("STAGE_CACHE_DIR", "")
+PCM_WORK_DIR = os.getenv("PCM_WORK_DIR", "")
+ASR_WINDOW_SECONDS = float(os.getenv("ASR_WINDOW_SECONDS", "600"))
 
 # --- FIM DAS CONFIGURAÇÕES ---
 
+# Taxa de amostragem fixa do Whisper (whisper.audio.SAMPLE_RATE)
+SAMPLE_RATE = 16000
+
+# Modelo do pyannote carregado por load_diarization_pipeline
+DIARIZATION_MODEL = "pyannote/speaker-diarization-3.1"
+
+# whisper, torch e pyannote levam segundos para importar: são carregados
+# só pelas etapas que precisam deles, para que --help, erros de argumento
+# e a API respondam sem esperar a importação.
+def _torch():
+    """Importar o torch (e aplicar o ajuste de threads pendente)."""
+    import torch
+    apply_pending_threads()
+    return torch
+
+def _device():
+    """Dispositivo de inferência: cuda se USE_GPU e houver GPU."""
+    return "cuda" if USE_GPU and _torch().cuda.is_available() else "cpu"
+
 def format_timestamp(seconds):
     """Converte segundos para o formato HH:MM:SS."""
     td = datetime.timedelta(seconds=seconds)
     return str(td).split(".")[0]
 
-def transcribe_with_diarization(audio_path):
+def _speaker_count(value):
+    """Converter NUM/MIN/MAX_SPEAKERS em inteiro (None para auto ou vazio)."""
+    if value in (None, "", "auto"):
+        return None
+    return int(value)
+
+def speaker_bounds(num_speakers=None, min_speakers=None, max_speakers=None):
     """
-    Transcreve um arquivo de áudio e identifica os oradores.
+    Limites de oradores para o pyannote.
+
+    Valores omitidos vêm de NUM_SPEAKERS, MIN_SPEAKERS e MAX_SPEAKERS; um
+    número exato tem precedência sobre a faixa.
     """
-    # 1. Carregar modelos
-    print("Carregando modelo Whisper...")
-    # Use 'medium' para um bom balanço, ou 'large-v2' para máxima qualidade.
-    whisper_model = whisper.load_model("medium") 
-    
-    print("Carregando pipeline de diarização...")
-    diarization_pipeline = Pipeline.from_pretrained(
-        "pyannote/speaker-diarization-3.1",
+    num_speakers = _speaker_count(num_speakers if num_speakers is not None else NUM_SPEAKERS)
+    if num_speakers:
+        return {"num_speakers": num_speakers}
+    bounds = {
+        "min_speakers": _speaker_count(min_speakers if min_speakers is not None else MIN_SPEAKERS),
+        "max_speakers": _speaker_count(max_speakers if max_speakers is not None else MAX_SPEAKERS)
+    }
+    return {key: value for key, value in bounds.items() if value}
+
+def load_whisper_model(model_name=None, compute_type=None):
+    """
+    Carrega um modelo Whisper (padrão: WHISPER_MODEL do .env).
+
+    Com `compute_type` "int8" (padrão: COMPUTE_TYPE), as camadas lineares
+    são quantizadas para int8 e o resultado fica em cache no disco
+    (QUANTIZED_CACHE_DIR). A quantização dinâmica só existe na CPU: com
+    GPU, o modelo é carregado normalmente.
+    """
+    import whisper
+
+    device = _device()
+    model_name = model_name or WHISPER_MODEL
+    if (compute_type or COMPUTE_TYPE) == "int8":
+        if device == "cpu":
+            from transcritor.quantization import load_quantized_whisper
+            return load_quantized_whisper(model_name, QUANTIZED_CACHE_DIR or None)
+        print("Quantização int8 disponível só na CPU; usando o modelo em float16 na GPU.")
+    return whisper.load_model(model_name, device=device)
+
+def load_asr_model(model_name=None, backend=None, compute_type=None):
+    """
+    Carrega o modelo de ASR com o backend escolhido (padrão: ASR_BACKEND).
+
+    O backend "whisper" retorna o modelo do openai-whisper (compatível com
+    o BatchingInferenceServer); os demais retornam um transcritor.asr.ASRBackend.
+    """
+    backend = backend or ASR_BACKEND
+    compute_type = compute_type or COMPUTE_TYPE or None
+    if backend == DEFAULT_BACKEND:
+        return load_whisper_model(model_name, compute_type)
+    return load_backend(backend, model_name or WHISPER_MODEL, device=_device(), compute_type=compute_type)
+
+def load_draft_model(model_name, backend=None, compute_type=None):
+    """
+    Modelo de rascunho da transcrição em duas passadas.
+
+    Fica em cache no processo (shared_model): é pequeno e reaproveitado por
+    todos os arquivos, mesmo quando o modelo principal vem de fora.
+    """
+    backend = backend or ASR_BACKEND
+    compute_type = compute_type or COMPUTE_TYPE
+
+    def loader():
+        print(f"Carregando modelo de rascunho ({model_name})...")
+        return load_asr_model(model_name, backend, compute_type)
+
+    return shared_model(("asr", backend, model_name, compute_type), loader)
+
+def resolve_draft_model(draft_model=None, backend=None):
+    """Modelo de rascunho a usar: None → DRAFT_MODEL; nome → carregado; "" → nenhum."""
+    if draft_model is None:
+        draft_model = DRAFT_MODEL
+    if isinstance(draft_model, str):
+        if not draft_model:
+            return None
+        return load_draft_model(draft_model, backend)
+    return draft_model
+
+def load_diarization_pipeline(compute_type=None):
+    """
+    Carrega o pipeline de diarização do pyannote.
+
+    Com `compute_type` "int8" (padrão: COMPUTE_TYPE) na CPU, os modelos de
+    segmentação e de embeddings são quantizados onde possível.
+    """
+    from pyannote.audio import Pipeline as PyannotePipeline
+
+    torch = _torch()
+    diarization_pipeline = PyannotePipeline.from_pretrained(
+        DIARIZATION_MODEL,
         use_auth_token=HF_TOKEN
     )
     # Mover o pipeline para a GPU se disponível
-    if torch.cuda.is_available():
-        diarization_pipeline = diarization_pipeline.to("cuda")
+    if _device() == "cuda":
+        diarization_pipeline = diarization_pipeline.to(torch.device("cuda"))
         print("Pipeline de diarização movido para a GPU.")
+    elif (compute_type or COMPUTE_TYPE) == "int8":
+        from transcritor.quantization import quantize_diarization
+        if quantize_diarization(diarization_pipeline):
+            print("Pipeline de diarização quantizado (int8).")
+    return diarization_pipeline
+
+def new_job(audio_path, language=None, vad=None, num_speakers=None, min_speakers=None,
+            max_speakers=None, **extra):
+    """
+    Estado de um arquivo ao longo das etapas de transcrição.
+
+    Cada etapa (decode, vad, diarization, transcription, alignment) lê e
+    grava chaves deste dict e registra seu tempo em `timings`, de modo que
+    as etapas podem rodar como grafo com cache (pipeline_graph, usado por
+    transcribe_segments) ou em um pipeline com filas entre etapas
+    (transcritor.staged).
+    """
+    return {
+        "audio_path": audio_path,
+        "language": language or WHISPER_LANGUAGE,
+        "vad": REMOVE_SILENCE if vad is None else vad,
+        "speaker_bounds": speaker_bounds(num_speakers, min_speakers, max_speakers),
+        "timings": {},
+        **extra
+    }
+
+def decode_stage(job):
+    """
+    Decodificar o áudio (ffmpeg) para PCM mono 16 kHz.
+
+    O PCM fica em um arquivo mapeado em memória no diretório de trabalho
+    do job (job["work_dir"], PCM_WORK_DIR ou o temporário do sistema): as
+    etapas leem janelas dele, e a memória de cada worker não cresce com a
+    duração da gravação.
+    """
+    inicio = time.perf_counter()
+    audio = pcm.decode(job["audio_path"], job.get("work_dir") or PCM_WORK_DIR or None, SAMPLE_RATE)
+    job["audio"] = audio
+    job["speech_audio"] = audio
+    job["audio_seconds"] = len(audio) / SAMPLE_RATE
+    job["timings"]["decode"] = time.perf_counter() - inicio
+
+def vad_stage(job):
+    """Manter só as regiões de fala para o Whisper (quando o VAD está ativo)."""
+    if not job["vad"]:
+        job["speech_regions"] = None
+        job["time_map"] = None
+        return
+    print("Removendo silêncio e música (VAD)...")
+    inicio = time.perf_counter()
+    job["speech_regions"] = detect_speech(job["audio"], SAMPLE_RATE)
+    job["speech_audio"], job["time_map"] = keep_speech(
+        job["audio"], job["speech_regions"], SAMPLE_RATE,
+        mapped=True, work_dir=job.get("work_dir") or PCM_WORK_DIR or None
+    )
+    job["timings"]["vad"] = time.perf_counter() - inicio
+
+def detect_single_speaker(job, diarization_pipeline, windows=12, window_seconds=3.0):
+    """
+    Verificar, de forma barata, se a gravação tem um único orador.
 
-    # 2. Processo de Diarização
+    Calcula o embedding de algumas janelas de fala espalhadas pelo áudio
+    com o modelo de embeddings do próprio pipeline (em vez de segmentar e
+    agrupar o áudio inteiro) e exige similaridade mínima entre todos os
+    pares. Na dúvida (pouca fala, erro, pipeline sem o modelo de
+    embeddings), retorna False e a diarização completa é executada.
+
+    A amostra pode não pegar falas curtas de outra pessoa, que então
+    ficam com SPEAKER_00: por isso só é usada com DETECT_SINGLE_SPEAKER.
+    """
+    # Atributo interno do pyannote.audio 3.x: sem ele, diarização completa
+    embed = getattr(diarization_pipeline, "_embedding", None)
+    if not callable(embed):
+        print("Detecção de orador único indisponível nesta versão do pyannote")
+        return False
+
+    sample_rate = SAMPLE_RATE
+    regions = job.get("speech_regions") or detect_speech(job["audio"], sample_rate)
+    starts = [
+        start + offset
+        for start, end in regions
+        for offset in range(0, int(end - start - window_seconds) + 1, int(window_seconds))
+    ]
+    if len(starts) < windows:
+        return False
+
+    # Janelas igualmente espaçadas ao longo da gravação
+    chosen = [starts[int(i * (len(starts) - 1) / (windows - 1))] for i in range(windows)]
+    length = int(window_seconds * sample_rate)
+    batch = np.stack([job["audio"][int(t * sample_rate):int(t * sample_rate) + length] for t in chosen])
+    try:
+        embeddings = embed(_torch().from_numpy(batch).unsqueeze(1))
+    except Exception as e:
+        print(f"Detecção de orador único indisponível: {e}")
+        return False
+
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if not np.isfinite(embeddings).all():
+        return False
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return float((embeddings @ embeddings.T).min()) >= SINGLE_SPEAKER_THRESHOLD
+
+def diarization_stage(job, diarization_pipeline, speaker_index=None, speaker_embeddings=None):
+    """
+    Identificar os turnos de cada orador no áudio completo.
+
+    Os limites de oradores do job (num/min/max) são repassados ao pyannote.
+    Com um único orador, conhecido (num ou max = 1) ou detectado (só com
+    DETECT_SINGLE_SPEAKER), a segmentação e o agrupamento são pulados:
+    todos os segmentos ficam com SPEAKER_00. O atalho não é usado quando
+    embeddings são pedidos (índice de oradores ou cadastro).
+    """
     print("Identificando os oradores (diarização)...")
-    diarization = diarization_pipeline(audio_path, num_speakers=None) # Deixe num_speakers=None para detectar automaticamente
+    inicio = time.perf_counter()
+    bounds = job["speaker_bounds"]
+    want_embeddings = speaker_index is not None or speaker_embeddings is not None
 
-    # 3. Processo de Transcrição
-    print("Transcrevendo o áudio com Whisper...")
+    if not want_embeddings:
+        single = bounds.get("num_speakers") == 1 or bounds.get("max_speakers") == 1
+        may_detect = (
+            DETECT_SINGLE_SPEAKER
+            and not bounds.get("num_speakers")
+            and (bounds.get("min_speakers") or 1) <= 1
+        )
+        detected = not single and may_detect and detect_single_speaker(job, diarization_pipeline)
+        if single or detected:
+            print("Orador único: diarização completa dispensada")
+            if detected:
+                print("⚠️ Orador único detectado por amostragem: falas curtas de outra pessoa "
+                      "ficam com SPEAKER_00 (DETECT_SINGLE_SPEAKER=false para diarizar tudo)")
+            job["diarization"] = None
+            job["single_speaker"] = "SPEAKER_00"
+            job["timings"]["diarization"] = time.perf_counter() - inicio
+            return
+
+    # O áudio já decodificado é reaproveitado (sem ler o arquivo de novo);
+    # o tensor compartilha as páginas do arquivo mapeado, e o pyannote o
+    # percorre em janelas deslizantes
+    waveform = {
+        "waveform": _torch().from_numpy(job["audio"]).unsqueeze(0),
+        "sample_rate": SAMPLE_RATE
+    }
+    diarization = diarization_pipeline(
+        waveform,
+        return_embeddings=want_embeddings,
+        **bounds
+    )
+    if want_embeddings:
+        diarization, embeddings = diarization
+        labels = diarization.labels()
+        if speaker_index is not None and len(speaker_index):
+            print("Identificando oradores cadastrados...")
+            mapping = speaker_index.resolve_labels(labels, embeddings, SPEAKER_MATCH_THRESHOLD)
+            diarization = diarization.rename_labels(mapping)
+            labels = [mapping[label] for label in labels]
+        if speaker_embeddings is not None:
+            speaker_embeddings.update(zip(labels, embeddings))
+    job["diarization"] = diarization
+    job["timings"]["diarization"] = time.perf_counter() - inicio
+
+def run_asr(audio, language, whisper_model=None, asr_server=None, prompt=None):
+    """
+    Segmentos no formato do Whisper para `audio`, com o modelo ou o servidor de lote.
+
+    `prompt` (texto anterior, usado no streaming) condiciona o decodificador
+    do openai-whisper; os outros caminhos o ignoram. Áudios mais longos que
+    ASR_WINDOW_SECONDS são transcritos em janelas cortadas em pausas, cada
+    uma condicionada no texto da anterior: o Whisper monta o espectrograma
+    do áudio inteiro, e só a janela atual é copiada do arquivo mapeado.
+    """
+    if not len(audio):
+        return []
+    if asr_server is not None:
+        from transcritor.batching import transcribe_batched
+        return transcribe_batched(asr_server, audio, language)
+
+    segments = []
+    for start, end in pcm.split_windows(audio, SAMPLE_RATE, ASR_WINDOW_SECONDS):
+        offset = start / SAMPLE_RATE
+        window_segments = _run_asr_window(np.array(audio[start:end]), language, whisper_model, prompt)
+        for segment in window_segments:
+            segment["start"] += offset
+            segment["end"] += offset
+            for word in segment.get("words") or []:
+                word["start"] += offset
+                word["end"] += offset
+        segments.extend(window_segments)
+        prompt = " ".join(segment["text"].strip() for segment in window_segments)[-200:] or prompt
+    return segments
+
+def _run_asr_window(audio, language, whisper_model, prompt=None):
+    if isinstance(whisper_model, ASRBackend):
+        return whisper_model.transcribe(audio, language)
     # Transcrever com timestamps de palavras para maior precisão no mapeamento
-    transcription_result = whisper_model.transcribe(audio_path, word_timestamps=True)
+    return whisper_model.transcribe(
+        audio, language=language, word_timestamps=True, initial_prompt=prompt or None
+    )["segments"]
+
+def transcription_stage(job, whisper_model=None, asr_server=None, draft_model=None):
+    """
+    Transcrever o áudio de fala com Whisper ou outro backend de ASR.
 
-    # 4. Mapeamento dos Oradores com o Texto
+    Com `draft_model`, o áudio inteiro é transcrito primeiro por esse modelo
+    rápido e só os trechos de baixa confiança (ESCALATION_LOGPROB,
+    ESCALATION_NO_SPEECH) voltam ao modelo principal; o relatório da
+    escalada fica em job["speculative"].
+    """
+    print("Transcrevendo o áudio com Whisper...")
+    inicio = time.perf_counter()
+    audio = job["speech_audio"]
+    language = job["language"]
+    if draft_model is None:
+        segments = run_asr(audio, language, whisper_model, asr_server)
+    else:
+        with model_lock(draft_model):
+            draft = run_asr(audio, language, draft_model)
+        segments, report = refine(
+            draft, audio,
+            lambda region: run_asr(region, language, whisper_model, asr_server),
+            SAMPLE_RATE, ESCALATION_LOGPROB, ESCALATION_NO_SPEECH
+        )
+        print(
+            f"Rascunho: {report['escalated_ratio']:.0%} do áudio escalado ao modelo principal "
+            f"({report['escalated_segments']}/{report['draft_segments']} segmentos)"
+        )
+        job["speculative"] = report
+    job["asr_segments"] = segments
+    job["timings"]["transcription"] = time.perf_counter() - inicio
+
+def alignment_stage(job):
+    """Trazer os tempos para o áudio original e atribuir um orador a cada segmento."""
     print("Mapeando oradores com o texto transcrito...")
-    final_transcript = []
+    inicio = time.perf_counter()
+    asr_segments = job["asr_segments"]
+
+    if job.get("time_map") is not None:
+        remap_segments(asr_segments, job["time_map"])
+        # Sem tempo de transcrição quando ela veio do cache de etapas
+        report = speech_report(
+            job["speech_regions"], job["audio_seconds"], job["timings"].get("transcription", 0.0)
+        )
+        print(
+            f"VAD: {report['skipped_ratio']:.0%} do áudio pulado "
+            f"({report['skipped_seconds']:.0f}s), ~{report['estimated_seconds_saved']:.0f}s de ASR economizados"
+        )
+        job["vad_report"] = report
+
+    segments = []
+    diarization = job.get("diarization")
+    turns = list(diarization.itertracks(yield_label=True)) if diarization is not None else []
     
     # Processar cada segmento da transcrição do Whisper
-    for segment in transcription_result['segments']:
+    for segment in asr_segments:
         # Encontrar o orador para este segmento
-        speaker = "UNKNOWN"
+        speaker = job.get("single_speaker", "UNKNOWN")
         segment_start = segment['start']
         segment_end = segment['end']
         
         # Encontrar o orador que mais falou no intervalo do segmento
         speaker_turns = {}
-        for turn, _, speaker_label in diarization.itertracks(yield_label=True):
+        for turn, _, speaker_label in turns:
             turn_start = turn.start
             turn_end = turn.end
             
@@ -93,13 +459,237 @@ def transcribe_with_diarization(audio_path):
             # Associa o orador com a maior duração de fala no segmento
             speaker = max(speaker_turns, key=speaker_turns.get)
 
-        final_transcript.append({
-            "start": format_timestamp(segment_start),
+        segments.append({
+            "start": segment_start,
+            "end": segment_end,
             "speaker": speaker,
-            "text": segment['text'].strip()
+            "text": segment['text'].strip(),
+            "avg_logprob": segment.get('avg_logprob'),
+            "no_speech_prob": segment.get('no_speech_prob'),
         })
 
-    return final_transcript
+    job["segments"] = segments
+    job["timings"]["alignment"] = time.perf_counter() - inicio
+
+def job_stats(job):
+    """Métricas de um job no formato de `stats` de transcribe_segments."""
+    stats = {"audio_seconds": job.get("audio_seconds", 0.0), "timings": dict(job["timings"])}
+    if "vad_report" in job:
+        stats["vad"] = job["vad_report"]
+    if "speculative" in job:
+        stats["speculative"] = job["speculative"]
+    if "dag" in job:
+        stats["dag"] = job["dag"]
+    if "outputs" in job:
+        stats["outputs"] = job["outputs"]
+    return stats
+
+def stage_cache(cache=None):
+    """Cache de etapas a usar: None → STAGE_CACHE_DIR; "" ou False → nenhum; caminho ou StageCache."""
+    if cache is None:
+        cache = STAGE_CACHE_DIR
+    if not cache:
+        return None
+    return cache if isinstance(cache, StageCache) else StageCache(cache)
+
+def model_identity(model):
+    """Identificação de um modelo carregado por shared_model (None se ele veio de fora)."""
+    with _SHARED_MODELS_LOCK:
+        for key, shared in _SHARED_MODELS.items():
+            if shared is model:
+                return "/".join(str(part or "") for part in key)
+    return None
+
+def pipeline_graph(whisper_model=None, diarization_pipeline=None, enable_diarization=True,
+                   asr_server=None, speaker_index=None, speaker_embeddings=None, asr_backend=None,
+                   draft_model=None, model_id=None, load_diarization=None):
+    """
+    Etapas de um arquivo como grafo (transcritor.dag): decode → vad →
+    diarization / transcription → alignment → postprocess → export.
+
+    Cada etapa declara as chaves do job que lê e grava; só rodam as
+    necessárias para as saídas pedidas. Diarização, transcrição e VAD
+    guardam seus resultados no cache de etapas, com chave derivada do
+    conteúdo do arquivo e dos parâmetros que os afetam: trocar o modelo do
+    Whisper reaproveita a diarização, e com tudo em cache nem o áudio é
+    decodificado. Os modelos que não vêm prontos são carregados só pela
+    etapa que os usa (`load_diarization` carrega o pipeline do pyannote;
+    padrão: load_diarization_pipeline). `model_id` identifica
+    `whisper_model` no cache; sem ele, modelos que não vieram de
+    shared_model não usam o cache na transcrição.
+    """
+    backend = asr_backend or ASR_BACKEND
+    if asr_server is not None:
+        whisper_model = asr_server.model
+    if model_id is None:
+        if whisper_model is None:
+            model_id = "/".join(["asr", backend, WHISPER_MODEL, COMPUTE_TYPE])
+        else:
+            model_id = model_identity(whisper_model)
+    if draft_model is None:
+        draft_model = DRAFT_MODEL
+    if isinstance(draft_model, str):
+        draft_id = "/".join(["asr", backend, draft_model, COMPUTE_TYPE]) if draft_model else ""
+    else:
+        draft_id = model_identity(draft_model)
+    models = {"whisper": whisper_model, "diarization": diarization_pipeline}
+
+    def diarization_params(job):
+        if speaker_index is not None or speaker_embeddings is not None:
+            return None  # rótulos do índice e embeddings para cadastro: sempre recalcular
+        return {
+            "model": DIARIZATION_MODEL,
+            "compute_type": COMPUTE_TYPE,
+            "bounds": job["speaker_bounds"],
+            "detect_single_speaker": DETECT_SINGLE_SPEAKER,
+            "single_speaker_threshold": SINGLE_SPEAKER_THRESHOLD,
+            "match_threshold": SPEAKER_MATCH_THRESHOLD
+        }
+
+    def transcription_params(job):
+        if model_id is None or draft_id is None:
+            return None
+        # O servidor de lote decodifica de outro jeito (janelas fixas de 30 s,
+        # sem prompt nem timestamps de palavras): resultados não intercambiáveis
+        params = {"model": model_id, "language": job["language"], "draft": draft_id,
+                  "batched": asr_server is not None}
+        if draft_id:
+            params.update(logprob=ESCALATION_LOGPROB, no_speech=ESCALATION_NO_SPEECH)
+        return params
+
+    def diarization(job):
+        if models["diarization"] is None:
+            print("Carregando pipeline de diarização...")
+            models["diarization"] = (load_diarization or (lambda: shared_model(
+                ("diarization", COMPUTE_TYPE or None), load_diarization_pipeline
+            )))()
+        diarization_stage(job, models["diarization"], speaker_index, speaker_embeddings)
+
+    def transcription(job):
+        if models["whisper"] is None:
+            print("Carregando modelo Whisper...")
+            models["whisper"] = shared_model(
+                ("asr", backend, WHISPER_MODEL, COMPUTE_TYPE), lambda: load_asr_model(backend=backend)
+            )
+        transcription_stage(job, models["whisper"], asr_server, resolve_draft_model(draft_model, backend))
+
+    def postprocess(job):
+        job["transcript"] = format_transcript(job["segments"])
+
+    def export(job):
+        os.makedirs(job["output_dir"], exist_ok=True)
+        job["outputs"] = save_outputs(
+            job["transcript"], job["input_file"], job["output_dir"], job.get("formats"), job.get("basename")
+        )
+
+    alignment_inputs = ("asr_segments", "time_map", "speech_regions", "audio_seconds")
+    if enable_diarization:
+        alignment_inputs += ("diarization",)
+    return StageGraph([
+        Node("decode", decode_stage, ("audio_path",), ("audio", "audio_seconds"),
+             cached=("audio_seconds",), params=lambda job: {"sample_rate": SAMPLE_RATE}),
+        Node("vad", vad_stage, ("audio",), ("speech_audio", "speech_regions", "time_map"),
+             cached=("speech_regions", "time_map"), params=lambda job: {"vad": job["vad"]}),
+        Node("diarization", diarization, ("audio",), ("diarization", "single_speaker"),
+             cached=("diarization", "single_speaker"), params=diarization_params),
+        Node("transcription", transcription, ("speech_audio",), ("asr_segments", "speculative"),
+             cached=("asr_segments", "speculative"), params=transcription_params),
+        Node("alignment", alignment_stage, alignment_inputs, ("segments",)),
+        Node("postprocess", postprocess, ("segments",), ("transcript",)),
+        Node("export", export, ("transcript",), ("outputs",)),
+    ])
+
+def run_pipeline(audio_path, targets=("segments",), whisper_model=None, diarization_pipeline=None,
+                 enable_diarization=True, asr_server=None, speaker_index=None, speaker_embeddings=None,
+                 asr_backend=None, draft_model=None, model_id=None, load_diarization=None, cache=None,
+                 profiler=None, **job_options):
+    """
+    Produzir `targets` ("segments", "transcript" ou "outputs") para um arquivo.
+
+    `job_options` vão para new_job (language, vad, limites de oradores e,
+    para "outputs", input_file, output_dir, formats e basename). `cache`
+    segue stage_cache. Com `profiler` (transcritor.profiling.Profiler),
+    cada etapa executada é perfilada. Retorna o job, com job["dag"]
+    indicando as etapas executadas, lidas do cache e dispensadas.
+    """
+    graph = pipeline_graph(
+        whisper_model, diarization_pipeline, enable_diarization, asr_server, speaker_index,
+        speaker_embeddings, asr_backend, draft_model, model_id, load_diarization
+    )
+    job = new_job(audio_path, **job_options)
+    cache = stage_cache(cache)
+    fingerprints = {"audio_path": file_sha256(audio_path)} if cache is not None else None
+    graph.run(job, targets, cache, fingerprints, profiler)
+    if job["dag"]["cached"]:
+        print(f"Etapas reaproveitadas do cache: {', '.join(job['dag']['cached'])}")
+    return job
+
+def transcribe_segments(audio_path, whisper_model=None, diarization_pipeline=None,
+                        language=None, enable_diarization=True, asr_server=None,
+                        speaker_index=None, speaker_embeddings=None, vad=None, stats=None,
+                        num_speakers=None, min_speakers=None, max_speakers=None, asr_backend=None,
+                        draft_model=None, model_id=None, load_diarization=None, cache=None,
+                        work_dir=None, profiler=None):
+    """
+    Transcreve um arquivo de áudio e identifica os oradores.
+
+    Modelos já carregados podem ser reaproveitados entre chamadas; quando
+    omitidos, são carregados pela etapa que os usa (e não são carregados se
+    ela for dispensada ou vier do cache). Com `asr_server`
+    (BatchingInferenceServer), as janelas de 30 s são decodificadas em
+    lote junto com as de outros jobs.
+    Com `speaker_index` (SpeakerIndex), os rótulos SPEAKER_XX são trocados
+    pelos nomes cadastrados; `speaker_embeddings`, se for um dict, recebe o
+    embedding de cada orador (para cadastro posterior).
+    Com `vad` (padrão: REMOVE_SILENCE), só as regiões de fala vão ao
+    Whisper e os tempos são remapeados para o áudio original. `stats`, se
+    for um dict, recebe os tempos de cada etapa e o relatório do VAD.
+    `num_speakers`, `min_speakers` e `max_speakers` limitam a diarização
+    (padrão: NUM_SPEAKERS, MIN_SPEAKERS e MAX_SPEAKERS do .env).
+    `whisper_model` também pode ser um transcritor.asr.ASRBackend; quando
+    omitido, é carregado com `asr_backend` (padrão: ASR_BACKEND).
+    `draft_model` (modelo carregado ou nome; padrão: DRAFT_MODEL, "" desliga)
+    ativa a transcrição em duas passadas: o rascunho é feito por ele e só
+    os trechos de baixa confiança são decodificados de novo pelo modelo
+    principal; `stats["speculative"]` recebe a fração escalada.
+    `cache` (padrão: STAGE_CACHE_DIR, "" desliga) guarda os resultados de
+    VAD, diarização e transcrição por hash das entradas; `model_id` e
+    `load_diarization` seguem pipeline_graph. O áudio decodificado fica
+    mapeado de um arquivo em `work_dir` (padrão: PCM_WORK_DIR ou o
+    temporário do sistema). `profiler` segue run_pipeline.
+    Retorna segmentos com tempos em segundos.
+    """
+    job = run_pipeline(
+        audio_path, ("segments",), whisper_model, diarization_pipeline, enable_diarization,
+        asr_server, speaker_index, speaker_embeddings, asr_backend, draft_model, model_id,
+        load_diarization, cache, profiler, language=language, vad=vad, num_speakers=num_speakers,
+        min_speakers=min_speakers, max_speakers=max_speakers, work_dir=work_dir
+    )
+    if stats is not None:
+        stats.update(job_stats(job))
+
+    return job["segments"]
+
+def transcribe_with_diarization(audio_path, whisper_model=None, diarization_pipeline=None, **options):
+    """
+    Transcreve um arquivo de áudio e identifica os oradores.
+
+    `options` são repassadas para transcribe_segments.
+    """
+    segments = transcribe_segments(audio_path, whisper_model, diarization_pipeline, **options)
+    return format_transcript(segments)
+
+def format_transcript(segments):
+    """Converter segmentos em segundos para entradas com timestamps HH:MM:SS."""
+    return [
+        {
+            "start": format_timestamp(segment["start"]),
+            "end": format_timestamp(segment["end"]),
+            "speaker": segment["speaker"],
+            "text": segment["text"]
+        }
+        for segment in segments
+    ]
 
 
 def save_transcript(transcript, output_path, format_type="txt"):
@@ -108,36 +698,46 @@ def save_transcript(transcript, output_path, format_type="txt"):
     """
     os.makedirs(os.path.dirname(output_path) if os.path.dirname(output_path) else ".", exist_ok=True)
     
-    if format_type.lower() == "txt":
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write("=== TRANSCRIÇÃO COM DIARIZAÇÃO ===\n\n")
-            for entry in transcript:
-                f.write(f"[{entry['start']}] {entry['speaker']}: {entry['text']}\n")
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(render(transcript, format_type))
+
+def extract_audio(input_file, output_dir):
+    """
+    Extrai o áudio de arquivos de vídeo para WAV; áudios são usados diretamente.
+    Retorna o caminho do áudio ou None em caso de erro.
+    """
+    filename = Path(input_file).stem
+    file_extension = Path(input_file).suffix
     
-    elif format_type.lower() == "json":
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(transcript, f, ensure_ascii=False, indent=2)
+    if file_extension.lower() not in ['.mp4', '.mkv', '.mov', '.avi', '.webm']:
+        return input_file
+
+    console.print(f"[yellow]🎬 Arquivo de vídeo detectado. Extraindo áudio...[/yellow]")
+    audio_file_path = os.path.join(output_dir, f"{filename}.wav")
     
-    elif format_type.lower() == "srt":
-        with open(output_path, 'w', encoding='utf-8') as f:
-            for i, entry in enumerate(transcript, 1):
-                start_time = entry['start']
-                # Calcular tempo de fim (aproximado)
-                if i < len(transcript):
-                    end_time = transcript[i]['start']
-                else:
-                    # Para o último segmento, adicionar 3 segundos
-                    end_time = format_timestamp(
-                        sum(int(x) * 60**j for j, x in enumerate(reversed(start_time.split(':')))) + 3
-                    )
-                
-                f.write(f"{i}\n")
-                f.write(f"{start_time.replace(':', ',')} --> {end_time.replace(':', ',')}\n")
-                f.write(f"{entry['speaker']}: {entry['text']}\n\n")
-
-def process_single_file(input_file, output_dir=None):
+    try:
+        subprocess.run([
+            'ffmpeg', '-i', input_file, '-vn', '-acodec', 'pcm_s16le',
+            '-ar', str(AUDIO_SAMPLE_RATE), '-ac', str(AUDIO_CHANNELS),
+            audio_file_path, '-y'
+        ], check=True, capture_output=True)
+        console.print("[green]✅ Extração de áudio concluída.[/green]")
+    except subprocess.CalledProcessError as e:
+        console.print(f"[red]❌ Erro na extração de áudio: {e}[/red]")
+        return None
+    
+    return audio_file_path
+
+def process_single_file(input_file, output_dir=None, whisper_model=None, diarization_pipeline=None,
+                        speaker_index=None, enroll=None, stats=None, profile=False):
     """
     Processa um único arquivo de áudio/vídeo.
+
+    `enroll` mapeia rótulos desta gravação para nomes a cadastrar no
+    `speaker_index` (ex.: {"SPEAKER_00": "Ana"}). `stats` recebe as
+    métricas de transcribe_segments (duração do áudio, tempos e etapas
+    reaproveitadas do cache). Com `profile`, o perfil de cada etapa
+    (transcritor.profiling) é gravado em `<saída>/<arquivo>.profile/`.
     """
     if not os.path.exists(input_file):
         console.print(f"[red]❌ Arquivo não encontrado: {input_file}[/red]")
@@ -150,25 +750,16 @@ def process_single_file(input_file, output_dir=None):
         output_dir = OUTPUT_DIR
     os.makedirs(output_dir, exist_ok=True)
     
-    # Verificar se o arquivo de entrada é um vídeo
-    filename = Path(input_file).stem
-    file_extension = Path(input_file).suffix
+    profiler = None
+    if profile:
+        from transcritor.profiling import Profiler
+        profiler = Profiler(os.path.join(output_dir, f"{Path(input_file).stem}.profile"))
     
-    audio_file_path = input_file
-    if file_extension.lower() in ['.mp4', '.mkv', '.mov', '.avi', '.webm']:
-        console.print(f"[yellow]🎬 Arquivo de vídeo detectado. Extraindo áudio...[/yellow]")
-        audio_file_path = os.path.join(output_dir, f"{filename}.wav")
-        
-        try:
-            subprocess.run([
-                'ffmpeg', '-i', input_file, '-vn', '-acodec', 'pcm_s16le',
-                '-ar', str(AUDIO_SAMPLE_RATE), '-ac', str(AUDIO_CHANNELS),
-                audio_file_path, '-y'
-            ], check=True, capture_output=True)
-            console.print("[green]✅ Extração de áudio concluída.[/green]")
-        except subprocess.CalledProcessError as e:
-            console.print(f"[red]❌ Erro na extração de áudio: {e}[/red]")
-            return None
+    # Extrair o áudio se o arquivo de entrada for um vídeo
+    with profiler.stage("extract") if profiler else nullcontext():
+        audio_file_path = extract_audio(input_file, output_dir)
+    if audio_file_path is None:
+        return None
 
     # Executar a transcrição com diarização
     with Progress(
@@ -177,21 +768,270 @@ def process_single_file(input_file, output_dir=None):
         console=console
     ) as progress:
         task = progress.add_task("Transcrevendo e identificando oradores...", total=None)
-        transcript = transcribe_with_diarization(audio_file_path)
+        speaker_embeddings = {} if enroll else None
+        job = run_pipeline(
+            audio_file_path, ("outputs",), whisper_model, diarization_pipeline,
+            speaker_index=speaker_index, speaker_embeddings=speaker_embeddings,
+            input_file=input_file, output_dir=output_dir, profiler=profiler
+        )
         progress.remove_task(task)
+    if stats is not None:
+        stats.update(job_stats(job))
+    if profiler is not None:
+        from transcritor.profiling import format_summary, summarize
+        profiler.save(input_file=input_file, stages_run=job["dag"])
+        console.print(format_summary(summarize(profiler.directory, top=10)), markup=False, highlight=False)
+        console.print(f"[green]🔬 Perfil salvo: {profiler.directory}[/green]")
 
-    # Salvar em diferentes formatos
-    base_output_path = os.path.join(output_dir, filename)
-    
-    formats = OUTPUT_FORMAT.split(',') if ',' in OUTPUT_FORMAT else [OUTPUT_FORMAT]
-    
+    # Cadastrar voiceprints pedidos
+    for label, name in (enroll or {}).items():
+        if label in speaker_embeddings:
+            speaker_index.add(name, speaker_embeddings[label])
+            console.print(f"[green]🗣️ Orador {label} cadastrado como {name}[/green]")
+        else:
+            console.print(f"[yellow]⚠️ Orador {label} não encontrado nesta gravação[/yellow]")
+
+    return job["transcript"]
+
+def save_outputs(transcript, input_file, output_dir, formats=None, basename=None):
+    """
+    Salvar a transcrição em cada formato (padrão: OUTPUT_FORMAT).
+
+    Retorna os caminhos gravados.
+    """
+    base_output_path = os.path.join(output_dir, basename or Path(input_file).stem)
+
+    if formats is None:
+        formats = OUTPUT_FORMAT.split(',') if ',' in OUTPUT_FORMAT else [OUTPUT_FORMAT]
+
+    saved = []
     for fmt in formats:
         fmt = fmt.strip().lower()
         output_file = f"{base_output_path}.{fmt}"
         save_transcript(transcript, output_file, fmt)
         console.print(f"[green]💾 Salvo: {output_file}[/green]")
-    
-    return transcript
+        saved.append(output_file)
+    return saved
+
+# Modelos compartilhados entre instâncias de Pipeline do mesmo processo
+_SHARED_MODELS = {}
+_SHARED_MODELS_LOCK = threading.Lock()
+_MODEL_LOCKS = {}
+
+def shared_model(key, loader):
+    """Carregar um modelo uma única vez por processo e reaproveitá-lo depois."""
+    with _SHARED_MODELS_LOCK:
+        if key not in _SHARED_MODELS:
+            _SHARED_MODELS[key] = loader()
+        return _SHARED_MODELS[key]
+
+def model_lock(model):
+    """
+    Lock de um modelo compartilhado entre threads.
+
+    O transcribe do Whisper instala hooks (cache de chaves/valores) no
+    próprio modelo, então chamadas concorrentes no mesmo objeto precisam
+    ser serializadas.
+    """
+    with _SHARED_MODELS_LOCK:
+        return _MODEL_LOCKS.setdefault(id(model), threading.Lock())
+
+@dataclass
+class TranscriptionResult:
+    """Resultado estruturado de Pipeline.run (tempos em segundos)."""
+    path: str
+    preset: str
+    model: str
+    segments: list
+    audio_seconds: float = 0.0
+    timings: dict = field(default_factory=dict)
+    vad: dict = None
+    speculative: dict = None
+    dag: dict = None
+    outputs: list = field(default_factory=list)
+
+    @property
+    def transcript(self):
+        """Entradas com timestamps HH:MM:SS (formato dos arquivos do CLI)."""
+        return format_transcript(self.segments)
+
+    @property
+    def speakers(self):
+        """Tempo de fala, em segundos, de cada orador."""
+        talk_time = {}
+        for segment in self.segments:
+            duration = segment["end"] - segment["start"]
+            talk_time[segment["speaker"]] = talk_time.get(segment["speaker"], 0.0) + duration
+        return talk_time
+
+    def render(self, format_type="txt"):
+        """Renderizar em txt, srt, vtt ou json sem passar pelo disco."""
+        return render(self.segments, format_type)
+
+    def to_dict(self):
+        return {
+            "path": self.path,
+            "preset": self.preset,
+            "model": self.model,
+            "audio_seconds": self.audio_seconds,
+            "timings": self.timings,
+            "vad": self.vad,
+            "speculative": self.speculative,
+            "dag": self.dag,
+            "outputs": self.outputs,
+            "speakers": self.speakers,
+            "segments": self.segments
+        }
+
+class Pipeline:
+    """
+    API de transcrição em processo.
+
+        resultado = Pipeline(preset="reuniao").run("reuniao.mp4")
+
+    `preset` é um nome de transcritor.presets.PRESETS ou um Preset;
+    `options` alteram campos do preset (ex.: model="small"). Os modelos são
+    carregados na primeira chamada e compartilhados com as outras
+    instâncias do processo, então um serviço pode manter um Pipeline por
+    preset sem duplicar memória nem iniciar novos processos. A
+    configuração não depende de variáveis de ambiente, exceto HF_TOKEN e
+    USE_GPU para carregar os modelos.
+    """
+
+    def __init__(self, preset="padrao", speaker_index=None, **options):
+        preset = get_preset(preset)
+        self.preset = preset.with_options(**options) if options else preset
+        self.speaker_index = speaker_index
+
+    @property
+    def whisper_model(self):
+        model, backend, compute_type = self.preset.model, self.preset.asr_backend, self.preset.compute_type
+        return shared_model(
+            ("asr", backend, model, compute_type),
+            lambda: load_asr_model(model, backend, compute_type)
+        )
+
+    @property
+    def draft_model(self):
+        if not self.preset.draft_model:
+            return None
+        return load_draft_model(self.preset.draft_model, self.preset.asr_backend, self.preset.compute_type)
+
+    @property
+    def diarization_pipeline(self):
+        if not self.preset.enable_diarization:
+            return None
+        compute_type = self.preset.compute_type
+        return shared_model(("diarization", compute_type), lambda: load_diarization_pipeline(compute_type))
+
+    def load(self):
+        """Carregar os modelos agora (em vez de na primeira chamada de run)."""
+        self.whisper_model
+        self.draft_model
+        self.diarization_pipeline
+        return self
+
+    def run(self, path, output_dir=None, basename=None, speaker_embeddings=None, **bounds):
+        """
+        Transcrever `path` e retornar um TranscriptionResult.
+
+        Com `output_dir`, os formatos do preset são gravados lá (vídeos têm
+        o áudio extraído para a mesma pasta). `bounds` (num_speakers,
+        min_speakers, max_speakers) substituem os limites do preset nesta
+        chamada; `speaker_embeddings` é repassado a transcribe_segments.
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Arquivo não encontrado: {path}")
+
+        preset = self.preset
+        audio_path = path
+        if output_dir is not None:
+            os.makedirs(output_dir, exist_ok=True)
+            audio_path = extract_audio(path, output_dir)
+            if audio_path is None:
+                raise RuntimeError(f"Falha ao extrair o áudio de {path}")
+
+        speakers = {
+            "num_speakers": preset.num_speakers or "auto",
+            "min_speakers": preset.min_speakers or "",
+            "max_speakers": preset.max_speakers or ""
+        }
+        speakers.update(bounds)
+
+        stats = {}
+        segments = transcribe_segments(
+            audio_path, self.whisper_model,
+            load_diarization=lambda: self.diarization_pipeline,
+            language=preset.language,
+            enable_diarization=preset.enable_diarization,
+            speaker_index=self.speaker_index,
+            speaker_embeddings=speaker_embeddings,
+            vad=preset.vad,
+            stats=stats,
+            draft_model=self.draft_model or "",
+            **speakers
+        )
+        result = TranscriptionResult(
+            path=str(path),
+            preset=preset.name,
+            model=preset.model,
+            segments=segments,
+            audio_seconds=stats.get("audio_seconds", 0.0),
+            timings=stats.get("timings", {}),
+            vad=stats.get("vad"),
+            speculative=stats.get("speculative"),
+            dag=stats.get("dag")
+        )
+        if output_dir is not None:
+            self.save(result, output_dir, basename)
+        return result
+
+    def save(self, result, output_dir, basename=None):
+        """Gravar o resultado nos formatos do preset (nome padrão: o do arquivo)."""
+        os.makedirs(output_dir, exist_ok=True)
+        result.outputs = save_outputs(
+            result.transcript, result.path, output_dir, self.preset.output_formats, basename
+        )
+        return result.outputs
+
+def file_stages(whisper_model, diarization_pipeline, enable_diarization=True,
+                decode_workers=2, queue_size=2, draft_model=None):
+    """
+    Etapas de process_single_file para transcritor.staged.StagedRunner.
+
+    Os itens são criados com new_job(caminho, input_file=..., output_dir=...).
+    Diarização e transcrição têm um worker cada: os modelos não são
+    compartilháveis entre threads. A decodificação (ffmpeg, fora do GIL)
+    usa `decode_workers` para adiantar os próximos arquivos. `draft_model`
+    segue as regras de transcribe_segments (padrão: DRAFT_MODEL).
+    """
+    draft_model = resolve_draft_model(draft_model)
+
+    def diarization(job):
+        if enable_diarization:
+            diarization_stage(job, diarization_pipeline)
+
+    def export(job):
+        inicio = time.perf_counter()
+        # Os áudios não são mais necessários; liberar antes de gravar
+        job.pop("audio", None)
+        job.pop("speech_audio", None)
+        os.makedirs(job["output_dir"], exist_ok=True)
+        job["transcript"] = format_transcript(job["segments"])
+        job["outputs"] = save_outputs(job["transcript"], job["input_file"], job["output_dir"])
+        job["timings"]["export"] = time.perf_counter() - inicio
+
+    return [
+        Stage("decode", decode_stage, workers=decode_workers, queue_size=queue_size),
+        Stage("vad", vad_stage, queue_size=queue_size),
+        Stage("diarization", diarization, queue_size=queue_size),
+        Stage(
+            "transcription", lambda job: transcription_stage(job, whisper_model, draft_model=draft_model),
+            queue_size=queue_size
+        ),
+        Stage("alignment", alignment_stage, queue_size=queue_size),
+        Stage("export", export, queue_size=queue_size),
+    ]
 
 def main():
     """
@@ -212,13 +1052,35 @@ Exemplos de uso:
     parser.add_argument("input", nargs="?", help="Arquivo de entrada ou diretório")
     parser.add_argument("-i", "--input", dest="input_path", help="Arquivo de entrada ou diretório")
     parser.add_argument("-o", "--output", help="Diretório de saída")
-    parser.add_argument("-f", "--format", choices=["txt", "json", "srt"],
+    parser.add_argument("-f", "--format", choices=list(RENDERERS),
                        help="Formato de saída")
     parser.add_argument("-m", "--model", help="Modelo Whisper (tiny, base, small, medium, large)")
+    parser.add_argument("--asr-backend", choices=list(BACKENDS), default=None,
+                       help="Motor de ASR (padrão: ASR_BACKEND do .env, whisper)")
+    parser.add_argument("--compute-type", choices=["float32", "float16", "int8"], default=None,
+                       help="Precisão da inferência (int8: quantização dinâmica na CPU; padrão: COMPUTE_TYPE)")
+    parser.add_argument("--draft-model", default=None, metavar="MODELO",
+                       help="Transcrição em duas passadas: rascunho com este modelo (ex.: tiny) e "
+                            "--model só nos trechos de baixa confiança (padrão: DRAFT_MODEL)")
+    parser.add_argument("--stage-cache", default=None, metavar="PASTA",
+                       help="Cache de VAD, diarização e transcrição por arquivo e parâmetros "
+                            "(padrão: STAGE_CACHE_DIR; \"\" desliga)")
+    parser.add_argument("--profile", action="store_true",
+                       help="Gravar o perfil de cada etapa (cProfile, PyTorch e linha do tempo) junto da saída; "
+                            "resumo: python -m transcritor.profiling <pasta>")
     parser.add_argument("--batch", action="store_true", help="Processar múltiplos arquivos")
+    parser.add_argument("--vad", action="store_true",
+                       help="Pular silêncio e música antes da transcrição (REMOVE_SILENCE)")
+    parser.add_argument("--speaker-index", default=SPEAKER_INDEX,
+                       help="Índice de voiceprints (.npz) para reconhecer oradores cadastrados")
+    parser.add_argument("--enroll", action="append", metavar="ROTULO=NOME", default=[],
+                       help="Cadastrar um orador desta gravação no índice (ex.: SPEAKER_00=Ana)")
     
     args = parser.parse_args()
     
+    # Threads e afinidade (TORCH_THREADS, CPU_AFFINITY), se configurados
+    apply_cpu_profile()
+    
     # Mostrar banner
     console.print(Panel.fit(
         "[bold blue]🎙️ TRANSCRITOR COM DIARIZAÇÃO[/bold blue]\n"
@@ -251,6 +1113,38 @@ Exemplos de uso:
     if args.model:
         WHISPER_MODEL = args.model
     
+    # Configurar backend de ASR
+    global ASR_BACKEND
+    if args.asr_backend:
+        ASR_BACKEND = args.asr_backend
+    
+    # Configurar precisão da inferência
+    global COMPUTE_TYPE
+    if args.compute_type:
+        COMPUTE_TYPE = args.compute_type
+    
+    # Configurar a transcrição em duas passadas
+    global DRAFT_MODEL
+    if args.draft_model is not None:
+        DRAFT_MODEL = args.draft_model
+    
+    # Configurar o cache de etapas
+    global STAGE_CACHE_DIR
+    if args.stage_cache is not None:
+        STAGE_CACHE_DIR = args.stage_cache
+    
+    # Configurar VAD
+    global REMOVE_SILENCE
+    if args.vad:
+        REMOVE_SILENCE = True
+    
+    # Índice de voiceprints
+    speaker_index = SpeakerIndex.load(args.speaker_index) if args.speaker_index else None
+    enroll = dict(item.split("=", 1) for item in args.enroll)
+    if enroll and speaker_index is None:
+        console.print("[red]❌ --enroll exige --speaker-index[/red]")
+        return
+    
     # Processar arquivo(s)
     if os.path.isdir(input_file):
         # Processar diretório
@@ -266,10 +1160,18 @@ Exemplos de uso:
         
         for file in files:
             file_path = os.path.join(input_file, file)
-            process_single_file(file_path, output_dir)
+            process_single_file(file_path, output_dir, speaker_index=speaker_index, profile=args.profile)
     else:
         # Processar arquivo único
-        transcript = process_single_file(input_file, output_dir)
+        stats = {}
+        transcript = process_single_file(
+            input_file, output_dir, speaker_index=speaker_index, enroll=enroll, stats=stats,
+            profile=args.profile
+        )
+        
+        if transcript and enroll:
+            speaker_index.save(args.speaker_index)
+            console.print(f"[green]💾 Índice de oradores salvo: {args.speaker_index}[/green]")
         
         if transcript:
             # Mostrar estatísticas
@@ -283,6 +1185,15 @@ Exemplos de uso:
             table.add_row("Total de Segmentos", str(total_segments))
             table.add_row("Oradores Identificados", str(len(speakers)))
             table.add_row("Lista de Oradores", ", ".join(sorted(speakers)))
+            if "speculative" in stats:
+                report = stats["speculative"]
+                table.add_row(
+                    "Áudio Escalado (2 passadas)",
+                    f"{report['escalated_ratio']:.0%} ({report['escalated_seconds']:.0f}s, "
+                    f"{report['regions']} trechos)"
+                )
+            if stats.get("dag", {}).get("cached"):
+                table.add_row("Etapas do Cache", ", ".join(stats["dag"]["cached"]))
             
             console.print(table)
 
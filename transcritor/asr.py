@@ -0,0 +1,147 @@
+"""
+🗣️ Backends de reconhecimento de fala (ASR)
+Interface comum para openai-whisper e faster-whisper (CTranslate2)
+"""
+
+import importlib.util
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = "whisper"
+
+
+class ASRBackend:
+    """
+    Um modelo de ASR carregado.
+
+    `transcribe` recebe PCM mono float32 a 16 kHz e retorna segmentos no
+    formato de `whisper.transcribe` (start, end, text, avg_logprob,
+    no_speech_prob e words), para que o resto do pipeline não dependa do
+    motor usado.
+    """
+    name = ""
+    module = ""
+
+    def __init__(self, model_name: str, device: str = "cpu", compute_type: Optional[str] = None):
+        self.model_name = model_name
+        self.device = device
+        self.compute_type = compute_type
+
+    def transcribe(self, audio: np.ndarray, language: str) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def close(self):
+        """Liberar o modelo (opcional)."""
+
+    @classmethod
+    def available(cls) -> bool:
+        """Se o pacote do motor está instalado."""
+        return importlib.util.find_spec(cls.module) is not None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.model_name!r}, device={self.device!r}, compute_type={self.compute_type!r})"
+
+
+class WhisperBackend(ASRBackend):
+    """openai-whisper (PyTorch). `model` reaproveita um modelo já carregado."""
+    name = "whisper"
+    module = "whisper"
+
+    def __init__(self, model_name: str, device: str = "cpu", compute_type: Optional[str] = None,
+                 model=None, download_root: Optional[str] = None):
+        super().__init__(model_name, device, compute_type or ("float16" if device == "cuda" else "float32"))
+        if model is None:
+            import whisper
+            model = whisper.load_model(model_name, device=device, download_root=download_root)
+        self.model = model
+
+    def transcribe(self, audio: np.ndarray, language: str) -> List[Dict[str, Any]]:
+        return self.model.transcribe(
+            audio, language=language, word_timestamps=True,
+            fp16=self.compute_type == "float16"
+        )["segments"]
+
+
+class FasterWhisperBackend(ASRBackend):
+    """
+    faster-whisper (CTranslate2), com pesos int8 na CPU por padrão.
+
+    `model_name` aceita os nomes do Whisper (tiny ... large-v3) ou o
+    caminho de um modelo convertido; com `download_root`, os arquivos são
+    procurados/baixados nessa pasta. `beam_size=1` (greedy) corresponde
+    ao padrão de `whisper.transcribe`.
+    """
+    name = "faster-whisper"
+    module = "faster_whisper"
+
+    def __init__(self, model_name: str, device: str = "cpu", compute_type: Optional[str] = None,
+                 cpu_threads: int = 0, beam_size: int = 1, download_root: Optional[str] = None):
+        super().__init__(model_name, device, compute_type or ("float16" if device == "cuda" else "int8"))
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise RuntimeError("Backend faster-whisper indisponível: pip install faster-whisper")
+        # "large" do openai-whisper equivale ao large-v2 convertido
+        name = "large-v2" if model_name == "large" else model_name
+        self.model = WhisperModel(
+            name, device=device, compute_type=self.compute_type,
+            cpu_threads=cpu_threads, download_root=download_root
+        )
+        self.beam_size = beam_size
+
+    def transcribe(self, audio: np.ndarray, language: str) -> List[Dict[str, Any]]:
+        segments, _ = self.model.transcribe(
+            audio, language=language, word_timestamps=True, beam_size=self.beam_size
+        )
+        # `segments` é um gerador: a decodificação acontece ao consumi-lo
+        return [
+            {
+                "id": segment.id,
+                "start": segment.start,
+                "end": segment.end,
+                "text": segment.text,
+                "avg_logprob": segment.avg_logprob,
+                "no_speech_prob": segment.no_speech_prob,
+                "compression_ratio": segment.compression_ratio,
+                "words": [
+                    {"word": w.word, "start": w.start, "end": w.end, "probability": w.probability}
+                    for w in (segment.words or [])
+                ]
+            }
+            for segment in segments
+        ]
+
+
+BACKENDS = {backend.name: backend for backend in (WhisperBackend, FasterWhisperBackend)}
+
+
+def available_backends() -> List[str]:
+    """Backends cujo pacote está instalado."""
+    return [name for name, backend in BACKENDS.items() if backend.available()]
+
+
+def load_backend(name: str, model_name: str, device: str = "cpu", **options) -> ASRBackend:
+    """Carregar `model_name` com o backend `name`."""
+    try:
+        backend = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Backend de ASR desconhecido: {name}. Use: {', '.join(BACKENDS)}")
+    logger.info(f"Carregando {model_name} com o backend {name} ({device})")
+    return backend(model_name, device=device, **options)
+
+
+def backend_key(backend: Optional[str], model_name: str) -> str:
+    """Chave de modelo para o agendador: 'small' ou 'faster-whisper:small'."""
+    if not backend or backend == DEFAULT_BACKEND:
+        return model_name
+    return f"{backend}:{model_name}"
+
+
+def split_backend_key(key: str) -> Tuple[str, str]:
+    """Inverso de `backend_key`: (backend, modelo)."""
+    backend, _, model_name = key.rpartition(":")
+    return backend or DEFAULT_BACKEND, model_name
@@ -0,0 +1,217 @@
+"""
+📦 Inferência Whisper em lote entre jobs
+Agrupa janelas de 30 s de vários jobs concorrentes em um único batch
+"""
+
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+import whisper
+from whisper.audio import N_SAMPLES, SAMPLE_RATE, log_mel_spectrogram, pad_or_trim
+from whisper.tokenizer import get_tokenizer
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SECONDS = N_SAMPLES / SAMPLE_RATE
+
+# Mesmos limiares usados por whisper.transcribe para descartar janelas sem fala
+NO_SPEECH_THRESHOLD = 0.6
+LOGPROB_THRESHOLD = -1.0
+
+# Janelas de um job aguardando o servidor (espectrograma de ~1 MB cada)
+MAX_PENDING_WINDOWS = 32
+
+
+@dataclass
+class _WindowRequest:
+    """Janela de 30 s aguardando decodificação."""
+    mel: torch.Tensor
+    language: str
+    future: Future = field(default_factory=Future)
+
+
+class BatchingInferenceServer:
+    """
+    Servidor de inferência que decodifica janelas de vários jobs juntas.
+
+    Cada job envia seus espectrogramas de 30 s via `submit`; uma thread
+    dedicada junta as janelas pendentes até `max_batch_size` ou até
+    `max_wait` segundos após a primeira chegar, roda encoder e decoder em
+    um único batch e devolve cada resultado ao job de origem.
+    """
+
+    def __init__(self, model, max_batch_size: int = 8, max_wait: float = 0.05):
+        self.model = model
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+
+        self._queue: "queue.Queue[Optional[_WindowRequest]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+        # Métricas
+        self.batches = 0
+        self.windows = 0
+
+    def start(self) -> "BatchingInferenceServer":
+        """Iniciar a thread de inferência."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="whisper-batching", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Encerrar a thread de inferência após esvaziar a fila."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, mel: torch.Tensor, language: str) -> Future:
+        """Enfileirar um espectrograma (n_mels, 3000). Retorna um Future do DecodingResult."""
+        request = _WindowRequest(mel, language)
+        self._queue.put(request)
+        return request.future
+
+    def _collect(self, first: _WindowRequest) -> List[_WindowRequest]:
+        """Juntar janelas pendentes até encher o batch ou estourar o tempo."""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                request = self._queue.get(timeout=max(remaining, 0)) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                # Repassar o sinal de parada para depois deste batch
+                self._queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _loop(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = self._collect(first)
+
+            # Janelas de idiomas diferentes não compartilham o prompt inicial
+            by_language: Dict[str, List[_WindowRequest]] = {}
+            for request in batch:
+                by_language.setdefault(request.language, []).append(request)
+
+            for language, requests in by_language.items():
+                self._decode(language, requests)
+
+    def _decode(self, language: str, requests: List[_WindowRequest]):
+        try:
+            mel = torch.stack([r.mel for r in requests]).to(self.model.device)
+            options = whisper.DecodingOptions(
+                language=language,
+                task="transcribe",
+                fp16=self.model.device.type == "cuda"
+            )
+            with torch.no_grad():
+                results = whisper.decode(self.model, mel, options)
+            self.batches += 1
+            self.windows += len(requests)
+            for request, result in zip(requests, results):
+                request.future.set_result(result)
+        except Exception as e:
+            logger.error(f"Erro na inferência em lote: {e}")
+            for request in requests:
+                if not request.future.done():
+                    request.future.set_exception(e)
+
+    def stats(self) -> Dict[str, Any]:
+        """Métricas de agrupamento."""
+        return {
+            "batches": self.batches,
+            "windows": self.windows,
+            "avg_batch_size": round(self.windows / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size
+        }
+
+
+def transcribe_batched(server: BatchingInferenceServer, audio: np.ndarray, language: str = "pt",
+                       max_pending: int = MAX_PENDING_WINDOWS) -> List[Dict[str, Any]]:
+    """
+    Transcrever áudio (float32, 16 kHz) enviando todas as janelas ao servidor.
+
+    Diferente de `whisper.transcribe`, as janelas são fixas e independentes
+    (sem condicionamento no texto anterior), o que permite decodificá-las
+    em lote junto com janelas de outros jobs. No máximo `max_pending`
+    janelas (com seus espectrogramas) aguardam o servidor ao mesmo tempo,
+    então a memória não cresce com a duração do áudio.
+    """
+    model = server.model
+    tokenizer = get_tokenizer(
+        model.is_multilingual,
+        num_languages=model.num_languages,
+        language=language,
+        task="transcribe"
+    )
+
+    segments: List[Dict[str, Any]] = []
+
+    def collect(offset: int, future: Future):
+        result = future.result()
+        if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+            return
+
+        window_start = offset / SAMPLE_RATE
+        window_end = min(len(audio), offset + N_SAMPLES) / SAMPLE_RATE
+        for start, end, tokens in _split_on_timestamps(result.tokens, tokenizer):
+            text = tokenizer.decode(tokens).strip()
+            if not text:
+                continue
+            segments.append({
+                "start": window_start + (start if start is not None else 0.0),
+                "end": min(window_start + end, window_end) if end is not None else window_end,
+                "text": text,
+                "avg_logprob": result.avg_logprob,
+                "no_speech_prob": result.no_speech_prob
+            })
+
+    pending: Deque[Tuple[int, Future]] = deque()
+    for offset in range(0, len(audio), N_SAMPLES):
+        window = pad_or_trim(np.array(audio[offset:offset + N_SAMPLES]))
+        mel = log_mel_spectrogram(window, n_mels=model.dims.n_mels)
+        pending.append((offset, server.submit(mel, language)))
+        if len(pending) >= max_pending:
+            collect(*pending.popleft())
+    while pending:
+        collect(*pending.popleft())
+
+    return segments
+
+
+def _split_on_timestamps(tokens: List[int], tokenizer):
+    """Dividir os tokens de uma janela nos segmentos delimitados por timestamps."""
+    timestamp_begin = tokenizer.timestamp_begin
+    start = None
+    text_tokens: List[int] = []
+
+    for token in tokens:
+        if token >= timestamp_begin:
+            time_s = (token - timestamp_begin) * 0.02
+            if text_tokens:
+                yield start, time_s, text_tokens
+                text_tokens = []
+                start = None
+            else:
+                start = time_s
+        else:
+            text_tokens.append(token)
+
+    if text_tokens:
+        yield start, None, text_tokens
@@ -0,0 +1,240 @@
+"""
+🎚️ Controle adaptativo de concorrência
+Ajusta o número de workers pela vazão medida em segundos de áudio por segundo de relógio
+"""
+
+import os
+import time
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import psutil
+except ImportError:  # psutil é opcional: sem ele, /proc e loadavg
+    psutil = None
+
+
+# Memória aproximada de um worker com o modelo carregado (GB, fp32),
+# pela tabela de requisitos do Whisper; a diarização (pyannote) soma ~1 GB
+MODEL_MEMORY_GB = {"tiny": 1.0, "base": 1.0, "small": 2.0, "medium": 5.0, "turbo": 6.0, "large": 10.0}
+DIARIZATION_MEMORY_GB = 1.0
+
+
+def _meminfo_available_gb() -> Optional[float]:
+    """Memória disponível segundo /proc/meminfo (None se indisponível)."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                key, value = line.split(":", 1)
+                if key == "MemAvailable":
+                    return int(value.split()[0]) / 1024 ** 2
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def memory_bound_workers(model: str, diarization: bool = True) -> int:
+    """
+    Quantos workers com `model` cabem na memória disponível agora.
+
+    Cada worker carrega o próprio modelo (e o pyannote), então o limite é
+    a memória disponível dividida pela memória de um worker, e nunca mais
+    que o número de núcleos. Sem como medir a memória, retorna 2.
+    """
+    if psutil is not None:
+        available = psutil.virtual_memory().available / 1024 ** 3
+    else:
+        available = _meminfo_available_gb()
+    if available is None:
+        return 2
+    family = next((name for name in MODEL_MEMORY_GB if model.startswith(name)), "large")
+    per_worker = MODEL_MEMORY_GB[family] + (DIARIZATION_MEMORY_GB if diarization else 0.0)
+    return max(1, min(int(available // per_worker), os.cpu_count() or 1))
+
+
+def _meminfo_used_ratio() -> float:
+    """Fração da memória em uso segundo /proc/meminfo (0 se indisponível)."""
+    try:
+        values = {}
+        with open("/proc/meminfo") as f:
+            for line in f:
+                key, value = line.split(":", 1)
+                values[key] = int(value.split()[0])
+        return 1.0 - values["MemAvailable"] / values["MemTotal"]
+    except (OSError, KeyError, ValueError, ZeroDivisionError):
+        return 0.0
+
+
+def system_pressure() -> Dict[str, float]:
+    """
+    Pressão atual de CPU e memória.
+
+    `cpu` é a carga por núcleo (1.0 = todos os núcleos ocupados) e
+    `memory` a fração da memória em uso.
+    """
+    cores = os.cpu_count() or 1
+    if psutil is not None:
+        return {
+            "cpu": psutil.getloadavg()[0] / cores,
+            "memory": psutil.virtual_memory().percent / 100
+        }
+    try:
+        cpu = os.getloadavg()[0] / cores
+    except (AttributeError, OSError):
+        cpu = 0.0
+    return {"cpu": cpu, "memory": _meminfo_used_ratio()}
+
+
+class ConcurrencyController:
+    """
+    Controlador de concorrência por subida de encosta (hill climbing).
+
+    A cada janela de observação (pelo menos `interval` segundos e
+    `min_samples` arquivos concluídos) mede a vazão em segundos de áudio
+    por segundo de relógio e decide o próximo número de workers:
+
+    - pressão de memória ou CPU acima do limite: reduz pela metade
+      (diminuição multiplicativa, como no AIMD);
+    - após uma sondagem (um worker a mais ou a menos), mantém a direção
+      se valeu a pena (mais vazão ao subir; a mesma vazão ao descer, com
+      menos memória) e volta um passo caso contrário;
+    - em regime estável, sonda de novo a cada `hold_windows` janelas,
+      alternando a direção, porque a carga pode ter mudado.
+
+    Cada decisão é registrada no log e em `decisions`.
+    """
+
+    def __init__(
+        self,
+        initial: int = 2,
+        min_workers: int = 1,
+        max_workers: Optional[int] = None,
+        interval: float = 60.0,
+        min_samples: int = 2,
+        tolerance: float = 0.05,
+        max_cpu: float = 2.0,
+        max_memory: float = 0.9,
+        hold_windows: int = 5,
+        pressure: Callable[[], Dict[str, float]] = system_pressure
+    ):
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max(self.min_workers, max_workers or os.cpu_count() or 1)
+        self.limit = min(max(initial, self.min_workers), self.max_workers)
+        self.interval = interval
+        self.min_samples = min_samples
+        self.tolerance = tolerance
+        self.max_cpu = max_cpu
+        self.max_memory = max_memory
+        self.hold_windows = hold_windows
+        self.pressure = pressure
+
+        self.decisions: List[Dict[str, Any]] = []
+        self._direction = 1
+        self._probing = False
+        self._baseline: Optional[float] = None
+        self._holds = 0
+        self._reset_window()
+
+    def _reset_window(self):
+        self._window_start = time.monotonic()
+        self._audio_seconds = 0.0
+        self._samples = 0
+
+    def record(self, audio_seconds: float):
+        """Registrar um arquivo concluído com `audio_seconds` de áudio."""
+        self._audio_seconds += audio_seconds
+        self._samples += 1
+
+    def _decide(self, throughput: float, pressure: Dict[str, float]):
+        """Próximo limite e motivo, atualizando o estado da sondagem."""
+        previous = self.limit
+
+        if pressure["memory"] > self.max_memory or pressure["cpu"] > self.max_cpu:
+            self._probing, self._holds, self._baseline = False, 0, None
+            return max(self.min_workers, previous // 2), "pressão de recursos"
+
+        if self._probing:
+            if self._direction > 0:
+                worth_it = throughput > self._baseline * (1 + self.tolerance)
+            else:
+                worth_it = throughput >= self._baseline * (1 - self.tolerance)
+            if worth_it:
+                self._baseline = throughput
+                return previous + self._direction, "sondagem compensou"
+            # Voltar ao limite anterior e sondar no outro sentido da próxima vez
+            self._probing = False
+            self._direction = -self._direction
+            return previous + self._direction, "sondagem não compensou"
+
+        first = self._baseline is None
+        self._baseline = throughput
+        self._holds += 1
+        if first or self._holds >= self.hold_windows:
+            self._probing, self._holds = True, 0
+            return previous + self._direction, "sondagem"
+        return previous, "vazão estável"
+
+    def update(self) -> int:
+        """Avaliar a janela atual (se completa) e retornar o limite de workers."""
+        elapsed = time.monotonic() - self._window_start
+        if elapsed < self.interval or self._samples < self.min_samples:
+            return self.limit
+
+        throughput = self._audio_seconds / elapsed
+        pressure = self.pressure()
+        previous = self.limit
+        new_limit, reason = self._decide(throughput, pressure)
+
+        clamped = min(max(new_limit, self.min_workers), self.max_workers)
+        if clamped != new_limit and self._probing:
+            # Bateu no limite: inverter a direção e manter
+            self._probing = False
+            self._direction = -self._direction
+        new_limit = clamped
+
+        decision = {
+            "time": time.time(),
+            "workers": previous,
+            "new_workers": new_limit,
+            "throughput": round(throughput, 3),
+            "cpu": round(pressure["cpu"], 2),
+            "memory": round(pressure["memory"], 2),
+            "reason": reason
+        }
+        self.decisions.append(decision)
+        del self.decisions[:-100]
+        logger.info(
+            f"Concorrência: {previous} -> {new_limit} workers ({reason}; "
+            f"vazão {throughput:.2f}x tempo real, CPU {pressure['cpu']:.2f}, "
+            f"memória {pressure['memory']:.0%})"
+        )
+
+        self.limit = new_limit
+        self._reset_window()
+        return new_limit
+
+    def applied(self, limit: int):
+        """
+        Informar o número de workers realmente usado, quando ficou abaixo do decidido.
+
+        Ex.: o lote limita o crescimento aos arquivos na fila. A próxima
+        janela é então atribuída a esse número; uma sondagem para cima que
+        não pôde ser aplicada é encerrada, como ao bater em `max_workers`.
+        """
+        limit = min(max(limit, self.min_workers), self.max_workers)
+        if limit < self.limit and self._probing and self._direction > 0:
+            self._probing = False
+            self._direction = -self._direction
+        self.limit = limit
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado do controlador e últimas decisões."""
+        return {
+            "workers": self.limit,
+            "min_workers": self.min_workers,
+            "max_workers": self.max_workers,
+            "baseline_throughput": round(self._baseline, 3) if self._baseline is not None else None,
+            "decisions": self.decisions[-10:]
+        }
@@ -0,0 +1,180 @@
+"""
+🧮 Particionamento de CPU entre workers
+Threads do PyTorch/OpenMP/MKL e afinidade por worker para evitar oversubscription
+"""
+
+import os
+import sys
+import logging
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bibliotecas que criam seu próprio pool de threads ao serem carregadas
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+)
+
+# Ajuste de threads à espera da importação do torch (ver configure_threads)
+_pending: Optional[Tuple[int, Optional[int]]] = None
+
+
+def available_cores() -> List[int]:
+    """CPUs lógicas que este processo pode usar (respeita cgroups/taskset)."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def physical_cores(cores: Optional[List[int]] = None) -> List[List[int]]:
+    """
+    Agrupar CPUs lógicas por núcleo físico (irmãs de hyperthreading juntas).
+
+    Lê a topologia do Linux em /sys; em outros sistemas, cada CPU lógica
+    vira um grupo.
+    """
+    cores = available_cores() if cores is None else cores
+    groups: Dict[str, List[int]] = {}
+    for cpu in cores:
+        siblings = Path(f"/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list")
+        try:
+            key = siblings.read_text().strip()
+        except OSError:
+            key = str(cpu)
+        groups.setdefault(key, []).append(cpu)
+    return sorted(groups.values())
+
+
+def partition_cores(num_workers: int, cores: Optional[List[int]] = None) -> List[List[int]]:
+    """
+    Dividir as CPUs em `num_workers` grupos disjuntos.
+
+    Núcleos físicos inteiros são distribuídos em blocos contíguos (os
+    primeiros workers recebem o resto da divisão), para que as threads de
+    um worker não disputem o mesmo núcleo com as de outro. Com mais
+    workers que núcleos físicos, as CPUs lógicas são repartidas; com mais
+    workers que CPUs, cada worker fica com uma, compartilhada em rodízio.
+    """
+    num_workers = max(1, num_workers)
+    cores = available_cores() if cores is None else sorted(cores)
+    groups = physical_cores(cores)
+    if num_workers > len(groups):
+        groups = [[cpu] for cpu in cores]
+    if num_workers > len(groups):
+        return [groups[i % len(groups)] for i in range(num_workers)]
+
+    size, extra = divmod(len(groups), num_workers)
+    partitions, start = [], 0
+    for i in range(num_workers):
+        end = start + size + (i < extra)
+        partitions.append(sorted(cpu for group in groups[start:end] for cpu in group))
+        start = end
+    return partitions
+
+
+def format_cores(cores: List[int]) -> str:
+    """[0, 1, 2, 5] -> "0-2,5" (formato do taskset/cpuset)."""
+    ranges, cores = [], sorted(cores)
+    for cpu in cores:
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(f"{a}-{b}" if a != b else str(a) for a, b in ranges)
+
+
+def parse_cores(text: str) -> List[int]:
+    """Inverso de `format_cores`."""
+    cores = []
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        start, _, end = part.partition("-")
+        cores.extend(range(int(start), int(end or start) + 1))
+    return cores
+
+
+def worker_env(cores: List[int], interop_threads: int = 1) -> Dict[str, str]:
+    """
+    Variáveis de ambiente do worker que usa as CPUs `cores`.
+
+    Precisam estar no ambiente antes de importar torch/numpy: os pools de
+    threads do OpenMP e do MKL são dimensionados na carga da biblioteca.
+    """
+    threads = str(len(cores))
+    env = {var: threads for var in THREAD_ENV_VARS}
+    env.update({
+        "TORCH_THREADS": threads,
+        "TORCH_INTEROP_THREADS": str(interop_threads),
+        "CPU_AFFINITY": format_cores(cores),
+    })
+    return env
+
+
+def configure_threads(threads: int, interop_threads: Optional[int] = None) -> bool:
+    """
+    Definir as threads intra-op (e inter-op) do PyTorch neste processo.
+
+    Se o torch ainda não foi importado, ele não é importado só para isso:
+    as variáveis OMP/MKL são exportadas (dimensionam os pools na
+    importação) e o ajuste fica pendente até `apply_pending_threads`.
+    As inter-op só podem ser definidas antes do primeiro trabalho paralelo;
+    depois disso o PyTorch recusa e o valor atual é mantido.
+    """
+    global _pending
+    if "torch" not in sys.modules:
+        if threads > 0:
+            os.environ.update({var: str(threads) for var in THREAD_ENV_VARS})
+        _pending = (threads, interop_threads)
+        return False
+
+    import torch
+
+    if threads > 0:
+        torch.set_num_threads(threads)
+    if interop_threads:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            logger.debug("Threads inter-op já inicializadas; mantendo o valor atual")
+            return False
+    return True
+
+
+def apply_pending_threads():
+    """Aplicar o ajuste adiado por `configure_threads` (chamar após importar o torch)."""
+    global _pending
+    if _pending is not None:
+        threads, interop_threads = _pending
+        _pending = None
+        configure_threads(threads, interop_threads)
+
+
+def apply_cpu_profile(env: Optional[Mapping[str, str]] = None) -> Dict[str, object]:
+    """
+    Aplicar CPU_AFFINITY, TORCH_THREADS e TORCH_INTEROP_THREADS do ambiente.
+
+    Chamar no início do processo (workers, CLI). Variáveis ausentes não
+    mudam nada. Retorna o perfil aplicado.
+    """
+    env = os.environ if env is None else env
+    profile: Dict[str, object] = {}
+
+    affinity = env.get("CPU_AFFINITY", "")
+    if affinity and hasattr(os, "sched_setaffinity"):
+        cores = parse_cores(affinity)
+        try:
+            os.sched_setaffinity(0, cores)
+            profile["cores"] = cores
+        except OSError as e:
+            logger.warning(f"Afinidade {affinity} não aplicada: {e}")
+
+    threads = int(env.get("TORCH_THREADS") or 0)
+    interop = int(env.get("TORCH_INTEROP_THREADS") or 0)
+    if threads or interop:
+        configure_threads(threads, interop or None)
+        profile.update({"threads": threads, "interop_threads": interop})
+    return profile
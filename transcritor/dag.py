@@ -0,0 +1,196 @@
+"""
+🧩 Grafo declarativo de etapas com cache por etapa
+Executa só as etapas necessárias para as saídas pedidas e reaproveita resultados por hash das entradas
+"""
+
+import os
+import json
+import time
+import pickle
+import hashlib
+import logging
+from contextlib import nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Node:
+    """
+    Uma etapa do grafo.
+
+    `fn` recebe o job (dict), lê as chaves de `inputs` e grava as de
+    `outputs`. As chaves de `cached` (subconjunto de `outputs`) são
+    guardadas no cache; as demais (como o áudio decodificado) são baratas
+    de refazer ou grandes demais para o disco. `params(job)` retorna o que,
+    além das entradas, muda o resultado (modelo, idioma, limites...); se
+    retornar None, a etapa não usa o cache nesta execução (ex.: efeitos
+    colaterais como o cadastro de oradores). `version` invalida o cache
+    quando a implementação muda.
+    """
+    name: str
+    fn: Callable[[Dict[str, Any]], None]
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    cached: Tuple[str, ...] = ()
+    params: Optional[Callable[[Dict[str, Any]], Any]] = None
+    version: str = "1"
+
+
+class StageCache:
+    """
+    Resultados de etapas em disco, um pickle por (etapa, chave).
+
+    O cache é gerado por este mesmo código: não aponte o diretório para
+    arquivos de terceiros.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, node: str, key: str) -> Path:
+        return self.directory / node / key[:2] / f"{key}.pkl"
+
+    def load(self, node: str, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(node, key)
+        try:
+            with open(path, "rb") as f:
+                values = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning(f"Cache da etapa {node} ilegível ({e}); recalculando")
+            self.misses += 1
+            return None
+        self.hits += 1
+        return values
+
+    def store(self, node: str, key: str, values: Dict[str, Any]):
+        path = self._path(node, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(values, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+
+def _digest(value: Any) -> str:
+    data = json.dumps(value, sort_keys=True, default=repr, ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class StageGraph:
+    """
+    Grafo de etapas definido pelas chaves que cada uma lê e grava.
+
+    `run(job, targets)` resolve, a partir das saídas pedidas, quais etapas
+    precisam rodar: uma saída encontrada no cache dispensa a etapa que a
+    produz e, com ela, todas as etapas anteriores que só serviam a ela.
+    A chave de cache de uma etapa é o hash do nome, da versão, de
+    `params(job)` e das chaves das etapas de entrada (as raízes usam as
+    impressões digitais passadas em `fingerprints`, como o hash do
+    arquivo de áudio), então é conhecida antes de qualquer execução e
+    mudar só o modelo do Whisper não invalida a diarização.
+    """
+
+    def __init__(self, nodes: Sequence[Node]):
+        self.nodes = list(nodes)
+        self.producers: Dict[str, Node] = {}
+        for node in self.nodes:
+            for key in node.outputs:
+                if key in self.producers:
+                    raise ValueError(f"Chave '{key}' produzida por {self.producers[key].name} e {node.name}")
+                self.producers[key] = node
+            missing = set(node.cached) - set(node.outputs)
+            if missing:
+                raise ValueError(f"Etapa {node.name}: {sorted(missing)} em cached mas não em outputs")
+        # Ordem topológica = ordem de declaração, validada
+        seen: Set[str] = set()
+        for node in self.nodes:
+            for key in node.inputs:
+                producer = self.producers.get(key)
+                if producer is not None and producer.name not in seen:
+                    raise ValueError(f"Etapa {node.name} declarada antes de {producer.name}, que produz '{key}'")
+            seen.add(node.name)
+
+    def keys(self, job: Dict[str, Any], fingerprints: Dict[str, str]) -> Dict[str, Optional[str]]:
+        """Chave de cache de cada etapa (None: não cacheável nesta execução)."""
+        keys: Dict[str, Optional[str]] = {}
+        for node in self.nodes:
+            params = node.params(job) if node.params else {}
+            parts: List[Any] = [node.name, node.version, params]
+            for key in node.inputs:
+                producer = self.producers.get(key)
+                if producer is not None:
+                    parts.append(keys[producer.name])
+                elif key in fingerprints:
+                    parts.append(fingerprints[key])
+                else:
+                    parts.append(_digest(job.get(key)))
+            cacheable = params is not None and all(part is not None for part in parts[3:])
+            keys[node.name] = _digest(parts) if cacheable else None
+        return keys
+
+    def plan(self, targets: Sequence[str], keys: Dict[str, Optional[str]],
+             cache: Optional[StageCache]) -> Tuple[List[Node], Dict[str, Dict[str, Any]]]:
+        """Etapas a rodar (em ordem) e valores carregados do cache por etapa."""
+        run: Set[str] = set()
+        loaded: Dict[str, Dict[str, Any]] = {}
+
+        def need(key: str):
+            node = self.producers.get(key)
+            if node is None or node.name in run:
+                return
+            if key in node.cached and cache is not None and keys[node.name] is not None:
+                if node.name not in loaded:
+                    values = cache.load(node.name, keys[node.name])
+                    if values is not None:
+                        loaded[node.name] = values
+                if node.name in loaded and key in loaded[node.name]:
+                    return
+            run.add(node.name)
+            for dependency in node.inputs:
+                need(dependency)
+
+        for target in targets:
+            need(target)
+        return [node for node in self.nodes if node.name in run], loaded
+
+    def run(self, job: Dict[str, Any], targets: Sequence[str], cache: Optional[StageCache] = None,
+            fingerprints: Optional[Dict[str, str]] = None, profiler: Any = None) -> Dict[str, Any]:
+        """
+        Produzir `targets` no job, rodando só o necessário.
+
+        Registra em job["dag"] as etapas executadas, as lidas do cache e as
+        dispensadas, e em job["timings"] o tempo de cada etapa executada.
+        Com `profiler` (transcritor.profiling.Profiler), cada etapa
+        executada roda dentro de `profiler.stage(nome)`.
+        """
+        keys = self.keys(job, fingerprints or {}) if cache is not None else {n.name: None for n in self.nodes}
+        to_run, loaded = self.plan(targets, keys, cache)
+
+        for values in loaded.values():
+            job.update(values)
+        for node in to_run:
+            inicio = time.perf_counter()
+            with profiler.stage(node.name) if profiler is not None else nullcontext():
+                node.fn(job)
+            job.setdefault("timings", {}).setdefault(node.name, time.perf_counter() - inicio)
+            key = keys[node.name]
+            if cache is not None and key is not None and node.cached:
+                # Só as chaves gravadas: saídas opcionais ausentes continuam ausentes
+                cache.store(node.name, key, {k: job[k] for k in node.cached if k in job})
+
+        ran = [node.name for node in to_run]
+        job["dag"] = {
+            "ran": ran,
+            "cached": [n.name for n in self.nodes if n.name in loaded and n.name not in ran],
+            "skipped": [n.name for n in self.nodes if n.name not in ran and n.name not in loaded]
+        }
+        return job
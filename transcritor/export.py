@@ -0,0 +1,105 @@
+"""
+📝 Exportação de transcrições
+Renderiza txt, srt, vtt e json a partir de um único resultado canônico
+"""
+
+import json
+from typing import Any, Callable, Dict, List, Union
+
+# Duração assumida para o último segmento quando não há tempo de fim
+LAST_SEGMENT_SECONDS = 3.0
+
+Transcript = Union[Dict[str, Any], List[Dict[str, Any]]]
+
+
+def seconds(value: Union[int, float, str, None]) -> float:
+    """Converter segundos ou timestamps HH:MM:SS[.mmm|,mmm] para segundos."""
+    if value is None:
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    total = 0.0
+    for part in value.replace(",", ".").split(":"):
+        total = total * 60 + float(part)
+    return total
+
+
+def _clock(value: float, separator: str) -> str:
+    millis = int(round(value * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def get_segments(transcript: Transcript) -> List[Dict[str, Any]]:
+    """Segmentos de um resultado da API ({"segments": [...]}) ou lista do CLI."""
+    if isinstance(transcript, dict):
+        return transcript.get("segments", [])
+    return transcript
+
+
+def _timed(segments: List[Dict[str, Any]]):
+    """Gerar (início, fim, segmento) com o fim estimado quando ausente."""
+    for i, segment in enumerate(segments):
+        start = seconds(segment.get("start"))
+        if segment.get("end") is not None:
+            end = seconds(segment["end"])
+        elif i + 1 < len(segments):
+            end = seconds(segments[i + 1].get("start"))
+        else:
+            end = start + LAST_SEGMENT_SECONDS
+        yield start, end, segment
+
+
+def _label(segment: Dict[str, Any]) -> str:
+    speaker = segment.get("speaker")
+    text = segment.get("text", "")
+    return f"{speaker}: {text}" if speaker else text
+
+
+def render_txt(transcript: Transcript) -> str:
+    """Texto corrido com timestamp e orador por linha."""
+    lines = ["=== TRANSCRIÇÃO COM DIARIZAÇÃO ===", ""]
+    for start, _, segment in _timed(get_segments(transcript)):
+        lines.append(f"[{_clock(start, '.')[:8]}] {_label(segment)}")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def render_srt(transcript: Transcript) -> str:
+    """Legendas SubRip."""
+    blocks = []
+    for i, (start, end, segment) in enumerate(_timed(get_segments(transcript)), 1):
+        blocks.append(f"{i}\n{_clock(start, ',')} --> {_clock(end, ',')}\n{_label(segment)}\n")
+    return "\n".join(blocks)
+
+
+def render_vtt(transcript: Transcript) -> str:
+    """Legendas WebVTT."""
+    blocks = ["WEBVTT\n"]
+    for start, end, segment in _timed(get_segments(transcript)):
+        blocks.append(f"{_clock(start, '.')} --> {_clock(end, '.')}\n{_label(segment)}\n")
+    return "\n".join(blocks)
+
+
+def render_json(transcript: Transcript) -> str:
+    """O próprio resultado canônico, serializado."""
+    return json.dumps(transcript, ensure_ascii=False, indent=2)
+
+
+RENDERERS: Dict[str, Callable[[Transcript], str]] = {
+    "txt": render_txt,
+    "srt": render_srt,
+    "vtt": render_vtt,
+    "json": render_json,
+}
+
+
+def render(transcript: Transcript, format_type: str) -> str:
+    """Renderizar o resultado no formato pedido (txt, srt, vtt ou json)."""
+    try:
+        renderer = RENDERERS[format_type.lower()]
+    except KeyError:
+        raise ValueError(f"Formato não suportado: {format_type}. Use: {', '.join(RENDERERS)}")
+    return renderer(transcript)
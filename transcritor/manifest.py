@@ -0,0 +1,140 @@
+"""
+📒 Manifesto de processamento em lote
+Diário persistente que permite retomar lotes e pular arquivos já transcritos
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 do conteúdo de um arquivo, lido em blocos."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """
+    Diário de processamento em JSON Lines, só com acréscimos.
+
+    Cada linha registra um arquivo de entrada (caminho, tamanho, mtime e
+    hash do conteúdo), o status do processamento e o checksum de cada
+    saída gerada. Ao reler, vale o último registro de cada caminho; uma
+    linha incompleta no fim (queda no meio da escrita) é ignorada.
+
+    Para decidir se um arquivo precisa ser reprocessado, tamanho e mtime
+    são comparados primeiro; o hash só é recalculado quando eles mudam,
+    então retomar um lote grande custa um `stat` por arquivo.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Linha inválida ignorada no manifesto {self.path}")
+                    continue
+                self.entries[entry["path"]] = entry
+
+    def _append(self, entry: Dict[str, Any]):
+        self.entries[entry["path"]] = entry
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _key(path) -> str:
+        return str(Path(path).resolve())
+
+    def needs_processing(self, path, verify_outputs: bool = False) -> Tuple[bool, str]:
+        """
+        Verificar se um arquivo precisa ser (re)processado.
+
+        Returns:
+            (precisa, motivo)
+        """
+        key = self._key(path)
+        entry = self.entries.get(key)
+        if entry is None:
+            return True, "novo"
+        if entry["status"] != "completed":
+            return True, "falhou antes"
+
+        stat = os.stat(path)
+        if (stat.st_size, stat.st_mtime_ns) != (entry["size"], entry["mtime_ns"]):
+            if stat.st_size != entry["size"] or file_sha256(path) != entry["sha256"]:
+                return True, "modificado"
+            # Só o mtime mudou (ex.: cópia): atualizar para não recalcular o hash
+            self._append({**entry, "mtime_ns": stat.st_mtime_ns, "updated_at": time.time()})
+
+        for output, info in entry.get("outputs", {}).items():
+            output_path = Path(entry["output_dir"]) / output
+            if not output_path.exists() or output_path.stat().st_size != info["size"]:
+                return True, "saída ausente"
+            if verify_outputs and file_sha256(str(output_path)) != info["sha256"]:
+                return True, "saída alterada"
+
+        return False, "concluído"
+
+    def record(self, path, status: str, output_dir: Optional[str] = None,
+               error: Optional[str] = None, outputs: Iterable[str] = (), **extra):
+        """
+        Registrar o resultado do processamento de um arquivo.
+
+        `outputs` são os arquivos gravados para ele (ex.: o retorno de
+        save_outputs); só eles recebem checksum, não o restante de
+        `output_dir` (áudio extraído, perfis, saídas de outras entradas).
+        """
+        stat = os.stat(path)
+        checksums = {}
+        if status == "completed" and output_dir:
+            for output in sorted(outputs):
+                output = Path(output)
+                if output.is_file():
+                    checksums[os.path.relpath(output, output_dir)] = {
+                        "size": output.stat().st_size,
+                        "sha256": file_sha256(str(output))
+                    }
+
+        self._append({
+            "path": self._key(path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": file_sha256(str(path)),
+            "status": status,
+            "output_dir": str(output_dir) if output_dir else None,
+            "outputs": checksums,
+            "error": error,
+            "updated_at": time.time(),
+            **extra
+        })
+
+    def compact(self):
+        """Reescrever o diário com apenas o último registro de cada arquivo."""
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
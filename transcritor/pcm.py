@@ -0,0 +1,103 @@
+"""
+💽 Áudio decodificado em disco, mapeado em memória e lido por janelas
+PCM float32 mono em arquivo (np.memmap) para que gravações de horas não ocupem a RAM de cada etapa
+"""
+
+import os
+import tempfile
+import subprocess
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+DTYPE = np.float32
+
+
+def _map(path: str) -> np.ndarray:
+    """
+    Mapear um arquivo PCM float32 e apagá-lo do diretório.
+
+    O mapeamento é copy-on-write ("c"): as páginas lidas continuam sendo do
+    arquivo (o kernel as descarta quando precisa de memória) e o array é
+    gravável para bibliotecas que exigem isso (torch.from_numpy), sem
+    alterar o arquivo. No Linux/macOS o arquivo é removido logo após o
+    mapeamento e o espaço em disco é liberado quando o array é coletado;
+    onde isso não é possível (Windows), ele fica no diretório de trabalho.
+    """
+    if os.path.getsize(path) == 0:
+        audio = np.zeros(0, dtype=DTYPE)
+    else:
+        audio = np.memmap(path, dtype=DTYPE, mode="c")
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+    return audio
+
+
+def _temp_path(work_dir: Optional[str], prefix: str) -> str:
+    if work_dir:
+        os.makedirs(work_dir, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix=prefix, suffix=".f32", dir=work_dir or None)
+    os.close(fd)
+    return path
+
+
+def decode(input_path: str, work_dir: Optional[str] = None, sample_rate: int = 16000) -> np.ndarray:
+    """
+    Decodificar um arquivo de áudio/vídeo (ffmpeg) para PCM float32 mono mapeado do disco.
+
+    O ffmpeg grava direto no arquivo, então o áudio nunca é materializado
+    na memória do processo (whisper.load_audio lê tudo pelo pipe e ainda
+    converte de int16, com pico de ~1,5x o tamanho em float32). Os valores
+    são os mesmos do whisper.load_audio.
+    """
+    path = _temp_path(work_dir, "pcm-")
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0", "-loglevel", "error", "-y",
+        "-i", input_path, "-f", "f32le", "-ac", "1", "-acodec", "pcm_f32le", "-ar", str(sample_rate), path
+    ]
+    try:
+        subprocess.run(cmd, capture_output=True, check=True)
+    except subprocess.CalledProcessError as e:
+        os.unlink(path)
+        raise RuntimeError(f"Falha ao decodificar o áudio: {e.stderr.decode(errors='replace').strip()}") from e
+    return _map(path)
+
+
+def write(pieces: Iterable[np.ndarray], work_dir: Optional[str] = None) -> np.ndarray:
+    """Concatenar `pieces` em um arquivo PCM mapeado (sem montar o resultado na RAM)."""
+    path = _temp_path(work_dir, "pcm-")
+    with open(path, "wb") as f:
+        for piece in pieces:
+            np.asarray(piece, dtype=DTYPE).tofile(f)
+    return _map(path)
+
+
+def split_windows(audio: np.ndarray, sample_rate: int = 16000, window_seconds: float = 600.0,
+                  search_seconds: float = 5.0, frame_seconds: float = 0.1) -> List[Tuple[int, int]]:
+    """
+    Janelas (início, fim), em amostras, de até `window_seconds` cobrindo o áudio.
+
+    Cada corte é feito no quadro de menor energia dos últimos
+    `search_seconds` da janela, para não partir palavras ao meio. Com
+    `window_seconds` <= 0 ou áudio curto, retorna uma única janela.
+    """
+    total = len(audio)
+    size = int(window_seconds * sample_rate)
+    if window_seconds <= 0 or total <= size:
+        return [(0, total)]
+
+    frame = max(1, int(frame_seconds * sample_rate))
+    search = min(int(search_seconds * sample_rate), size // 2)
+    windows, start = [], 0
+    while total - start > size:
+        search_start = start + size - search
+        region = np.asarray(audio[search_start:start + size], dtype=DTYPE)
+        frames = len(region) // frame
+        energy = np.square(region[:frames * frame].reshape(frames, frame)).mean(axis=1)
+        cut = search_start + int(np.argmin(energy)) * frame + frame // 2
+        windows.append((start, cut))
+        start = cut
+    windows.append((start, total))
+    return windows
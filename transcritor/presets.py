@@ -0,0 +1,84 @@
+"""
+🎛️ Presets de transcrição
+Configurações tipadas para reuniões, entrevistas, podcasts e lotes
+"""
+
+from dataclasses import dataclass, replace
+from typing import Dict, Optional, Tuple, Union
+
+
+@dataclass(frozen=True)
+class Preset:
+    """
+    Configuração de uma transcrição.
+
+    Substitui os dicionários de variáveis de ambiente dos scripts: os
+    campos valem só para quem usa o preset, sem alterar o processo.
+    """
+    name: str
+    model: str = "medium"
+    asr_backend: str = "whisper"
+    compute_type: Optional[str] = None  # None: COMPUTE_TYPE do .env; "int8" na CPU
+    draft_model: Optional[str] = None  # ex.: "tiny": rascunho rápido, `model` só nos trechos duvidosos
+    language: str = "pt"
+    output_formats: Tuple[str, ...] = ("txt",)
+    enable_diarization: bool = True
+    num_speakers: Optional[int] = None
+    min_speakers: Optional[int] = None
+    max_speakers: Optional[int] = None
+    vad: bool = False
+    description: str = ""
+
+    def with_options(self, **changes) -> "Preset":
+        """Cópia do preset com alguns campos alterados."""
+        return replace(self, **changes)
+
+
+PADRAO = Preset(name="padrao", description="Configuração padrão")
+
+REUNIAO = Preset(
+    name="reuniao",
+    model="medium",
+    output_formats=("txt", "json", "srt"),
+    min_speakers=2,
+    max_speakers=8,
+    description="Reunião Corporativa"
+)
+
+ENTREVISTA = Preset(
+    name="entrevista",
+    model="large",
+    output_formats=("txt", "json"),
+    num_speakers=2,  # Geralmente entrevistador + entrevistado
+    description="Entrevista Jornalística (Máxima Qualidade)"
+)
+
+PODCAST = Preset(
+    name="podcast",
+    model="medium",
+    output_formats=("txt", "srt", "json"),
+    min_speakers=2,
+    max_speakers=5,
+    description="Podcast (Otimizado para conteúdo longo)"
+)
+
+LOTE = Preset(
+    name="lote",
+    model="medium",
+    output_formats=("txt", "json"),
+    description="Processamento em lote"
+)
+
+PRESETS: Dict[str, Preset] = {
+    preset.name: preset for preset in (PADRAO, REUNIAO, ENTREVISTA, PODCAST, LOTE)
+}
+
+
+def get_preset(preset: Union[str, Preset]) -> Preset:
+    """Resolver um preset pelo nome (ou devolver o próprio objeto)."""
+    if isinstance(preset, Preset):
+        return preset
+    try:
+        return PRESETS[preset]
+    except KeyError:
+        raise ValueError(f"Preset desconhecido: {preset}. Use: {', '.join(PRESETS)}")
@@ -0,0 +1,221 @@
+"""
+🔬 Perfil de desempenho por etapa
+cProfile por etapa, trace do profiler do PyTorch e linha do tempo salvos junto dos resultados
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import pstats
+import cProfile
+import argparse
+import threading
+import importlib.util
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Etapas que executam modelos: só nelas o profiler do PyTorch é ligado
+TORCH_STAGES = ("diarization", "transcription")
+
+TIMELINE_FILE = "timeline.json"
+
+
+class Profiler:
+    """
+    Coleta de perfil de um job, etapa por etapa.
+
+    Cada `stage(nome)` grava `<nome>.pstats` (cProfile) e, nas etapas de
+    modelo, `torch_<nome>.json` (torch.profiler, formato Chrome trace);
+    `save()` grava a linha do tempo (`timeline.json`, também no formato
+    Chrome trace: abre em chrome://tracing ou ui.perfetto.dev) com o
+    início e a duração de cada etapa. O trace do PyTorch cresce com a
+    duração do áudio: `torch_trace=False` o desliga.
+
+    O cProfile só admite um perfil ativo por vez (a partir do Python 3.12,
+    para o processo todo), assim como o profiler do PyTorch: com jobs
+    perfilados em paralelo, uma etapa que encontra outro perfil ativo fica
+    sem ele (só na linha do tempo, no caso do cProfile).
+    """
+
+    def __init__(self, directory: str, torch_trace: bool = True):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.torch_trace = torch_trace
+        self.events: List[Dict[str, Any]] = []
+        self._t0 = time.perf_counter()
+        self._started_at = time.time()
+        self._lock = threading.Lock()
+
+    def _torch_profiler(self):
+        if importlib.util.find_spec("torch") is None:
+            return None
+        import torch
+        from torch.profiler import ProfilerActivity, profile
+
+        activities = [ProfilerActivity.CPU]
+        if torch.cuda.is_available():
+            activities.append(ProfilerActivity.CUDA)
+        return profile(activities=activities, record_shapes=True)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Perfilar o bloco como a etapa `name`."""
+        torch_profiler = self._torch_profiler() if self.torch_trace and name in TORCH_STAGES else None
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        if torch_profiler is not None:
+            try:
+                torch_profiler.__enter__()
+            except RuntimeError:
+                # Outro trace do PyTorch já ativo (jobs perfilados em paralelo)
+                torch_profiler = None
+        try:
+            profile.enable()
+        except ValueError:
+            # Outro profiler já ativo no processo (ex.: etapa aninhada)
+            profile = None
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            end = time.perf_counter()
+            if torch_profiler is not None:
+                torch_profiler.__exit__(None, None, None)
+                torch_profiler.export_chrome_trace(str(self.directory / f"torch_{name}.json"))
+            if profile is not None:
+                profile.dump_stats(str(self.directory / f"{name}.pstats"))
+            with self._lock:
+                self.events.append({
+                    "name": name,
+                    "start": start - self._t0,
+                    "seconds": end - start,
+                    "thread": threading.current_thread().name
+                })
+
+    def save(self, **metadata) -> str:
+        """Gravar a linha do tempo (e `metadata`) e retornar o caminho."""
+        with self._lock:
+            events = sorted(self.events, key=lambda event: event["start"])
+        threads = {name: i for i, name in enumerate(dict.fromkeys(e["thread"] for e in events))}
+        timeline = {
+            "traceEvents": [
+                {
+                    "name": event["name"], "ph": "X", "pid": os.getpid(), "tid": threads[event["thread"]],
+                    "ts": round(event["start"] * 1e6), "dur": round(event["seconds"] * 1e6)
+                }
+                for event in events
+            ],
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "started_at": self._started_at,
+                "total_seconds": time.perf_counter() - self._t0,
+                "stages": [{"name": e["name"], "start": round(e["start"], 4), "seconds": round(e["seconds"], 4)}
+                           for e in events],
+                **metadata
+            }
+        }
+        path = self.directory / TIMELINE_FILE
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(timeline, f, ensure_ascii=False, indent=2, default=str)
+        return str(path)
+
+    def stages(self) -> Dict[str, float]:
+        """Tempo de parede de cada etapa (segundos)."""
+        with self._lock:
+            return {event["name"]: round(event["seconds"], 4) for event in self.events}
+
+
+def summarize(directory: str, top: int = 20, sort: str = "tottime",
+              stage: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Principais pontos quentes de um diretório de perfil.
+
+    Junta os .pstats das etapas (ou só de `stage`) e ordena as funções por
+    `sort` ("tottime": tempo na própria função; "cumtime": incluindo as
+    chamadas). Traz também o tempo de parede de cada etapa da linha do tempo.
+    """
+    directory = Path(directory)
+    if sort not in ("tottime", "cumtime", "calls"):
+        raise ValueError(f"Ordenação inválida: {sort} (use tottime, cumtime ou calls)")
+    if stage is not None and not re.fullmatch(r"[A-Za-z_]+", stage):
+        # `stage` compõe um padrão de arquivo: nada de caminhos fora do diretório
+        raise ValueError(f"Etapa inválida: {stage}")
+
+    stages = []
+    timeline = directory / TIMELINE_FILE
+    if timeline.exists():
+        with open(timeline, encoding="utf-8") as f:
+            stages = json.load(f).get("otherData", {}).get("stages", [])
+
+    files = sorted(directory.glob(f"{stage}.pstats" if stage else "*.pstats"))
+    hotspots = []
+    if files:
+        stats = pstats.Stats(*[str(path) for path in files])
+        total = stats.total_tt or 1.0
+        for (filename, line, function), (_, calls, tottime, cumtime, _) in stats.stats.items():
+            hotspots.append({
+                "function": function,
+                "location": f"{filename}:{line}" if line else filename,
+                "calls": calls,
+                "tottime": round(tottime, 4),
+                "cumtime": round(cumtime, 4),
+                "share": round(tottime / total, 4)
+            })
+        hotspots.sort(key=lambda item: item[sort], reverse=True)
+
+    return {
+        "directory": str(directory),
+        "stages": stages,
+        "profiles": [path.stem for path in files],
+        "torch_traces": sorted(path.name for path in directory.glob("torch_*.json")),
+        "sort": sort,
+        "hotspots": hotspots[:top]
+    }
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    """Resumo legível de `summarize`."""
+    lines = [f"Perfil: {summary['directory']}"]
+    if summary["stages"]:
+        total = sum(stage["seconds"] for stage in summary["stages"]) or 1.0
+        lines.append("")
+        lines.append(f"{'etapa':<16} {'segundos':>10} {'%':>6}")
+        for stage in summary["stages"]:
+            lines.append(f"{stage['name']:<16} {stage['seconds']:>10.2f} {stage['seconds'] / total:>6.0%}")
+    if summary["hotspots"]:
+        lines.append("")
+        lines.append(f"{'tottime':>9} {'cumtime':>9} {'chamadas':>9} {'%':>6}  função")
+        for spot in summary["hotspots"]:
+            lines.append(
+                f"{spot['tottime']:>9.3f} {spot['cumtime']:>9.3f} {spot['calls']:>9} {spot['share']:>6.1%}  "
+                f"{spot['function']} ({spot['location']})"
+            )
+    if summary["torch_traces"]:
+        lines.append("")
+        lines.append("Traces do PyTorch (chrome://tracing ou ui.perfetto.dev): " + ", ".join(summary["torch_traces"]))
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Resumir os pontos quentes de um perfil (--profile do CLI ou profile=true na API)"
+    )
+    parser.add_argument("directory", help="Diretório do perfil (ex.: output/reuniao.profile)")
+    parser.add_argument("--top", type=int, default=20, help="Número de funções (padrão: 20)")
+    parser.add_argument("--sort", choices=["tottime", "cumtime", "calls"], default="tottime",
+                        help="Ordenação (padrão: tottime, tempo na própria função)")
+    parser.add_argument("--stage", default=None, help="Só esta etapa (ex.: transcription)")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        print(f"❌ Diretório não encontrado: {args.directory}")
+        sys.exit(1)
+    print(format_summary(summarize(args.directory, args.top, args.sort, args.stage)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+🔢 Quantização int8 dinâmica para inferência em CPU
+Converte as camadas lineares do Whisper (e, quando possível, do pyannote) para int8
+"""
+
+import os
+import time
+import logging
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+import torch
+from torch import nn
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "transcritor")
+
+# Tipos de camada com versão dinâmica int8 no PyTorch
+DYNAMIC_LAYERS = {nn.Linear, nn.LSTM}
+
+
+def quantize_dynamic(module: nn.Module, layers=None) -> nn.Module:
+    """
+    Quantizar pesos de camadas lineares/LSTM para int8 (ativações em float).
+
+    Subclasses de nn.Linear (como a do Whisper, que só converte o dtype no
+    forward) não são reconhecidas pelo PyTorch e viram nn.Linear antes.
+    """
+    for child in module.modules():
+        if isinstance(child, nn.Linear) and type(child) is not nn.Linear:
+            child.__class__ = nn.Linear
+    return torch.ao.quantization.quantize_dynamic(module.cpu().eval(), layers or DYNAMIC_LAYERS, dtype=torch.qint8)
+
+
+def _cache_path(model_name: str, cache_dir: str) -> Path:
+    # A serialização depende das versões do torch e do whisper
+    import whisper
+    version = f"torch{torch.__version__}-whisper{getattr(whisper, '__version__', '0')}"
+    return Path(cache_dir) / f"whisper-{model_name}-int8-{version}.pt".replace("+", "_")
+
+
+@contextmanager
+def _exclusive(lock_path: Path):
+    """
+    Trava entre processos (flock) enquanto o modelo é quantizado.
+
+    Workers que iniciam juntos esperam o primeiro gravar o cache em vez de
+    cada um carregar o fp32 e quantizar ao mesmo tempo. Sem fcntl, não trava.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(lock_path, "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _load_cached(path: Path, model_name: str):
+    """Modelo quantizado do cache, ou None se ausente ou inválido."""
+    if not path.exists():
+        return None
+    try:
+        model = torch.load(path, map_location="cpu", weights_only=False)
+        logger.info(f"Whisper {model_name} int8 carregado do cache: {path}")
+        return model.eval()
+    except Exception as e:
+        logger.warning(f"Cache int8 inválido ({e}); quantizando novamente")
+        return None
+
+
+def load_quantized_whisper(model_name: str, cache_dir: Optional[str] = None, download_root: Optional[str] = None):
+    """
+    Carregar um modelo Whisper com as camadas lineares em int8 (só CPU).
+
+    A primeira carga quantiza o modelo fp32 e grava o resultado em
+    `cache_dir`; as seguintes leem o modelo já quantizado, sem carregar os
+    pesos fp32 (o arquivo tem cerca de 1/3 do tamanho). O cache é um
+    pickle do torch gerado por este mesmo código: não aponte `cache_dir`
+    para arquivos de terceiros.
+
+    Vários processos podem chamar ao mesmo tempo (workers do lote): só um
+    quantiza, os demais esperam a trava e leem o cache gravado.
+    """
+    import whisper
+
+    path = _cache_path(model_name, cache_dir or DEFAULT_CACHE_DIR)
+    model = _load_cached(path, model_name)
+    if model is not None:
+        return model
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _exclusive(path.with_suffix(".lock")):
+        # Outro processo pode ter gravado o cache enquanto esperávamos
+        model = _load_cached(path, model_name)
+        if model is not None:
+            return model
+
+        inicio = time.perf_counter()
+        model = quantize_dynamic(whisper.load_model(model_name, device="cpu", download_root=download_root))
+        logger.info(f"Whisper {model_name} quantizado em {time.perf_counter() - inicio:.1f}s")
+
+        fd, tmp = tempfile.mkstemp(prefix=f"{path.stem}-", suffix=".tmp", dir=path.parent)
+        os.close(fd)
+        try:
+            torch.save(model, tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    return model
+
+
+def quantize_diarization(pipeline) -> bool:
+    """
+    Quantizar os modelos do pipeline do pyannote onde houver ganho.
+
+    A segmentação (PyanNet: LSTM + lineares) é quantizada por inteiro; no
+    modelo de embeddings (WeSpeaker, quase todo convolucional) só as
+    camadas lineares finais mudam. Leva menos de um segundo, então não há
+    cache em disco. Retorna False se a estrutura do pipeline não for a
+    esperada (versões diferentes do pyannote) e nada for alterado.
+    """
+    changed = False
+    segmentation = getattr(getattr(pipeline, "_segmentation", None), "model", None)
+    if isinstance(segmentation, nn.Module):
+        pipeline._segmentation.model = quantize_dynamic(segmentation)
+        changed = True
+
+    embedding = getattr(pipeline, "_embedding", None)
+    embedding_model = getattr(embedding, "model_", None)
+    if isinstance(embedding_model, nn.Module):
+        embedding.model_ = quantize_dynamic(embedding_model, {nn.Linear})
+        changed = True
+    return changed
@@ -0,0 +1,140 @@
+"""
+📈 Relatório de desempenho de lotes
+Registros por arquivo em JSONL e CSV e resumo com percentis para comparar execuções
+"""
+
+import csv
+import json
+import math
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+# Etapas com coluna própria no CSV (ver transcrever.file_stages)
+STAGES = ["decode", "vad", "diarization", "transcription", "alignment", "export"]
+
+CSV_FIELDS = [
+    "run_id", "file", "success", "error_class", "model", "worker",
+    "audio_seconds", "wall_seconds", "rtf", "peak_rss_mb", "finished_at"
+] + [f"{stage}_seconds" for stage in STAGES]
+
+
+def percentile(values: Sequence[float], p: float) -> Optional[float]:
+    """Percentil `p` (0-100) com interpolação linear; None se não houver valores."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class BatchReport:
+    """
+    Relatório de uma execução em lote.
+
+    Cada arquivo concluído vira uma linha em `<nome>.jsonl` e em
+    `<nome>.csv`; os arquivos só recebem acréscimos, com `run_id`
+    identificando a execução, para comparar lotes ao longo do tempo. O
+    resumo de cada execução é acrescentado a `<nome>_resumos.jsonl`.
+    """
+
+    def __init__(self, output_dir: str, name: str = "relatorio_lote", run_id: Optional[str] = None):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.jsonl_path = self.output_dir / f"{name}.jsonl"
+        self.csv_path = self.output_dir / f"{name}.csv"
+        self.summary_path = self.output_dir / f"{name}_resumos.jsonl"
+        self.run_id = run_id or time.strftime("%Y%m%d-%H%M%S")
+        self.records: List[Dict[str, Any]] = []
+        self._started_at = time.time()
+
+    def add(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Registrar o resultado de um arquivo (mensagem "done" do WorkerPool).
+
+        O fator de tempo real (RTF) é o tempo de relógio dividido pela
+        duração do áudio: abaixo de 1, mais rápido que tempo real.
+        """
+        audio_seconds = result.get("audio_seconds") or 0.0
+        wall_seconds = result.get("duracao") or 0.0
+        record = {
+            "run_id": self.run_id,
+            "file": str(result["path"]),
+            "success": bool(result["sucesso"]),
+            "error_class": result.get("error_class"),
+            "model": result.get("model"),
+            "worker": result.get("worker"),
+            "audio_seconds": round(audio_seconds, 3),
+            "wall_seconds": round(wall_seconds, 3),
+            "rtf": round(wall_seconds / audio_seconds, 4) if audio_seconds else None,
+            "peak_rss_mb": result.get("peak_rss_mb"),
+            "escalated_ratio": result.get("escalated_ratio"),
+            "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "timings": {name: round(value, 3) for name, value in (result.get("timings") or {}).items()}
+        }
+        self.records.append(record)
+
+        with open(self.jsonl_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        new_file = not self.csv_path.exists()
+        with open(self.csv_path, "a", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            if new_file:
+                writer.writeheader()
+            row = {key: record[key] for key in CSV_FIELDS if key in record}
+            row.update({f"{stage}_seconds": record["timings"].get(stage) for stage in STAGES})
+            writer.writerow(row)
+
+        return record
+
+    def summary(self, slowest: int = 5) -> Dict[str, Any]:
+        """Resumo da execução: percentis de latência, vazão e arquivos mais lentos."""
+        wall_seconds = time.time() - self._started_at
+        succeeded = [r for r in self.records if r["success"]]
+        latencies = [r["wall_seconds"] for r in succeeded]
+        rtfs = [r["rtf"] for r in succeeded if r["rtf"] is not None]
+        audio_seconds = sum(r["audio_seconds"] for r in succeeded)
+
+        stage_totals: Dict[str, float] = {}
+        for record in succeeded:
+            for name, value in record["timings"].items():
+                stage_totals[name] = stage_totals.get(name, 0.0) + value
+
+        # Transcrição em duas passadas: fração do áudio escalada ao modelo principal
+        speculative = [r for r in succeeded if r.get("escalated_ratio") is not None]
+        speculative_audio = sum(r["audio_seconds"] for r in speculative)
+        escalated_audio = sum(r["escalated_ratio"] * r["audio_seconds"] for r in speculative)
+
+        def rounded(value):
+            return round(value, 3) if value is not None else None
+
+        return {
+            "run_id": self.run_id,
+            "files": len(self.records),
+            "succeeded": len(succeeded),
+            "failed": len(self.records) - len(succeeded),
+            "error_classes": dict(Counter(r["error_class"] or "desconhecido" for r in self.records if not r["success"])),
+            "models": sorted({r["model"] for r in self.records if r["model"]}),
+            "audio_hours": round(audio_seconds / 3600, 4),
+            "wall_hours": round(wall_seconds / 3600, 4),
+            "audio_hours_per_wall_hour": round(audio_seconds / wall_seconds, 3) if wall_seconds else None,
+            "latency_seconds": {f"p{p}": rounded(percentile(latencies, p)) for p in (50, 95, 99)},
+            "rtf": {f"p{p}": rounded(percentile(rtfs, p)) for p in (50, 95, 99)},
+            "peak_rss_mb": max((r["peak_rss_mb"] for r in self.records if r["peak_rss_mb"]), default=None),
+            "stage_seconds": {name: round(value, 3) for name, value in stage_totals.items()},
+            "escalated_ratio": round(escalated_audio / speculative_audio, 4) if speculative_audio else None,
+            "slowest": [
+                {"file": r["file"], "wall_seconds": r["wall_seconds"], "rtf": r["rtf"]}
+                for r in sorted(succeeded, key=lambda r: r["wall_seconds"], reverse=True)[:slowest]
+            ]
+        }
+
+    def finish(self, **extra) -> Dict[str, Any]:
+        """Calcular o resumo e acrescentá-lo ao histórico de execuções."""
+        summary = {**self.summary(), **extra}
+        with open(self.summary_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(summary, ensure_ascii=False) + "\n")
+        return summary
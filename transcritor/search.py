@@ -0,0 +1,254 @@
+"""
+🔎 Índice de busca textual sobre as transcrições concluídas
+SQLite FTS5 com postings por segmento (job, tempos e orador) e tokenização sem acentos
+"""
+
+import re
+import time
+import sqlite3
+import logging
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Set
+
+from transcritor.export import seconds
+
+logger = logging.getLogger(__name__)
+
+# unicode61 com remove_diacritics 2: "ação", "acao" e "AÇÃO" são o mesmo
+# termo, o que cobre grafias sem acento, erros do ASR e buscas digitadas às
+# pressas. O índice de prefixos (2 e 3 letras) acelera buscas com "*".
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS segments USING fts5(
+    text,
+    speaker UNINDEXED,
+    job_id UNINDEXED,
+    position UNINDEXED,
+    start_time UNINDEXED,
+    end_time UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    filename TEXT,
+    segment_count INTEGER NOT NULL,
+    first_rowid INTEGER,
+    last_rowid INTEGER,
+    duration REAL,
+    indexed_at REAL NOT NULL
+);
+"""
+
+# Termos da busca: frases entre aspas ou palavras (com * opcional no fim)
+_TERM = re.compile(r'"([^"]+)"|(\w+\*?)', re.UNICODE)
+
+
+def to_fts_query(query: str) -> str:
+    """
+    Converter a busca digitada em uma consulta FTS5 segura.
+
+    Cada palavra vira um termo entre aspas (todos obrigatórios); "frases
+    entre aspas" são mantidas e `palavra*` busca por prefixo. Operadores e
+    pontuação do FTS5 digitados pelo usuário não causam erro de sintaxe.
+    """
+    terms = []
+    for phrase, word in _TERM.findall(query):
+        if phrase:
+            words = re.findall(r"\w+", phrase, re.UNICODE)
+            if words:
+                terms.append('"' + " ".join(words) + '"')
+        elif word.endswith("*"):
+            terms.append(f'"{word[:-1]}"*')
+        else:
+            terms.append(f'"{word}"')
+    return " ".join(terms)
+
+
+def snippet(text: str, fts_query: str, width: int = 16) -> str:
+    """
+    Trecho de `text` em torno do primeiro termo da consulta, com os termos entre [ ].
+
+    Feito em Python (e não com snippet() do FTS5) para que só os
+    resultados da página paguem por ele; acentos são ignorados como no índice.
+    """
+    terms = []
+    for phrase, star in re.findall(r'"([^"]+)"(\*?)', fts_query):
+        words = phrase.split()
+        words[-1] += star
+        terms.extend(_fold(word) for word in words)
+    words = text.split()
+    marked, first = [], None
+    for i, word in enumerate(words):
+        token = _fold(re.sub(r"\W", "", word))
+        if token and any(token.startswith(t[:-1]) if t.endswith("*") else token == t for t in terms):
+            marked.append(f"[{word}]")
+            first = i if first is None else first
+        else:
+            marked.append(word)
+    start = max(0, (first or 0) - width // 2)
+    end = start + width
+    return ("…" if start else "") + " ".join(marked[start:end]) + ("…" if end < len(words) else "")
+
+
+def _fold(text: str) -> str:
+    """Minúsculas sem acentos (equivalente ao remove_diacritics do índice)."""
+    return "".join(
+        c for c in unicodedata.normalize("NFD", text.lower()) if not unicodedata.combining(c)
+    )
+
+
+class SearchIndex:
+    """
+    Índice invertido persistente dos segmentos de todas as transcrições.
+
+    Cada segmento é um documento do FTS5 com o texto indexado e o job, o
+    orador, a posição e os tempos guardados junto, então um resultado já
+    traz o ponto para onde pular no áudio. A tabela `jobs` registra o que
+    foi indexado e o intervalo de rowids de cada job (os segmentos de um
+    job são inseridos juntos), para que reindexar ou remover um job não
+    percorra a tabela inteira.
+    Uma conexão é compartilhada entre threads e protegida por um lock; o
+    banco usa WAL para que leituras não esperem por gravações de outro
+    processo.
+    """
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    def add(self, job_id: str, segments: Iterable[Dict[str, Any]], filename: Optional[str] = None,
+            duration: Optional[float] = None) -> int:
+        """
+        Indexar (ou reindexar) os segmentos de um job.
+
+        Os tempos podem vir em segundos ou como timestamps HH:MM:SS.mmm
+        (formato do resultado da API). Retorna o número de segmentos.
+        """
+        rows = [
+            (segment["text"], segment.get("speaker") or "", job_id, position,
+             seconds(segment["start"]), seconds(segment["end"]))
+            for position, segment in enumerate(segments)
+            if segment.get("text", "").strip()
+        ]
+        with self._lock, self._conn:
+            self._delete(job_id)
+            first = self._conn.execute("SELECT COALESCE(MAX(rowid), 0) + 1 FROM segments").fetchone()[0]
+            self._conn.executemany(
+                "INSERT INTO segments (rowid, text, speaker, job_id, position, start_time, end_time) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(first + i, *row) for i, row in enumerate(rows)]
+            )
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, filename, segment_count, first_rowid, last_rowid, duration, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, filename, len(rows), first, first + len(rows) - 1, duration, time.time())
+            )
+        return len(rows)
+
+    def remove(self, job_id: str) -> bool:
+        """Retirar um job do índice; retorna False se ele não estava indexado."""
+        with self._lock, self._conn:
+            return self._delete(job_id)
+
+    def _delete(self, job_id: str) -> bool:
+        row = self._conn.execute(
+            "SELECT first_rowid, last_rowid FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return False
+        self._conn.execute("DELETE FROM segments WHERE rowid BETWEEN ? AND ?", (row[0], row[1]))
+        self._conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+        return True
+
+    def jobs(self) -> Set[str]:
+        """IDs dos jobs indexados."""
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT job_id FROM jobs")}
+
+    def search(self, query: str, limit: int = 20, offset: int = 0, job_id: Optional[str] = None,
+               speaker: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Buscar segmentos, do mais ao menos relevante (BM25).
+
+        `job_id` e `speaker` restringem a busca. Cada resultado traz o job,
+        os tempos (para pular no áudio), o orador, o texto e um trecho com
+        os termos marcados entre [ ]. Todas as ocorrências entram na
+        ordenação; `total` é o número delas, para a paginação.
+        """
+        fts_query = to_fts_query(query)
+        if not fts_query:
+            return {"query": query, "hits": [], "total": 0, "took_ms": 0.0}
+
+        filters, params = "", [fts_query]
+        if job_id:
+            filters += " AND job_id = ?"
+            params.append(job_id)
+        if speaker:
+            filters += " AND speaker = ?"
+            params.append(speaker)
+        # ORDER BY rank é a ordenação do próprio FTS5 (bm25), feita dentro
+        # do módulo com LIMIT/OFFSET; o trecho (snippet) e o nome do
+        # arquivo só são buscados para a página devolvida
+        sql = f"""
+            SELECT c.job_id, c.position, c.start_time, c.end_time, c.speaker, c.text, c.score,
+                   jobs.filename
+            FROM (
+                SELECT job_id, position, start_time, end_time, speaker, text, rank AS score
+                FROM segments
+                WHERE segments MATCH ?{filters}
+                ORDER BY rank LIMIT ? OFFSET ?
+            ) AS c LEFT JOIN jobs ON jobs.job_id = c.job_id
+            ORDER BY c.score
+        """
+        count_sql = f"SELECT COUNT(*) FROM segments WHERE segments MATCH ?{filters}"
+
+        inicio = time.perf_counter()
+        with self._lock:
+            rows = self._conn.execute(sql, params + [limit, offset]).fetchall()
+            total = self._conn.execute(count_sql, params).fetchone()[0]
+        took_ms = (time.perf_counter() - inicio) * 1000
+
+        hits = [
+            {
+                "job_id": row["job_id"],
+                "filename": row["filename"],
+                "segment": row["position"],
+                "start": row["start_time"],
+                "end": row["end_time"],
+                "speaker": row["speaker"],
+                "text": row["text"],
+                "snippet": snippet(row["text"], fts_query),
+                "score": round(-row["score"], 4)  # bm25 do SQLite: menor é melhor
+            }
+            for row in rows
+        ]
+        return {"query": query, "hits": hits, "total": total, "took_ms": round(took_ms, 2)}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            jobs, segments = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(segment_count), 0) FROM jobs"
+            ).fetchone()
+        return {"jobs": jobs, "segments": segments, "path": self.path}
+
+    def optimize(self):
+        """Fundir os segmentos internos do FTS5 (depois de cargas grandes)."""
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO segments (segments) VALUES ('optimize')")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        return self.stats()["segments"]
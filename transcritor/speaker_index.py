@@ -0,0 +1,161 @@
+"""
+🗣️ Índice de voiceprints para identificar oradores entre gravações
+Guarda embeddings de oradores cadastrados e resolve rótulos SPEAKER_XX em nomes
+"""
+
+import os
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SpeakerIndex:
+    """
+    Índice persistente de voiceprints apoiado em uma matriz NumPy.
+
+    Os embeddings são normalizados no cadastro, então a similaridade de
+    cosseno de várias consultas contra todo o índice é um único produto
+    de matrizes. Um mesmo nome pode ter vários voiceprints (gravações
+    diferentes), o que melhora o reconhecimento.
+    """
+
+    def __init__(self, dim: Optional[int] = None):
+        self.dim = dim
+        self.names: List[str] = []
+        self._matrix = np.empty((0, dim or 0), dtype=np.float32)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        """Voiceprints cadastrados (normalizados), uma linha por cadastro."""
+        return self._matrix[:self._count]
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def add(self, name: str, embeddings: np.ndarray):
+        """Cadastrar um ou mais voiceprints para `name`."""
+        vectors = self._normalize(embeddings)
+        vectors = vectors[np.isfinite(vectors).all(axis=1)]
+        if not len(vectors):
+            return
+
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            self._matrix = np.empty((0, self.dim), dtype=np.float32)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Dimensão {vectors.shape[1]} diferente da do índice ({self.dim})")
+
+        # Crescimento geométrico para cadastros incrementais baratos
+        needed = self._count + len(vectors)
+        if needed > len(self._matrix):
+            capacity = max(needed, 2 * len(self._matrix), 64)
+            grown = np.empty((capacity, self.dim), dtype=np.float32)
+            grown[:self._count] = self._matrix[:self._count]
+            self._matrix = grown
+
+        self._matrix[self._count:needed] = vectors
+        self._count = needed
+        self.names.extend([name] * len(vectors))
+
+    def search(self, queries: np.ndarray, top_k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Buscar os `top_k` voiceprints mais próximos de cada consulta.
+
+        Returns:
+            (índices, similaridades), ambos (n_consultas, top_k), ordenados
+            da maior para a menor similaridade.
+        """
+        queries = self._normalize(queries)
+        top_k = min(top_k, self._count)
+        if not top_k:
+            empty = np.empty((len(queries), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+
+        # (n, d) @ (d, k) percorre a matriz do índice em ordem de memória
+        scores = (self.embeddings @ queries.T).T
+        if top_k < self._count:
+            candidates = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+        else:
+            candidates = np.tile(np.arange(self._count), (len(queries), 1))
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1)
+        return (
+            np.take_along_axis(candidates, order, axis=1),
+            np.take_along_axis(candidate_scores, order, axis=1)
+        )
+
+    def resolve_labels(
+        self,
+        labels: Sequence[str],
+        embeddings: np.ndarray,
+        threshold: float = 0.5
+    ) -> Dict[str, str]:
+        """
+        Mapear rótulos de diarização para nomes cadastrados.
+
+        Cada nome é atribuído a no máximo um rótulo (o de maior
+        similaridade); rótulos sem correspondência acima de `threshold`
+        mantêm o rótulo original.
+        """
+        mapping = {label: label for label in labels}
+        if not self._count or not len(labels):
+            return mapping
+
+        embeddings = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+        valid = np.isfinite(embeddings).all(axis=1)
+        indices, scores = self.search(np.where(valid[:, None], embeddings, 0.0), top_k=10)
+
+        # Melhor similaridade por (rótulo, nome)
+        candidates = []
+        for row, label in enumerate(labels):
+            if not valid[row]:
+                continue
+            best: Dict[str, float] = {}
+            for index, score in zip(indices[row], scores[row]):
+                name = self.names[index]
+                if score >= threshold and score > best.get(name, -1.0):
+                    best[name] = float(score)
+            candidates.extend((score, label, name) for name, score in best.items())
+
+        # Atribuição gulosa, da maior similaridade para a menor
+        used_labels, used_names = set(), set()
+        for score, label, name in sorted(candidates, reverse=True):
+            if label in used_labels or name in used_names:
+                continue
+            mapping[label] = name
+            used_labels.add(label)
+            used_names.add(name)
+            logger.info(f"{label} identificado como {name} (similaridade {score:.2f})")
+
+        return mapping
+
+    def save(self, path: str):
+        """Salvar o índice em um arquivo .npz."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, embeddings=self.embeddings, names=np.array(self.names, dtype=str))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SpeakerIndex":
+        """Carregar um índice salvo; retorna um índice vazio se o arquivo não existir."""
+        index = cls()
+        if os.path.exists(path):
+            with np.load(path) as data:
+                embeddings = data["embeddings"]
+                if len(embeddings):
+                    index.dim = embeddings.shape[1]
+                    index._matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+                    index._count = len(embeddings)
+                    index.names = [str(name) for name in data["names"]]
+        return index
@@ -0,0 +1,193 @@
+"""
+🎯 Transcrição especulativa em duas passadas
+Rascunho com um modelo rápido e nova decodificação, com o modelo grande, só dos trechos de baixa confiança
+"""
+
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from transcritor.vad import Region, keep_speech, remap_segments
+
+# Limiares padrão: abaixo dos do próprio Whisper (-1.0 e 0.6), que marcam
+# falhas de decodificação; aqui o objetivo é pegar também a dúvida
+DEFAULT_LOGPROB_THRESHOLD = -0.8
+DEFAULT_NO_SPEECH_THRESHOLD = 0.5
+
+Transcriber = Callable[[np.ndarray], List[Dict[str, Any]]]
+
+
+def needs_refinement(
+    segment: Dict[str, Any],
+    logprob_threshold: float = DEFAULT_LOGPROB_THRESHOLD,
+    no_speech_threshold: float = DEFAULT_NO_SPEECH_THRESHOLD
+) -> bool:
+    """Segmento do rascunho com confiança baixa (log-prob média baixa ou provável não-fala)."""
+    avg_logprob = segment.get("avg_logprob")
+    no_speech_prob = segment.get("no_speech_prob")
+    return (
+        (avg_logprob is not None and avg_logprob < logprob_threshold)
+        or (no_speech_prob is not None and no_speech_prob > no_speech_threshold)
+    )
+
+
+def escalation_regions(
+    segments: List[Dict[str, Any]],
+    logprob_threshold: float = DEFAULT_LOGPROB_THRESHOLD,
+    no_speech_threshold: float = DEFAULT_NO_SPEECH_THRESHOLD,
+    merge_gap: float = 1.0
+) -> Tuple[List[Region], List[int]]:
+    """
+    Regiões (início, fim) a decodificar de novo e os índices dos segmentos escalados.
+
+    Segmentos escalados separados por menos de `merge_gap` segundos viram
+    uma única região, para que o modelo grande tenha o contexto da frase
+    inteira; os segmentos confiáveis dentro dela também são escalados.
+    """
+    flagged = [
+        i for i, segment in enumerate(segments)
+        if needs_refinement(segment, logprob_threshold, no_speech_threshold)
+    ]
+    regions: List[List[float]] = []
+    for i in flagged:
+        start, end = segments[i]["start"], segments[i]["end"]
+        if regions and start - regions[-1][1] <= merge_gap:
+            regions[-1][1] = max(regions[-1][1], end)
+        else:
+            regions.append([start, end])
+
+    escalated = [
+        i for i, segment in enumerate(segments)
+        if any(start <= segment["start"] and segment["end"] <= end for start, end in regions)
+    ]
+    return [(start, end) for start, end in regions], escalated
+
+
+def _overlapping(segment: Dict[str, Any], regions: List[Region]) -> List[int]:
+    """Índices das regiões com que o segmento se sobrepõe."""
+    return [
+        i for i, (start, end) in enumerate(regions)
+        if segment["start"] < end and segment["end"] > start
+    ]
+
+
+def _split_at_regions(segment: Dict[str, Any], regions: List[Region],
+                      indices: List[int]) -> List[Dict[str, Any]]:
+    """
+    Dividir um segmento que atravessa a emenda entre regiões pelas palavras.
+
+    Cada palavra vai para a região que contém o seu meio (ou a mais
+    próxima); cada grupo vira um segmento com os tempos das suas palavras,
+    limitados à região.
+    """
+    groups: Dict[int, List[Dict[str, Any]]] = {}
+    for word in segment["words"]:
+        middle = (word["start"] + word["end"]) / 2
+        i = min(indices, key=lambda i: max(regions[i][0] - middle, middle - regions[i][1], 0.0))
+        groups.setdefault(i, []).append(word)
+
+    pieces = []
+    for i, words in sorted(groups.items()):
+        start, end = regions[i]
+        pieces.append({
+            **segment,
+            "start": max(words[0]["start"], start),
+            "end": min(words[-1]["end"], end),
+            "text": "".join(word["word"] for word in words),
+            "words": words
+        })
+    return pieces
+
+
+def _fit_to_regions(segments: List[Dict[str, Any]], regions: List[Region],
+                    region_audio: Callable[[int], np.ndarray],
+                    transcribe: Transcriber) -> List[Dict[str, Any]]:
+    """
+    Acomodar os segmentos da decodificação conjunta às regiões.
+
+    A decodificação das regiões concatenadas pode gerar um segmento que
+    atravessa a emenda entre duas delas. Com timestamps de palavras, ele é
+    dividido entre as regiões; sem eles (ex.: servidor de lote), as
+    regiões envolvidas são decodificadas de novo, uma a uma.
+    """
+    fitted: List[Dict[str, Any]] = []
+    redo = set()
+    for segment in segments:
+        indices = _overlapping(segment, regions)
+        if len(indices) <= 1:
+            if indices:
+                start, end = regions[indices[0]]
+                segment["start"], segment["end"] = max(segment["start"], start), min(segment["end"], end)
+            fitted.append(segment)
+        elif segment.get("words"):
+            fitted.extend(_split_at_regions(segment, regions, indices))
+        else:
+            redo.update(indices)
+
+    if redo:
+        fitted = [segment for segment in fitted if not set(_overlapping(segment, regions)) & redo]
+        for i in sorted(redo):
+            offset = regions[i][0]
+            for segment in transcribe(region_audio(i)):
+                segment["start"] += offset
+                segment["end"] += offset
+                for word in segment.get("words") or []:
+                    word["start"] += offset
+                    word["end"] += offset
+                fitted.append(segment)
+    return fitted
+
+
+def refine(
+    draft: List[Dict[str, Any]],
+    audio: np.ndarray,
+    transcribe: Transcriber,
+    sample_rate: int = 16000,
+    logprob_threshold: float = DEFAULT_LOGPROB_THRESHOLD,
+    no_speech_threshold: float = DEFAULT_NO_SPEECH_THRESHOLD,
+    merge_gap: float = 1.0
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Decodificar de novo os trechos de baixa confiança de `draft` e mesclar.
+
+    As regiões escaladas são concatenadas (como no VAD) e passam por uma
+    única chamada de `transcribe`, que recebe o áudio e retorna segmentos
+    no formato do Whisper: regiões curtas dividem as mesmas janelas de
+    30 s em vez de cada uma pagar uma janela inteira. Os segmentos do
+    rascunho fora das regiões são mantidos, e cada segmento refinado fica
+    dentro de uma única região. Retorna os segmentos em ordem e o
+    relatório da escalada.
+    """
+    total_seconds = len(audio) / sample_rate
+    regions, escalated = escalation_regions(draft, logprob_threshold, no_speech_threshold, merge_gap)
+
+    inicio = time.perf_counter()
+    refined: List[Dict[str, Any]] = []
+    if regions:
+        region_audio, time_map = keep_speech(audio, regions, sample_rate)
+        refined = _fit_to_regions(
+            remap_segments(transcribe(region_audio), time_map), regions,
+            lambda i: audio[int(regions[i][0] * sample_rate):int(regions[i][1] * sample_rate)],
+            transcribe
+        )
+    refine_seconds = time.perf_counter() - inicio
+
+    escalated_set = set(escalated)
+    kept = [segment for i, segment in enumerate(draft) if i not in escalated_set]
+    segments = sorted(kept + refined, key=lambda segment: segment["start"])
+
+    escalated_seconds = sum(end - start for start, end in regions)
+    report = {
+        "total_seconds": round(total_seconds, 2),
+        "escalated_seconds": round(escalated_seconds, 2),
+        "escalated_ratio": round(escalated_seconds / total_seconds, 4) if total_seconds else 0.0,
+        "regions": len(regions),
+        "draft_segments": len(draft),
+        "escalated_segments": len(escalated),
+        "refined_segments": len(refined),
+        "refine_seconds": round(refine_seconds, 2),
+        "logprob_threshold": logprob_threshold,
+        "no_speech_threshold": no_speech_threshold
+    }
+    return segments, report
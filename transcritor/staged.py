@@ -0,0 +1,168 @@
+"""
+🚰 Execução em etapas com filas limitadas
+Sobrepõe decodificação, inferência e escrita de arquivos diferentes
+"""
+
+import time
+import queue
+import logging
+import threading
+import traceback
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+# Marca de fim de fluxo entre etapas
+_STOP = object()
+
+
+@dataclass
+class Stage:
+    """
+    Uma etapa do pipeline.
+
+    `func` recebe o item (dict) e o altera no lugar. `workers` threads
+    consomem a fila de entrada, que comporta até `queue_size` itens:
+    quando uma etapa lenta enche a fila, as anteriores esperam, o que
+    limita a memória ocupada por arquivos pré-carregados.
+    """
+    name: str
+    func: Callable[[Dict[str, Any]], None]
+    workers: int = 1
+    queue_size: int = 2
+
+
+@dataclass
+class StageStats:
+    """Contadores de uma etapa."""
+    items: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+    idle_seconds: float = 0.0      # esperando item da etapa anterior
+    blocked_seconds: float = 0.0   # esperando vaga na fila da próxima etapa
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class StagedRunner:
+    """
+    Pipeline de etapas com threads e filas limitadas entre elas.
+
+    Enquanto o arquivo N está na inferência, o N+1 já é decodificado e o
+    N-1 é gravado em disco. As etapas pesadas (torch, ffmpeg) liberam o
+    GIL, então threads bastam. Um erro em uma etapa é registrado no item
+    (`error`, `error_class` e `failed_stage`) e as etapas seguintes o
+    deixam passar.
+
+    `stats()` mostra a utilização de cada etapa: a etapa gargalo fica
+    perto de 100%, e as anteriores acumulam tempo bloqueado.
+    """
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = stages
+        self._queues = [queue.Queue(maxsize=stage.queue_size) for stage in stages]
+        self._output: queue.Queue = queue.Queue()
+        self._stats = {stage.name: StageStats() for stage in stages}
+        self._alive = [stage.workers for stage in stages]
+        self._alive_lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._started_at = None
+
+    def start(self) -> "StagedRunner":
+        self._started_at = time.perf_counter()
+        for index, stage in enumerate(self.stages):
+            for n in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._stage_loop, args=(index,),
+                    name=f"etapa-{stage.name}-{n}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+        return self
+
+    def submit(self, item: Dict[str, Any]):
+        """Enviar um item à primeira etapa (bloqueia se a fila estiver cheia)."""
+        self._queues[0].put(item)
+
+    def close(self):
+        """Sinalizar que não haverá mais itens; as etapas terminam o que têm."""
+        self._queues[0].put(_STOP)
+
+    def results(self) -> Iterator[Dict[str, Any]]:
+        """Gerar os itens concluídos até o fim do fluxo (após `close`)."""
+        while True:
+            item = self._output.get()
+            if item is _STOP:
+                return
+            yield item
+
+    def _put(self, index: int, item):
+        target = self._queues[index + 1] if index + 1 < len(self.stages) else self._output
+        target.put(item)
+
+    def _stage_loop(self, index: int):
+        stage = self.stages[index]
+        stats = self._stats[stage.name]
+        source = self._queues[index]
+
+        while True:
+            inicio = time.perf_counter()
+            item = source.get()
+            esperou = time.perf_counter() - inicio
+
+            if item is _STOP:
+                with self._alive_lock:
+                    self._alive[index] -= 1
+                    last = self._alive[index] == 0
+                # O último worker da etapa repassa o fim; os outros o devolvem aos irmãos
+                if last:
+                    self._put(index, _STOP)
+                else:
+                    source.put(_STOP)
+                return
+
+            if item.get("error") is None:
+                inicio = time.perf_counter()
+                try:
+                    stage.func(item)
+                except Exception as e:
+                    item["error"] = traceback.format_exc()
+                    item["error_class"] = type(e).__name__
+                    item["failed_stage"] = stage.name
+                    logger.error(f"Etapa {stage.name}: erro em {item.get('audio_path')}")
+                ocupado = time.perf_counter() - inicio
+                with stats.lock:
+                    stats.items += 1
+                    stats.errors += item.get("failed_stage") == stage.name
+                    stats.busy_seconds += ocupado
+            with stats.lock:
+                stats.idle_seconds += esperou
+
+            inicio = time.perf_counter()
+            self._put(index, item)
+            with stats.lock:
+                stats.blocked_seconds += time.perf_counter() - inicio
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Utilização por etapa (tempo ocupado / tempo disponível dos workers)."""
+        elapsed = time.perf_counter() - self._started_at if self._started_at else 0.0
+        report = {}
+        for stage, source in zip(self.stages, self._queues):
+            stats = self._stats[stage.name]
+            capacity = elapsed * stage.workers
+            report[stage.name] = {
+                "workers": stage.workers,
+                "items": stats.items,
+                "errors": stats.errors,
+                "busy_seconds": round(stats.busy_seconds, 3),
+                "idle_seconds": round(stats.idle_seconds, 3),
+                "blocked_seconds": round(stats.blocked_seconds, 3),
+                "utilization": round(stats.busy_seconds / capacity, 4) if capacity else 0.0,
+                "queued": source.qsize()
+            }
+        return report
+
+
+def bottleneck(stats: Dict[str, Dict[str, Any]]) -> str:
+    """Nome da etapa com maior utilização."""
+    return max(stats, key=lambda name: stats[name]["utilization"]) if stats else ""
@@ -0,0 +1,169 @@
+"""
+📡 Transcrição incremental para legendas ao vivo
+Buffer deslizante, redecodificação periódica e política de concordância local (LocalAgreement-2)
+"""
+
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+# (áudio do buffer, prompt com o texto já confirmado) -> segmentos no formato do Whisper
+StreamTranscriber = Callable[[np.ndarray, str], List[Dict[str, Any]]]
+
+Word = Dict[str, Any]
+
+
+def _normalize(word: str) -> str:
+    return re.sub(r"[^\w]", "", word.lower())
+
+
+def pcm16_to_float(data: bytes) -> np.ndarray:
+    """PCM s16le mono -> float32 em [-1, 1] (formato do Whisper)."""
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
+
+class StreamingTranscriber:
+    """
+    Transcrição de um fluxo contínuo de áudio com latência limitada.
+
+    O áudio recebido vai para um buffer; a cada `step` segundos novos, o
+    buffer inteiro é decodificado de novo. Uma palavra só é confirmada
+    (final) quando duas hipóteses consecutivas concordam com ela, desde o
+    último ponto confirmado (LocalAgreement-2); o restante da hipótese é
+    parcial e pode mudar. O buffer é cortado no fim da última palavra
+    confirmada quando passa de `max_buffer` segundos; se nada for
+    confirmado até `2 * max_buffer`, a hipótese atual é confirmada à força
+    para manter a latência e o custo de cada decodificação limitados. Sem
+    palavra confirmada dentro do buffer (silêncio, música), ele é cortado
+    no início da hipótese atual ou, sem hipótese, nos últimos `max_buffer`
+    segundos.
+
+    Não é thread-safe: `feed` e `process` devem ser chamados do mesmo
+    fluxo de controle (a decodificação em si pode rodar em outra thread).
+    """
+
+    def __init__(self, transcribe: StreamTranscriber, sample_rate: int = 16000,
+                 step: float = 1.0, max_buffer: float = 15.0, prompt_chars: int = 200):
+        self.transcribe = transcribe
+        self.sample_rate = sample_rate
+        self.step = step
+        self.max_buffer = max_buffer
+        self.prompt_chars = prompt_chars
+
+        self._buffer = np.empty(0, dtype=np.float32)
+        self.buffer_offset = 0.0       # tempo absoluto do início do buffer
+        self.received_seconds = 0.0    # áudio recebido até agora
+        self._processed_seconds = 0.0  # áudio recebido na última decodificação
+        self.committed: List[Word] = []
+        self._hypothesis: List[Word] = []
+        self.decode_seconds: List[float] = []
+
+    @property
+    def committed_end(self) -> float:
+        return self.committed[-1]["end"] if self.committed else 0.0
+
+    @property
+    def committed_text(self) -> str:
+        return "".join(word["word"] for word in self.committed).strip()
+
+    def feed(self, audio: np.ndarray):
+        """Acrescentar áudio float32 (16 kHz mono) ao buffer."""
+        if len(audio):
+            self._buffer = np.concatenate((self._buffer, audio.astype(np.float32, copy=False)))
+            self.received_seconds += len(audio) / self.sample_rate
+
+    def ready(self) -> bool:
+        """Se há pelo menos `step` segundos de áudio novo desde a última decodificação."""
+        return self.received_seconds - self._processed_seconds >= self.step
+
+    def _words(self, segments: List[Dict[str, Any]]) -> List[Word]:
+        """Palavras com tempos absolutos posteriores ao que já foi confirmado."""
+        words = []
+        for segment in segments:
+            units = segment.get("words") or [
+                {"word": segment["text"], "start": segment["start"], "end": segment["end"]}
+            ]
+            for unit in units:
+                if not unit["word"].strip():
+                    continue
+                start = self.buffer_offset + unit["start"]
+                end = self.buffer_offset + unit["end"]
+                # Tolerância para palavras confirmadas que reaparecem com tempos um pouco diferentes
+                if end <= self.committed_end + 0.1:
+                    continue
+                words.append({"word": unit["word"], "start": start, "end": end})
+        return words
+
+    def process(self) -> Dict[str, Any]:
+        """
+        Decodificar o buffer e aplicar a política de concordância.
+
+        Retorna {"final": segmento ou None, "partial": segmento ou None}.
+        """
+        self._processed_seconds = self.received_seconds
+        if not len(self._buffer):
+            return {"final": None, "partial": None}
+
+        prompt = self.committed_text[-self.prompt_chars:]
+        inicio = time.perf_counter()
+        words = self._words(self.transcribe(self._buffer, prompt))
+        self.decode_seconds.append(time.perf_counter() - inicio)
+
+        agreed = 0
+        for old, new in zip(self._hypothesis, words):
+            if _normalize(old["word"]) != _normalize(new["word"]):
+                break
+            agreed += 1
+        confirmed, self._hypothesis = words[:agreed], words[agreed:]
+
+        buffer_seconds = len(self._buffer) / self.sample_rate
+        if not confirmed and buffer_seconds > 2 * self.max_buffer and self._hypothesis:
+            confirmed, self._hypothesis = self._hypothesis, []
+
+        self.committed.extend(confirmed)
+        if buffer_seconds > self.max_buffer:
+            if self.committed_end > self.buffer_offset:
+                self._trim(self.committed_end)
+            elif self._hypothesis:
+                self._trim(self._hypothesis[0]["start"])
+            else:
+                self._trim(self.received_seconds - self.max_buffer)
+        return {"final": self._segment(confirmed), "partial": self._segment(self._hypothesis)}
+
+    def finish(self) -> Dict[str, Any]:
+        """Fim do fluxo: decodificar o que sobrou e confirmar tudo."""
+        if self.received_seconds > self._processed_seconds:
+            self.process()
+        confirmed, self._hypothesis = self._hypothesis, []
+        self.committed.extend(confirmed)
+        return {"final": self._segment(confirmed), "partial": None}
+
+    def _trim(self, until: float):
+        """Descartar o áudio do buffer anterior a `until` (tempo absoluto)."""
+        cut = int((until - self.buffer_offset) * self.sample_rate)
+        if cut > 0:
+            self._buffer = self._buffer[cut:]
+            self.buffer_offset += cut / self.sample_rate
+
+    @staticmethod
+    def _segment(words: List[Word]) -> Optional[Dict[str, Any]]:
+        if not words:
+            return None
+        return {
+            "start": round(words[0]["start"], 3),
+            "end": round(words[-1]["end"], 3),
+            "text": "".join(word["word"] for word in words).strip(),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        decode = self.decode_seconds
+        return {
+            "received_seconds": round(self.received_seconds, 2),
+            "committed_words": len(self.committed),
+            "decodes": len(decode),
+            "decode_seconds_avg": round(sum(decode) / len(decode), 3) if decode else None,
+            "decode_seconds_max": round(max(decode), 3) if decode else None,
+            "buffer_seconds": round(len(self._buffer) / self.sample_rate, 2),
+        }
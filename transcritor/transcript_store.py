@@ -0,0 +1,191 @@
+"""
+🗂️ Transcrição em formato binário com índice de tempo
+Blocos de segmentos comprimidos (JSON + zlib, com prefixo de tamanho) e índice tempo → bloco para consultas por intervalo
+"""
+
+import os
+import json
+import zlib
+import struct
+import bisect
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from transcritor.export import seconds
+
+MAGIC = b"TSEG"
+VERSION = 1
+EXTENSION = "tseg"
+
+# Segmentos por bloco: ~5 min de fala por bloco; uma consulta de poucos
+# minutos descomprime um ou dois blocos
+BLOCK_SEGMENTS = 64
+
+_HEADER = struct.Struct("<4sB")     # magic, versão
+_LENGTH = struct.Struct("<I")       # prefixo de cada bloco
+_TRAILER = struct.Struct("<QI4s")   # posição e tamanho do índice, magic
+
+
+class StoreError(ValueError):
+    """Arquivo que não é uma transcrição binária válida."""
+
+
+def _pack(payload: Any) -> bytes:
+    return zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 6)
+
+
+def _unpack(data: bytes) -> Any:
+    return json.loads(zlib.decompress(data).decode("utf-8"))
+
+
+def write(path: str, segments: Iterable[Dict[str, Any]], block_size: int = BLOCK_SEGMENTS,
+          **metadata) -> int:
+    """
+    Gravar os segmentos (ordenados por início) no formato binário.
+
+    Layout: cabeçalho, blocos `[tamanho u32][JSON+zlib com até
+    block_size segmentos]`, índice (JSON+zlib) com posição, tamanho,
+    primeiro início e maior fim de cada bloco, e o trailer com a posição
+    do índice. Os tempos podem vir em segundos ou HH:MM:SS.mmm; os
+    segmentos são guardados como vieram. A gravação é atômica (arquivo
+    temporário + rename). Retorna o número de segmentos.
+    """
+    segments = sorted(segments, key=lambda segment: seconds(segment["start"]))
+    blocks = []
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION))
+        for i in range(0, len(segments), block_size):
+            block = segments[i:i + block_size]
+            data = _pack(block)
+            blocks.append([
+                f.tell() + _LENGTH.size, len(data), len(block),
+                seconds(block[0]["start"]), max(seconds(segment["end"]) for segment in block)
+            ])
+            f.write(_LENGTH.pack(len(data)))
+            f.write(data)
+        index = _pack({"segments": len(segments), "blocks": blocks, "metadata": metadata})
+        index_offset = f.tell()
+        f.write(index)
+        f.write(_TRAILER.pack(index_offset, len(index), MAGIC))
+    os.replace(tmp_path, path)
+    return len(segments)
+
+
+class TranscriptStore:
+    """
+    Leitura de uma transcrição binária por intervalo de tempo.
+
+    O índice (alguns bytes por bloco) é lido na abertura; cada consulta
+    faz duas buscas binárias, uma sobre o início dos blocos e outra sobre
+    o maior fim acumulado (segmentos podem terminar depois do início do
+    seguinte), e lê do disco só os blocos que se sobrepõem ao intervalo.
+    O custo não depende da duração da transcrição, só do trecho pedido.
+    Seguro para uso entre threads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._lock = threading.Lock()
+        try:
+            self._read_index()
+        except Exception:
+            self._file.close()
+            raise
+
+    def _read_index(self):
+        header = self._file.read(_HEADER.size)
+        if len(header) != _HEADER.size or _HEADER.unpack(header)[0] != MAGIC:
+            raise StoreError(f"Não é uma transcrição binária: {self.path}")
+        if _HEADER.unpack(header)[1] != VERSION:
+            raise StoreError(f"Versão não suportada: {_HEADER.unpack(header)[1]}")
+        self._file.seek(-_TRAILER.size, os.SEEK_END)
+        index_offset, index_length, magic = _TRAILER.unpack(self._file.read(_TRAILER.size))
+        if magic != MAGIC:
+            raise StoreError(f"Transcrição binária incompleta: {self.path}")
+        self._file.seek(index_offset)
+        index = _unpack(self._file.read(index_length))
+
+        self.segment_count: int = index["segments"]
+        self.metadata: Dict[str, Any] = index.get("metadata", {})
+        self._blocks: List[Tuple[int, int, int]] = [(offset, length, count) for offset, length, count, _, _ in index["blocks"]]
+        self._starts = [block[3] for block in index["blocks"]]
+        self._reach = []  # maior fim até cada bloco (não decrescente)
+        reach = float("-inf")
+        for block in index["blocks"]:
+            reach = max(reach, block[4])
+            self._reach.append(reach)
+
+    @property
+    def duration(self) -> float:
+        return self._reach[-1] if self._reach else 0.0
+
+    def _block(self, i: int) -> List[Dict[str, Any]]:
+        offset, length, _ = self._blocks[i]
+        with self._lock:
+            self._file.seek(offset)
+            data = self._file.read(length)
+        return _unpack(data)
+
+    def range(self, start: float = 0.0, end: Optional[float] = None,
+              limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Segmentos que se sobrepõem a [start, end), em ordem de início.
+
+        `end` None vai até o fim; `limit` corta o resultado.
+        """
+        end = float("inf") if end is None else end
+        first = bisect.bisect_right(self._reach, start)
+        last = bisect.bisect_left(self._starts, end)
+        found: List[Dict[str, Any]] = []
+        for i in range(first, last):
+            for segment in self._block(i):
+                if seconds(segment["start"]) < end and seconds(segment["end"]) > start:
+                    found.append(segment)
+                    if limit is not None and len(found) >= limit:
+                        return found
+        return found
+
+    def __len__(self) -> int:
+        return self.segment_count
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_OPEN: Dict[str, Tuple[Tuple[int, int], TranscriptStore]] = {}
+_OPEN_LOCK = threading.Lock()
+MAX_OPEN = 64
+
+
+def open_store(path: str) -> TranscriptStore:
+    """
+    TranscriptStore de `path`, mantido aberto entre consultas.
+
+    A instância é reaberta se o arquivo mudar (tamanho ou mtime); no
+    máximo MAX_OPEN ficam guardadas (as menos usadas saem e são fechadas
+    pelo coletor quando nenhuma consulta em andamento as usa mais).
+    """
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _OPEN_LOCK:
+        cached = _OPEN.pop(path, None)
+        if cached is None or cached[0] != version:
+            cached = (version, TranscriptStore(path))
+        _OPEN[path] = cached
+        while len(_OPEN) > MAX_OPEN:
+            _OPEN.pop(next(iter(_OPEN)))
+        return cached[1]
+
+
+def forget(path: str):
+    """Descartar a instância guardada de `path` (antes de apagar o arquivo)."""
+    with _OPEN_LOCK:
+        _OPEN.pop(path, None)
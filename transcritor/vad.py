@@ -0,0 +1,187 @@
+"""
+🔇 Detecção de atividade de voz (VAD) por energia e planura espectral
+Remove silêncio, ruído e música estacionária antes do Whisper
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from transcritor import pcm
+
+Region = Tuple[float, float]
+
+# Quadros processados por vez (limita a memória da FFT em áudios longos)
+FRAMES_PER_BLOCK = 8192
+
+
+def frame_features(audio: np.ndarray, sample_rate: int = 16000,
+                   frame_ms: float = 30.0, hop_ms: float = 10.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Energia (dBFS) e planura espectral (0-1) de cada quadro.
+
+    A planura é a razão entre a média geométrica e a aritmética do
+    espectro de potência: próxima de 1 para ruído, baixa para sons tonais.
+    """
+    frame_len = int(sample_rate * frame_ms / 1000)
+    hop = int(sample_rate * hop_ms / 1000)
+    if len(audio) < frame_len:
+        return np.empty(0), np.empty(0)
+
+    frames = np.lib.stride_tricks.sliding_window_view(audio, frame_len)[::hop]
+    window = np.hanning(frame_len).astype(np.float32)
+
+    energy_db = np.empty(len(frames), dtype=np.float32)
+    flatness = np.empty(len(frames), dtype=np.float32)
+    for start in range(0, len(frames), FRAMES_PER_BLOCK):
+        block = frames[start:start + FRAMES_PER_BLOCK]
+        rms = np.sqrt(np.mean(np.square(block, dtype=np.float32), axis=1))
+        energy_db[start:start + len(block)] = 20 * np.log10(rms + 1e-10)
+
+        power = np.abs(np.fft.rfft(block * window, axis=1)) ** 2 + 1e-12
+        flatness[start:start + len(block)] = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+
+    return energy_db, flatness
+
+
+def _runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """Intervalos [início, fim) de valores True consecutivos."""
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+    return list(zip(edges[::2], edges[1::2]))
+
+
+def detect_speech(
+    audio: np.ndarray,
+    sample_rate: int = 16000,
+    hop_ms: float = 10.0,
+    margin_db: float = 12.0,
+    min_energy_db: float = -50.0,
+    max_flatness: float = 0.45,
+    min_speech: float = 0.25,
+    min_silence: float = 0.6,
+    padding: float = 0.2,
+    stationary_seconds: float = 3.0,
+    stationary_std_db: float = 2.0
+) -> List[Region]:
+    """
+    Regiões de fala (início, fim) em segundos.
+
+    Um quadro é fala quando a energia supera o piso de ruído estimado em
+    `margin_db` (e o mínimo absoluto `min_energy_db`) e a planura fica
+    abaixo de `max_flatness` (descarta ruído de banda larga). Trechos de
+    mais de `stationary_seconds` com energia quase constante (música de
+    espera, vinhetas) são descartados: a fala tem variação silábica de
+    energia, medida como desvio padrão em janelas de 1 s.
+    """
+    energy_db, flatness = frame_features(audio, sample_rate, hop_ms=hop_ms)
+    if not len(energy_db):
+        return []
+
+    frame_rate = 1000.0 / hop_ms
+    noise_floor = np.percentile(energy_db, 10)
+    threshold = max(noise_floor + margin_db, min_energy_db)
+    voiced = (energy_db > threshold) & (flatness < max_flatness)
+
+    # Desvio padrão móvel da energia (somas acumuladas, janela de 1 s)
+    width = min(int(frame_rate), len(energy_db))
+    sums = np.concatenate(([0.0], np.cumsum(energy_db, dtype=np.float64)))
+    sq_sums = np.concatenate(([0.0], np.cumsum(np.square(energy_db, dtype=np.float64))))
+    mean = (sums[width:] - sums[:-width]) / width
+    local_std = np.sqrt(np.maximum((sq_sums[width:] - sq_sums[:-width]) / width - mean ** 2, 0.0))
+    local_std = np.pad(local_std, (width // 2, len(energy_db) - len(local_std) - width // 2), mode="edge")
+    for start, end in _runs(voiced & (local_std < stationary_std_db)):
+        if (end - start) / frame_rate >= stationary_seconds:
+            voiced[start:end] = False
+
+    # Fechar pausas curtas dentro da fala
+    gap = int(min_silence * frame_rate)
+    for start, end in _runs(~voiced):
+        if start > 0 and end < len(voiced) and end - start < gap:
+            voiced[start:end] = True
+
+    duration = len(audio) / sample_rate
+    regions = []
+    for start, end in _runs(voiced):
+        if (end - start) / frame_rate < min_speech:
+            continue
+        regions.append((
+            max(0.0, float(start / frame_rate - padding)),
+            min(duration, float(end / frame_rate + padding))
+        ))
+
+    # O padding pode sobrepor regiões vizinhas
+    merged: List[Region] = []
+    for start, end in regions:
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+@dataclass
+class TimeMap:
+    """Converte tempos do áudio só-fala para o áudio original."""
+    regions: List[Region]
+
+    def __post_init__(self):
+        lengths = np.array([end - start for start, end in self.regions], dtype=np.float64)
+        self._compact_starts = np.concatenate(([0.0], np.cumsum(lengths)[:-1])) if len(lengths) else np.empty(0)
+        self._lengths = lengths
+
+    def to_original(self, t: float) -> float:
+        if not self.regions:
+            return t
+        i = int(np.searchsorted(self._compact_starts, t, side="right")) - 1
+        i = min(max(i, 0), len(self.regions) - 1)
+        offset = min(max(t - self._compact_starts[i], 0.0), self._lengths[i])
+        return self.regions[i][0] + offset
+
+
+def keep_speech(audio: np.ndarray, regions: List[Region], sample_rate: int = 16000,
+                mapped: bool = False, work_dir: Optional[str] = None) -> Tuple[np.ndarray, TimeMap]:
+    """
+    Concatenar apenas as regiões de fala; retorna o áudio e o mapa de tempos.
+
+    Com `mapped`, o resultado vai para um arquivo PCM em `work_dir`
+    mapeado em memória (transcritor.pcm), em vez de uma cópia na RAM.
+    """
+    if not regions:
+        return audio[:0], TimeMap([])
+    pieces = (audio[int(start * sample_rate):int(end * sample_rate)] for start, end in regions)
+    if mapped:
+        return pcm.write(pieces, work_dir), TimeMap(regions)
+    return np.concatenate(list(pieces)), TimeMap(regions)
+
+
+def remap_segments(segments: List[Dict[str, Any]], time_map: TimeMap) -> List[Dict[str, Any]]:
+    """Trazer tempos de segmentos (e palavras) de volta para o áudio original."""
+    for segment in segments:
+        segment["start"] = time_map.to_original(segment["start"])
+        segment["end"] = time_map.to_original(segment["end"])
+        for word in segment.get("words") or []:
+            word["start"] = time_map.to_original(word["start"])
+            word["end"] = time_map.to_original(word["end"])
+    return segments
+
+
+def speech_report(regions: List[Region], total_seconds: float, asr_seconds: float) -> Dict[str, Any]:
+    """
+    Resumo do VAD: parcela do áudio pulada e tempo de ASR economizado.
+
+    A economia é estimada assumindo custo de ASR proporcional à duração.
+    """
+    speech = sum(end - start for start, end in regions)
+    skipped = max(total_seconds - speech, 0.0)
+    saved = asr_seconds / speech * skipped if speech else 0.0
+    return {
+        "total_seconds": round(total_seconds, 2),
+        "speech_seconds": round(speech, 2),
+        "skipped_seconds": round(skipped, 2),
+        "skipped_ratio": round(skipped / total_seconds, 4) if total_seconds else 0.0,
+        "regions": len(regions),
+        "asr_seconds": round(asr_seconds, 2),
+        "estimated_seconds_saved": round(saved, 2)
+    }
@@ -0,0 +1,124 @@
+"""
+👀 Observação incremental de pastas (hot folder)
+Detecta arquivos novos sem varrer a árvore inteira a cada verificação
+"""
+
+import os
+import time
+from typing import Dict, Iterable, List, Set, Tuple
+
+
+class FolderWatcher:
+    """
+    Observa uma pasta (com subpastas) por polling com `os.scandir`.
+
+    Criar, remover ou renomear uma entrada muda o mtime do diretório que a
+    contém, então cada verificação só faz `stat` dos diretórios conhecidos
+    e relista apenas os que mudaram. O custo acompanha a quantidade de
+    mudanças e de diretórios, não o tamanho do acervo.
+
+    Arquivos novos ficam em observação até tamanho e mtime ficarem
+    estáveis por `settle_seconds` (cópias e gravações em andamento) e só
+    então são entregues por `poll()`, uma única vez cada.
+    """
+
+    def __init__(self, root: str, extensions: Iterable[str], settle_seconds: float = 5.0,
+                 exclude: Iterable[str] = ()):
+        self.root = os.path.abspath(root)
+        self.extensions = {ext.lower() for ext in extensions}
+        self.settle_seconds = settle_seconds
+        self.exclude = {os.path.abspath(path) for path in exclude}
+
+        self._dir_mtimes: Dict[str, int] = {}
+        self._dir_files: Dict[str, Set[str]] = {}
+        # caminho -> (tamanho, mtime_ns, momento em que ficou assim)
+        self._settling: Dict[str, Tuple[int, int, float]] = {}
+        self._seen: Set[str] = set()
+
+    def _wanted(self, name: str) -> bool:
+        return os.path.splitext(name)[1].lower() in self.extensions
+
+    def _scan_dir(self, path: str):
+        """Relistar um diretório: registrar arquivos novos e descer em subpastas novas."""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            entries = list(os.scandir(path))
+        except FileNotFoundError:
+            self._forget_dir(path)
+            return
+
+        self._dir_mtimes[path] = mtime
+        files = set()
+        for entry in entries:
+            if entry.path in self.exclude:
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                if entry.path not in self._dir_mtimes:
+                    self._scan_dir(entry.path)
+            elif entry.is_file() and self._wanted(entry.name):
+                files.add(entry.path)
+                if entry.path not in self._seen and entry.path not in self._settling:
+                    stat = entry.stat()
+                    self._settling[entry.path] = (stat.st_size, stat.st_mtime_ns, time.monotonic())
+
+        # Arquivos removidos podem voltar a ser entregues se reaparecerem
+        for removed in self._dir_files.get(path, set()) - files:
+            self._seen.discard(removed)
+            self._settling.pop(removed, None)
+        self._dir_files[path] = files
+
+    def _forget_dir(self, path: str):
+        prefix = path + os.sep
+        for known in [d for d in self._dir_mtimes if d == path or d.startswith(prefix)]:
+            del self._dir_mtimes[known]
+            for removed in self._dir_files.pop(known, set()):
+                self._seen.discard(removed)
+                self._settling.pop(removed, None)
+
+    def _check_settling(self) -> List[str]:
+        """Entregar os arquivos cujo tamanho e mtime não mudaram por `settle_seconds`."""
+        ready = []
+        now = time.monotonic()
+        for path, (size, mtime, since) in list(self._settling.items()):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                del self._settling[path]
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime):
+                self._settling[path] = (stat.st_size, stat.st_mtime_ns, now)
+            elif stat.st_size > 0 and now - since >= self.settle_seconds:
+                del self._settling[path]
+                self._seen.add(path)
+                ready.append(path)
+        return sorted(ready)
+
+    def poll(self) -> List[str]:
+        """Verificar mudanças e retornar os arquivos prontos para processar."""
+        if not self._dir_mtimes:
+            self._scan_dir(self.root)
+        else:
+            for path, mtime in list(self._dir_mtimes.items()):
+                if path not in self._dir_mtimes:
+                    continue  # removido junto com o diretório pai
+                try:
+                    current = os.stat(path).st_mtime_ns
+                except FileNotFoundError:
+                    self._forget_dir(path)
+                    continue
+                if current != mtime:
+                    self._scan_dir(path)
+        return self._check_settling()
+
+    @property
+    def settling(self) -> int:
+        """Arquivos aguardando a escrita terminar."""
+        return len(self._settling)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "directories": len(self._dir_mtimes),
+            "files": sum(len(files) for files in self._dir_files.values()),
+            "settling": len(self._settling),
+            "delivered": len(self._seen)
+        }
@@ -0,0 +1,379 @@
+"""
+🏭 Pool persistente de workers de transcrição
+Processos que carregam Whisper e pyannote uma única vez e consomem arquivos de uma fila
+"""
+
+import os
+import sys
+import time
+import queue
+import logging
+import threading
+import traceback
+import multiprocessing as mp
+from typing import Any, Dict, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from transcritor.asr import backend_key
+from transcritor.cpu import apply_cpu_profile, partition_cores, worker_env
+from transcritor.staged import StagedRunner
+
+logger = logging.getLogger(__name__)
+
+# Intervalo para verificar se algum worker morreu (ex.: falta de memória)
+POLL_SECONDS = 1.0
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Pico de memória residente do processo até agora, em MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB; macOS, em bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _worker_main(worker_id: int, tasks, results, retire, env: Dict[str, str]):
+    """Loop de um processo worker."""
+    # O ambiente precisa estar pronto antes de importar o transcrever,
+    # que lê a configuração na importação
+    os.environ.update(env)
+    apply_cpu_profile()
+    import transcrever
+
+    inicio = time.perf_counter()
+    whisper_model = transcrever.load_asr_model()
+    diarization_pipeline = transcrever.load_diarization_pipeline()
+    results.put({"type": "ready", "worker": worker_id, "load_seconds": time.perf_counter() - inicio})
+
+    while True:
+        # Pedido de redução do pool: sair antes de pegar outra tarefa
+        try:
+            retire.get_nowait()
+            break
+        except queue.Empty:
+            pass
+
+        task = tasks.get()
+        if task is None:
+            break
+
+        results.put({"type": "started", "worker": worker_id, "task_id": task["task_id"]})
+        inicio = time.perf_counter()
+        stats = {}
+        error_class = None
+        try:
+            transcript = transcrever.process_single_file(
+                task["path"], task["output_dir"], whisper_model, diarization_pipeline, stats=stats
+            )
+            erro = None if transcript is not None else "Falha no processamento do arquivo"
+            if transcript is None:
+                error_class = "ProcessingFailed"
+        except Exception as e:
+            erro = traceback.format_exc()
+            error_class = type(e).__name__
+
+        results.put({
+            "type": "done",
+            "worker": worker_id,
+            "task_id": task["task_id"],
+            "path": task["path"],
+            "output_dir": task["output_dir"],
+            "sucesso": erro is None,
+            "erro": erro,
+            "duracao": time.perf_counter() - inicio,
+            "audio_seconds": stats.get("audio_seconds", 0.0),
+            "timings": stats.get("timings", {}),
+            "outputs": stats.get("outputs", []),
+            "escalated_ratio": stats.get("speculative", {}).get("escalated_ratio"),
+            "model": backend_key(transcrever.ASR_BACKEND, transcrever.WHISPER_MODEL),
+            "error_class": error_class,
+            "peak_rss_mb": _peak_rss_mb()
+        })
+
+
+def _staged_worker_main(worker_id: int, tasks, results, retire, env: Dict[str, str], max_in_flight: int):
+    """
+    Loop de um processo worker em modo de etapas.
+
+    Vários arquivos ficam em voo ao mesmo tempo (até `max_in_flight`): um
+    é decodificado enquanto outro está na inferência e outro é gravado.
+    """
+    os.environ.update(env)
+    apply_cpu_profile()
+    import transcrever
+
+    inicio = time.perf_counter()
+    whisper_model = transcrever.load_asr_model()
+    diarization_pipeline = transcrever.load_diarization_pipeline()
+    results.put({"type": "ready", "worker": worker_id, "load_seconds": time.perf_counter() - inicio})
+
+    runner = StagedRunner(transcrever.file_stages(whisper_model, diarization_pipeline)).start()
+    slots = threading.Semaphore(max_in_flight)
+
+    def feed():
+        while True:
+            # Só pegar outra tarefa quando houver vaga: o restante da fila
+            # fica disponível para os outros workers
+            slots.acquire()
+            try:
+                retire.get_nowait()
+                break
+            except queue.Empty:
+                pass
+            task = tasks.get()
+            if task is None:
+                break
+            results.put({"type": "started", "worker": worker_id, "task_id": task["task_id"]})
+            runner.submit(transcrever.new_job(
+                task["path"], task=task, input_file=task["path"],
+                output_dir=task["output_dir"], started_at=time.perf_counter()
+            ))
+        runner.close()
+
+    threading.Thread(target=feed, name="alimentador", daemon=True).start()
+
+    for job in runner.results():
+        slots.release()
+        task = job["task"]
+        stats = transcrever.job_stats(job)
+        results.put({
+            "type": "done",
+            "worker": worker_id,
+            "task_id": task["task_id"],
+            "path": task["path"],
+            "output_dir": task["output_dir"],
+            "sucesso": job.get("error") is None,
+            "erro": job.get("error"),
+            "duracao": time.perf_counter() - job["started_at"],
+            "audio_seconds": stats["audio_seconds"],
+            "timings": stats["timings"],
+            "outputs": stats.get("outputs", []),
+            "escalated_ratio": stats.get("speculative", {}).get("escalated_ratio"),
+            "model": backend_key(transcrever.ASR_BACKEND, transcrever.WHISPER_MODEL),
+            "error_class": job.get("error_class"),
+            "peak_rss_mb": _peak_rss_mb(),
+            "stages": runner.stats()
+        })
+
+
+class WorkerPool:
+    """
+    Pool de processos com modelos carregados uma vez por processo.
+
+    Cada worker carrega Whisper e o pipeline de diarização ao iniciar e
+    depois consome caminhos de arquivo de uma fila compartilhada, então o
+    custo de importar torch e carregar os modelos é pago N vezes (uma por
+    worker) e não uma vez por arquivo. Se um worker morrer, o arquivo que
+    ele processava é reportado como erro e um substituto é iniciado.
+
+    Com `staged`, cada worker mantém até `max_in_flight` arquivos em
+    etapas diferentes (transcritor.staged). Com `cpu_partition`, cada
+    worker recebe um grupo disjunto de núcleos (afinidade e threads de
+    PyTorch/OpenMP/MKL iguais ao tamanho do grupo), em vez de todos
+    disputarem todos os núcleos. Após `resize`, a divisão vale para os
+    workers iniciados depois da mudança; os demais mantêm a sua.
+    """
+
+    def __init__(self, num_workers: int = 2, env: Optional[Dict[str, str]] = None,
+                 staged: bool = False, max_in_flight: int = 3, cpu_partition: bool = True):
+        self.num_workers = max(1, num_workers)
+        self.env = dict(env or {})
+        self.staged = staged
+        self.max_in_flight = max(1, max_in_flight)
+        self.cpu_partition = cpu_partition
+        self._slots: Dict[int, int] = {}
+
+        self._ctx = mp.get_context("spawn")
+        self._tasks = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        self._retire = self._ctx.Queue()
+        self._retiring = 0
+        self._processes: Dict[int, Any] = {}
+        self._ready = set()
+        self._in_flight: Dict[int, Dict[int, Dict[str, Any]]] = {}
+        self._stage_stats: Dict[int, Dict[str, Any]] = {}
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._next_task_id = 0
+        self._next_worker_id = 0
+
+    def start(self) -> "WorkerPool":
+        for _ in range(self.num_workers):
+            self._spawn()
+        return self
+
+    def _worker_env(self, worker_id: int) -> Dict[str, str]:
+        """Ambiente do worker: o do pool mais a sua fatia de CPUs."""
+        if not self.cpu_partition:
+            return self.env
+        # Menor posição livre na divisão atual
+        used = set(self._slots.values())
+        slot = next(i for i in range(len(used) + 1) if i not in used)
+        self._slots[worker_id] = slot
+        layout = partition_cores(max(self.num_workers, slot + 1))
+        # Configurações explícitas do pool têm precedência
+        return {**worker_env(layout[slot]), **self.env}
+
+    def _spawn(self):
+        worker_id = self._next_worker_id
+        self._next_worker_id += 1
+        env = self._worker_env(worker_id)
+        if self.staged:
+            target = _staged_worker_main
+            args = (worker_id, self._tasks, self._results, self._retire, env, self.max_in_flight)
+        else:
+            target = _worker_main
+            args = (worker_id, self._tasks, self._results, self._retire, env)
+        process = self._ctx.Process(
+            target=target,
+            args=args,
+            name=f"transcritor-worker-{worker_id}",
+            daemon=True
+        )
+        process.start()
+        self._processes[worker_id] = process
+
+    def submit(self, path: str, output_dir: str) -> int:
+        """Enfileirar um arquivo. Retorna o ID da tarefa."""
+        task = {"task_id": self._next_task_id, "path": str(path), "output_dir": str(output_dir)}
+        self._next_task_id += 1
+        self._pending[task["task_id"]] = task
+        self._tasks.put(task)
+        return task["task_id"]
+
+    def resize(self, num_workers: int):
+        """
+        Alterar o número de workers.
+
+        Novos workers são iniciados na hora; na redução, os workers saem
+        ao terminar o arquivo atual, sem interromper nenhum.
+        """
+        num_workers = max(1, num_workers)
+        active = len(self._processes) - self._retiring
+        self.num_workers = num_workers
+        for _ in range(num_workers - active):
+            self._spawn()
+        for _ in range(active - num_workers):
+            self._retire.put(True)
+            self._retiring += 1
+
+    @property
+    def pending(self) -> int:
+        """Tarefas enviadas e ainda sem resultado."""
+        return len(self._pending)
+
+    def results(self, block_until_empty: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Gerar os resultados conforme os arquivos terminam.
+
+        Com `block_until_empty`, só retorna quando todas as tarefas
+        enviadas tiverem resultado; caso contrário, gera apenas o que já
+        estiver pronto.
+        """
+        while self._pending:
+            try:
+                message = self._results.get(timeout=POLL_SECONDS if block_until_empty else 0.01)
+            except queue.Empty:
+                self._check_workers()
+                if not block_until_empty:
+                    return
+                continue
+
+            if message["type"] == "ready":
+                self._ready.add(message["worker"])
+                logger.info(f"Worker {message['worker']} pronto em {message['load_seconds']:.1f}s")
+            elif message["type"] == "started":
+                self._in_flight.setdefault(message["worker"], {})[message["task_id"]] = self._pending[message["task_id"]]
+            elif message["type"] == "done" and message["task_id"] in self._pending:
+                self._in_flight.get(message["worker"], {}).pop(message["task_id"], None)
+                del self._pending[message["task_id"]]
+                if message.get("stages"):
+                    self._stage_stats[message["worker"]] = message["stages"]
+                yield message
+
+        self._check_workers()
+
+    def _check_workers(self):
+        """Substituir workers mortos e reportar o arquivo que processavam."""
+        for worker_id, process in list(self._processes.items()):
+            if process.is_alive():
+                continue
+            del self._processes[worker_id]
+            self._slots.pop(worker_id, None)
+            ready = worker_id in self._ready
+            self._ready.discard(worker_id)
+            if process.exitcode == 0 and self._retiring:
+                # Saída pedida por resize
+                self._retiring -= 1
+                logger.info(f"Worker {worker_id} encerrado (redução do pool)")
+                continue
+            erro = f"Worker terminou inesperadamente (código {process.exitcode})"
+            logger.error(f"Worker {worker_id}: {erro}")
+
+            for task in self._in_flight.pop(worker_id, {}).values():
+                self._fail(task, erro)
+
+            # Só substitui workers que chegaram a carregar os modelos; falhas
+            # na inicialização (ex.: token ausente) se repetiriam
+            if ready:
+                self._spawn()
+
+        if not self._processes:
+            for task in list(self._pending.values()):
+                self._fail(task, "Nenhum worker conseguiu iniciar", "WorkerStartupFailed")
+
+    def stage_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Utilização média de cada etapa entre os workers (modo `staged`).
+
+        A etapa com maior utilização é o gargalo; tempo bloqueado alto
+        nas etapas anteriores confirma a fila cheia à frente.
+        """
+        combined: Dict[str, Dict[str, Any]] = {}
+        for stages in self._stage_stats.values():
+            for name, stats in stages.items():
+                total = combined.setdefault(name, {
+                    "items": 0, "busy_seconds": 0.0, "blocked_seconds": 0.0, "utilization": 0.0
+                })
+                total["items"] += stats["items"]
+                total["busy_seconds"] += stats["busy_seconds"]
+                total["blocked_seconds"] += stats["blocked_seconds"]
+                total["utilization"] += stats["utilization"] / len(self._stage_stats)
+        return combined
+
+    def _fail(self, task: Dict[str, Any], erro: str, error_class: str = "WorkerCrashed"):
+        """Publicar um resultado de erro em nome de um worker."""
+        self._results.put({
+            "type": "done",
+            "worker": None,
+            "task_id": task["task_id"],
+            "path": task["path"],
+            "output_dir": task["output_dir"],
+            "sucesso": False,
+            "erro": erro,
+            "duracao": 0.0,
+            "audio_seconds": 0.0,
+            "timings": {},
+            "outputs": [],
+            "model": self.env.get("WHISPER_MODEL"),
+            "error_class": error_class,
+            "peak_rss_mb": None
+        })
+
+    def close(self):
+        """Encerrar os workers após as tarefas pendentes."""
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes.values():
+            process.join()
+        self._processes.clear()
+
+    def __enter__(self) -> "WorkerPool":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()